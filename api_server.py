@@ -3,13 +3,40 @@ FastAPI server for external widget API access.
 Provides REST endpoint for chat widget to communicate with AI assistant.
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import BackgroundTasks, FastAPI, Header, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from typing import List, Tuple, Optional
+import asyncio
+import math
+import os
+import secrets
 import uvicorn
+from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
 
-from core.chat import chat as chat_function
+from core.admission import rate_limiter, Overloaded, PRIORITY_HIGH, PRIORITY_NORMAL
+from core.budget import RequestBudget
+from config import ADMIN_TOKEN, FORWARDED_ALLOW_IPS, VECTOR_STORE_READ_ONLY
+from core.chat import chat as chat_function, summarize_history
+from core.starters import answer_starter, cached_starter, find_starter, starter_questions
+from rag.hot_reload import start_watcher
+from rag.vector_store import get_index_version
+from storage.cache import set_index_version
+from storage.database import get_export_cursors
+from storage.export import EXPORT_FORMATS, EXPORT_TABLES, ExportError, TableExport
+from storage.sessions import (new_session_id, get_history, append_turn, compact_session, legacy_session,
+                              remember_legacy_session)
+from storage.tenants import UnknownTenantError, list_tenants, set_tenant, tenant_context
+from utils.compression import CompressionMiddleware
+from utils.http_cache import (IMMUTABLE, WIDGET_MAX_AGE, etag_matches, load_asset, not_modified,
+                              starter_cache_control)
+from utils.metrics import HTTP_NOT_MODIFIED, render_metrics
+from utils.profiling import get_profile_path, list_profiles, profile_call, should_profile
+from utils.log import get_logger, set_request_id
+
+logger = get_logger(__name__)
 
 app = FastAPI(
     title="Career AI Assistant API",
@@ -24,23 +51,63 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Brotli or gzip for JSON, the widget page and streamed exports (utils/compression.py)
+app.add_middleware(CompressionMiddleware)
+# Client address from X-Forwarded-For when the peer is a trusted proxy (rate limits key on it)
+app.add_middleware(ProxyHeadersMiddleware, trusted_hosts=FORWARDED_ALLOW_IPS)
+
+@app.middleware("http")
+async def request_id_middleware(request: Request, call_next):
+    """Bind a request ID to every log record emitted while handling the request."""
+    request_id = set_request_id(request.headers.get("X-Request-ID"))
+    response = await call_next(request)
+    response.headers["X-Request-ID"] = request_id
+    return response
+
+@app.on_event("startup")
+async def tag_cache_with_index_version():
+    """Tag cache entries with the knowledge index version this worker serves, per tenant."""
+    def tag(tenant_id: str):
+        with tenant_context(tenant_id) as tenant:
+            set_index_version(get_index_version(tenant.collection_name))
+
+    for tenant_id in list_tenants():
+        try:
+            await run_in_threadpool(tag, tenant_id)
+        except Exception as e:
+            logger.warning("Could not read index version for tenant %s: %s", tenant_id, e)
+
+@app.on_event("startup")
+async def watch_knowledge_base():
+    """Hot-reload the knowledge base in this process unless it is a read-only worker (gunicorn runs a watcher)."""
+    if not VECTOR_STORE_READ_ONLY:
+        start_watcher()
 
 class ChatRequest(BaseModel):
     message: str
+    session_id: Optional[str] = None
+    # Tenant to chat with; the X-Tenant-ID header is used when omitted
+    tenant_id: Optional[str] = None
+    # Deprecated: full [user, assistant] history from clients without sessions
     history: Optional[List[Tuple[str, str]]] = []
 
 class ChatResponse(BaseModel):
     response: str
+    session_id: str
     status: str = "success"
 
 @app.get("/")
 async def root():
+    widget = load_asset()
     return {
         "message": "Career AI Assistant API",
         "version": "1.0.0",
         "endpoints": {
             "chat": "/api/chat",
-            "health": "/health"
+            "starters": "/api/starters",
+            "widget": f"/widget/{widget.hashed_name}" if widget else None,
+            "health": "/health",
+            "metrics": "/metrics"
         }
     }
 
@@ -48,36 +115,246 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus scrape endpoint for pipeline latency, cache and token metrics."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+def require_admin(token: Optional[str]):
+    """Reject admin requests without the ADMIN_TOKEN (404 when no token is configured)."""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not found")
+    if not token or not secrets.compare_digest(token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+@app.get("/admin/profiles")
+async def admin_profiles(x_admin_token: Optional[str] = Header(None)):
+    """Recent chat request profiles (utils/profiling.py), newest first."""
+    require_admin(x_admin_token)
+    return {"profiles": await run_in_threadpool(list_profiles)}
+
+@app.get("/admin/profiles/{profile_id}")
+async def admin_profile(profile_id: str, x_admin_token: Optional[str] = Header(None)):
+    """Download one profile: open .speedscope.json at speedscope.app, or feed .collapsed to flamegraph.pl."""
+    require_admin(x_admin_token)
+    path = get_profile_path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail=f"Unknown profile: {profile_id}")
+    return FileResponse(path, filename=path.name)
+
+def _use_tenant(tenant_id: Optional[str]):
+    try:
+        set_tenant(tenant_id)
+    except UnknownTenantError:
+        raise HTTPException(status_code=404, detail=f"Unknown tenant: {tenant_id}")
+
+@app.get("/admin/export")
+async def admin_exports(x_admin_token: Optional[str] = Header(None), x_tenant_id: Optional[str] = Header(None)):
+    """Exportable tables, formats, and the tenant's named incremental export cursors."""
+    require_admin(x_admin_token)
+    _use_tenant(x_tenant_id)
+    return {"tables": list(EXPORT_TABLES), "formats": list(EXPORT_FORMATS),
+            "cursors": await run_in_threadpool(get_export_cursors)}
+
+@app.get("/admin/export/{table}")
+async def admin_export(table: str, format: str = "csv", since_id: Optional[int] = None, cursor: Optional[str] = None,
+                       start: Optional[str] = None, end: Optional[str] = None,
+                       x_admin_token: Optional[str] = Header(None), x_tenant_id: Optional[str] = Header(None)):
+    """
+    Stream a table as CSV, NDJSON or Parquet (storage/export.py), chunk by chunk.
+
+    Args:
+        table: leads, gaps, conversations, cache_stats, budgets or routes
+        format: csv, ndjson or parquet
+        since_id: Only rows after this id (a previous export's X-Export-Next-Since)
+        cursor: Named cursor to continue from, advanced when the export completes
+        start: Only rows at or after this ISO date/time (UTC)
+        end: Only rows before this ISO date/time (UTC)
+    """
+    require_admin(x_admin_token)
+    _use_tenant(x_tenant_id)
+    if table not in EXPORT_TABLES:
+        raise HTTPException(status_code=404, detail=f"Unknown export table: {table}")
+    try:
+        export = await run_in_threadpool(TableExport, table, format, since_id, start, end, cursor)
+    except ExportError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return StreamingResponse(iter(export), media_type=export.media_type, headers={
+        "Content-Disposition": f'attachment; filename="{export.filename}"',
+        "X-Export-Next-Since": str(export.next_since),
+    })
+
+def _check_rate_limit(http_request: Request):
+    """429 with Retry-After when the client IP or Origin is over its rate (core/admission.py)."""
+    client_ip = http_request.client.host if http_request.client else "unknown"
+    retry_after = rate_limiter.check(client_ip, http_request.headers.get("Origin"))
+    if retry_after is not None:
+        raise HTTPException(status_code=429, detail="Too many requests",
+                            headers={"Retry-After": str(math.ceil(retry_after))})
+
+@app.get("/widget/{name}")
+async def widget(name: str, http_request: Request):
+    """
+    The chat widget page (utils/http_cache.py): chat-widget.html is revalidated
+    after WIDGET_MAX_AGE, the content-hashed name listed at / is immutable.
+    """
+    asset = load_asset()
+    if asset is None or name not in (asset.name, asset.hashed_name):
+        raise HTTPException(status_code=404, detail="Not found")
+    cache_control = IMMUTABLE if name == asset.hashed_name else f"public, max-age={WIDGET_MAX_AGE}"
+    if etag_matches(http_request.headers.get("If-None-Match"), asset.etag):
+        HTTP_NOT_MODIFIED.labels("widget").inc()
+        return not_modified(asset.etag, cache_control)
+    return Response(asset.body, media_type=asset.media_type,
+                    headers={"ETag": asset.etag, "Cache-Control": cache_control})
+
+@app.get("/api/starters")
+async def starters(http_request: Request, x_tenant_id: Optional[str] = Header(None)):
+    """
+    Starter questions for the widget (core/starters.py), cacheable by browsers
+    and CDNs until the knowledge base changes.
+    """
+    _use_tenant(x_tenant_id)
+    # Only reads a file when the index version changed; cheaper than a threadpool hop
+    questions, etag = starter_questions()
+    cache_control = starter_cache_control()
+    if etag_matches(http_request.headers.get("If-None-Match"), etag):
+        HTTP_NOT_MODIFIED.labels("starters").inc()
+        return not_modified(etag, cache_control, vary="X-Tenant-ID")
+    return JSONResponse({"questions": questions},
+                        headers={"ETag": etag, "Cache-Control": cache_control, "Vary": "X-Tenant-ID"})
+
+@app.get("/api/starters/answer")
+async def starter_answer(q: str, http_request: Request, x_tenant_id: Optional[str] = Header(None)):
+    """
+    Answer one starter question over GET, with an ETag and Cache-Control.
+
+    Repeats are answered from memory, and a matching If-None-Match gets a
+    304, without retrieval or the LLM. Only starter questions are accepted;
+    everything else goes through POST /api/chat. Answering adds nothing to
+    a session: the widget sends starter turns as history with its first
+    chat message.
+
+    Args:
+        q: A question from /api/starters (case and spacing ignored)
+    """
+    _use_tenant(x_tenant_id)
+    question = find_starter(q)
+    if question is None:
+        raise HTTPException(status_code=404, detail="Not a starter question")
+
+    cached = cached_starter(question)
+    if cached:
+        answer, etag = cached
+    else:
+        _check_rate_limit(http_request)
+        try:
+            answer, etag = await run_in_threadpool(answer_starter, question)
+        except Overloaded as e:
+            raise HTTPException(status_code=503, detail="Server busy, please retry",
+                                headers={"Retry-After": str(math.ceil(e.retry_after))})
+
+    body = {"question": question, "answer": answer}
+    if etag is None:
+        return JSONResponse(body, headers={"Cache-Control": "no-store"})
+    cache_control = starter_cache_control()
+    if etag_matches(http_request.headers.get("If-None-Match"), etag):
+        HTTP_NOT_MODIFIED.labels("starter_answer").inc()
+        return not_modified(etag, cache_control, vary="X-Tenant-ID")
+    return JSONResponse(body, headers={"ETag": etag, "Cache-Control": cache_control, "Vary": "X-Tenant-ID"})
+
 @app.post("/api/chat", response_model=ChatResponse)
-async def chat_endpoint(request: ChatRequest):
+async def chat_endpoint(request: ChatRequest, http_request: Request, http_response: Response,
+                        background_tasks: BackgroundTasks, x_tenant_id: Optional[str] = Header(None),
+                        x_profile: Optional[str] = Header(None)):
     """
     Main chat endpoint for widget communication.
+
+    The client sends only the new message and its session_id; history is
+    kept server-side. Omit session_id to start a new session. Legacy
+    clients that send their whole history instead continue the session
+    their previous turn was stored in (storage/sessions.py).
+
+    The tenant (persona, knowledge base, cache and database) comes from
+    request.tenant_id or the X-Tenant-ID header, defaulting to the
+    configured assistant. Thread-pool calls and background tasks inherit it.
+
+    Admission control (core/admission.py): clients over their per-IP or
+    per-Origin rate get a 429, and cache misses that can't get an LLM slot
+    in time get a 503, both with Retry-After. Conversations in progress
+    are queued ahead of new ones.
+
+    With an X-Profile header equal to ADMIN_TOKEN (or when sampled by
+    PROFILE_SAMPLE_RATE) chat() runs under the sampling profiler and the
+    response carries an X-Profile-ID for /admin/profiles/{id}.
     
     Args:
-        request: ChatRequest with message and conversation history
+        request: ChatRequest with message, session ID and optional tenant ID
+        http_request: Raw request, for the client address and Origin header
+        http_response: Response, for the X-Profile-ID header
+        x_tenant_id: Tenant ID header, used when the body has none
+        x_profile: Admin token to profile this request
         
     Returns:
-        ChatResponse with AI assistant's reply
+        ChatResponse with AI assistant's reply and the session ID to reuse
     """
+    _check_rate_limit(http_request)
+
     try:
         if not request.message or not request.message.strip():
             raise HTTPException(status_code=400, detail="Message cannot be empty")
+
+        _use_tenant(request.tenant_id or x_tenant_id)
+
+        legacy = not request.session_id and bool(request.history)
+        if legacy:
+            session_id = await run_in_threadpool(legacy_session, request.history)
+        else:
+            session_id = request.session_id or new_session_id()
+
+        history = await run_in_threadpool(get_history, session_id)
+
+        # chat() blocks on retrieval and the LLM; keep the event loop free.
+        # If the client goes away the await is cancelled, but the worker thread
+        # keeps running, so tell it to stop at the next round boundary.
+        budget = RequestBudget()
+        try:
+            priority = PRIORITY_HIGH if history else PRIORITY_NORMAL
+            if should_profile(x_profile):
+                response, profile_id = await run_in_threadpool(
+                    profile_call, chat_function, request.message, history, budget, priority)
+                if profile_id:
+                    http_response.headers["X-Profile-ID"] = profile_id
+            else:
+                response = await run_in_threadpool(chat_function, request.message, history, budget, priority)
+        except asyncio.CancelledError:
+            budget.cancel()
+            raise
+
+        await run_in_threadpool(append_turn, session_id, request.message, response)
+        if legacy:
+            await run_in_threadpool(remember_legacy_session, session_id,
+                                    list(request.history) + [(request.message, response)])
+        background_tasks.add_task(compact_session, session_id, summarize_history)
+
+        return ChatResponse(response=response, session_id=session_id, status="success")
         
-        history_formatted = [
-            {"role": "user", "content": msg[0]} if i % 2 == 0 
-            else {"role": "assistant", "content": msg[1]}
-            for i, msg in enumerate(request.history)
-            for _ in [0, 1]
-        ]
-        
-        response = chat_function(request.message, history_formatted)
-        
-        return ChatResponse(response=response, status="success")
-        
+    except HTTPException:
+        raise
+    except Overloaded as e:
+        raise HTTPException(status_code=503, detail="Server busy, please retry",
+                            headers={"Retry-After": str(math.ceil(e.retry_after))})
     except Exception as e:
+        logger.exception("Chat request failed")
         raise HTTPException(status_code=500, detail=f"Error processing request: {str(e)}")
 
 if __name__ == "__main__":
+    workers = int(os.getenv("API_WORKERS", "1"))
     print("🚀 Starting FastAPI server on http://127.0.0.1:8000")
     print("📖 API docs available at http://127.0.0.1:8000/docs")
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    if workers > 1:
+        # For production multi-worker mode prefer: gunicorn -c gunicorn_conf.py api_server:app
+        print(f"👥 Running {workers} workers")
+        uvicorn.run("api_server:app", host="0.0.0.0", port=8000, workers=workers)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
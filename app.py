@@ -1,23 +1,66 @@
 """
 Gradio app - the main entry point.
+
+Run on its own with `python app.py`, or mounted inside the widget API by
+server.py so both share one process, index, cache and database.
 """
 
+import inspect
+import threading
 import gradio as gr
+from config import VECTOR_STORE_READ_ONLY
 from core.chat import chat
 from rag.vector_store import get_collection_stats
+from rag.index_artifact import install_artifact
 from rag.knowledge_indexer import index_knowledge_base
 
-# Auto-index knowledge base if vector store is empty
-try:
-    stats = get_collection_stats()
-    if stats["total_documents"] == 0:
-        print("📚 Vector store empty — auto-indexing knowledge base...")
-        index_knowledge_base(reset=False)
-    else:
-        print(f"✅ Vector store has {stats['total_documents']} documents")
-except Exception as e:
-    print(f"⚠️ Knowledge indexing skipped: {e}")
+
+def prepare_knowledge_base():
+    """
+    Fill an empty vector store (skipped in read-only workers): from the
+    prebuilt index artifact when it matches the knowledge base, otherwise
+    by indexing the documents.
+    """
+    if VECTOR_STORE_READ_ONLY:
+        return
+    try:
+        stats = get_collection_stats()
+        if stats["total_documents"] > 0:
+            print(f"✅ Vector store has {stats['total_documents']} documents")
+        elif not install_artifact():
+            print("📚 Vector store empty — auto-indexing knowledge base...")
+            index_knowledge_base(reset=False)
+    except Exception as e:
+        print(f"⚠️ Knowledge indexing skipped: {e}")
+
+
+def _warm_cache():
+    from rag.cache_warmer import warm_cache
+    try:
+        warm_cache()
+    except Exception as e:
+        print(f"⚠️ Cache warming skipped: {e}")
+
+
+def start_cache_warming():
+    """Warm the response cache in the background so startup isn't delayed."""
+    threading.Thread(target=_warm_cache, daemon=True).start()
+
+
+def build_interface() -> gr.ChatInterface:
+    """The chat UI. Gradio 6 only speaks the messages format and dropped the `type` argument."""
+    if "type" in inspect.signature(gr.ChatInterface).parameters:
+        return gr.ChatInterface(chat, type="messages")
+    return gr.ChatInterface(chat)
+
 
 # Launch Gradio interface
 if __name__ == "__main__":
-    gr.ChatInterface(chat, type="messages").launch()
\ No newline at end of file
+    prepare_knowledge_base()
+    start_cache_warming()
+
+    # Pick up knowledge base edits without a restart (swaps in a new index version)
+    from rag.hot_reload import start_watcher
+    start_watcher()
+
+    build_interface().launch()
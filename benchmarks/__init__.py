@@ -0,0 +1 @@
+"""Benchmarks - mock LLM server and latency benchmark suite."""
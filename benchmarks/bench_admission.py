@@ -0,0 +1,149 @@
+"""
+Admission Benchmark - visitor latency while a scraper floods the chat API.
+
+Simulates the request path in-process with the real RateLimiter and
+LLMGate from core.admission. The LLM provider is modelled as a fixed number
+of concurrent calls (its rate limit) with a fixed latency; requests beyond
+that wait for the provider.
+
+One scraper IP sends requests from many threads while visitors, each from
+their own IP, send one request at a time with think time in between. A
+share of requests are cache hits, which never reach the LLM. Every request
+also pays a network round trip, so rejected requests aren't free. Two runs:
+  - open:      no rate limits, no gate (every request waits for the provider)
+  - admission: per-IP token buckets plus the gate, which rejects fast
+               instead of queueing without bound
+
+Usage: python -m benchmarks.bench_admission
+       python -m benchmarks.bench_admission --scrapers 64 --duration 10
+"""
+
+import argparse
+import os
+import random
+import threading
+import time
+from contextlib import nullcontext
+from typing import Dict, List
+
+os.environ.setdefault("GROQ_API_KEY", "mock-key")
+
+from benchmarks.run_benchmarks import percentile  # noqa: E402
+from core.admission import (LLMGate, Overloaded, RateLimiter, TokenBuckets,  # noqa: E402
+                            PRIORITY_HIGH, PRIORITY_NORMAL)
+
+
+class Provider:
+    """LLM API with a concurrency limit: extra calls wait (like a provider-side rate limit)."""
+
+    def __init__(self, capacity: int, latency: float):
+        self._slots = threading.BoundedSemaphore(capacity)
+        self.latency = latency
+
+    def complete(self):
+        with self._slots:
+            time.sleep(self.latency)
+
+
+def run(admission: bool, args) -> Dict[str, Dict]:
+    """One load run; returns per-client-kind outcomes and visitor latencies."""
+    provider = Provider(args.provider_capacity, args.llm_ms / 1000)
+    limiter = RateLimiter()
+    limiter.by_ip = TokenBuckets(args.ip_per_minute, args.ip_burst)
+    limiter.by_origin = TokenBuckets(1e9, 10**9)     # one origin: only the IP limit applies
+    gate = LLMGate(args.provider_capacity, args.queue_max)
+    stop_at = time.monotonic() + args.duration
+    rng = random.Random(0)
+    lock = threading.Lock()
+    stats = {kind: {"ok": 0, "429": 0, "503": 0, "latencies": []} for kind in ("visitor", "scraper")}
+
+    def request(kind: str, ip: str, turn: int):
+        start = time.perf_counter()
+        time.sleep(args.rtt_ms / 1000)
+        status = "ok"
+        if admission and limiter.check(ip, "https://example.com") is not None:
+            status = "429"
+        else:
+            with lock:
+                cache_hit = rng.random() < args.cache_hit_rate
+            if not cache_hit:
+                try:
+                    priority = PRIORITY_HIGH if turn else PRIORITY_NORMAL
+                    with gate.slot(priority, args.queue_timeout) if admission else nullcontext():
+                        provider.complete()
+                except Overloaded:
+                    status = "503"
+        elapsed = time.perf_counter() - start
+        with lock:
+            stats[kind][status] += 1
+            if status == "ok":
+                stats[kind]["latencies"].append(elapsed)
+
+    def visitor(i: int):
+        turn = 0
+        while time.monotonic() < stop_at:
+            request("visitor", f"10.0.1.{i}", turn)
+            turn += 1
+            time.sleep(args.think_ms / 1000)
+
+    def scraper(i: int):
+        turn = 0
+        while time.monotonic() < stop_at:
+            request("scraper", "10.0.9.9", turn)
+            turn += 1
+
+    threads = ([threading.Thread(target=visitor, args=(i,)) for i in range(args.visitors)] +
+               [threading.Thread(target=scraper, args=(i,)) for i in range(args.scrapers)])
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return stats
+
+
+def print_run(name: str, stats: Dict[str, Dict]):
+    print(f"\n{name}")
+    for kind, s in stats.items():
+        latencies: List[float] = s["latencies"]
+        total = s["ok"] + s["429"] + s["503"]
+        line = f"   {kind:<8} {total:>6} requests  ok {s['ok']:>6}  429 {s['429']:>6}  503 {s['503']:>6}"
+        if latencies:
+            line += (f"  p50 {1000 * percentile(latencies, 50):>8.1f} ms"
+                     f"  p95 {1000 * percentile(latencies, 95):>8.1f} ms")
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Visitor latency under a scraper flood, with and without admission")
+    parser.add_argument("--visitors", type=int, default=8)
+    parser.add_argument("--scrapers", type=int, default=32, help="Concurrent scraper threads (one IP)")
+    parser.add_argument("--duration", type=float, default=6.0)
+    parser.add_argument("--provider-capacity", type=int, default=4, help="Concurrent LLM calls the provider allows")
+    parser.add_argument("--llm-ms", type=float, default=200.0)
+    parser.add_argument("--rtt-ms", type=float, default=5.0, help="Network round trip per request")
+    parser.add_argument("--think-ms", type=float, default=1000.0, help="Visitor pause between messages")
+    parser.add_argument("--cache-hit-rate", type=float, default=0.2)
+    parser.add_argument("--ip-per-minute", type=float, default=20.0)
+    parser.add_argument("--ip-burst", type=int, default=10)
+    parser.add_argument("--queue-max", type=int, default=32)
+    parser.add_argument("--queue-timeout", type=float, default=2.0)
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("Admission Benchmark")
+    print("=" * 70)
+    print(f"👥 {args.visitors} visitors, {args.scrapers} scraper threads, provider {args.provider_capacity} "
+          f"x {args.llm_ms:.0f} ms, {args.duration:.0f}s per run")
+
+    open_stats = run(False, args)
+    print_run("🚪 Open (no admission control)", open_stats)
+    admitted_stats = run(True, args)
+    print_run("🛡️  Admission control", admitted_stats)
+
+    before = percentile(open_stats["visitor"]["latencies"], 95)
+    after = percentile(admitted_stats["visitor"]["latencies"], 95)
+    print(f"\n{'✅' if after < before else '❌'} Visitor p95 {1000 * before:.0f} ms -> {1000 * after:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
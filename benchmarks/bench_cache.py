@@ -0,0 +1,119 @@
+"""
+Cache Tier Benchmark - lookup cost of the in-process tier vs the DiskCache tier.
+Also checks chunk invalidation: changing one chunk must drop exactly the
+entries built on it, including while other threads look entries up (as
+during a hot reload). Uses a scratch cache directory and database.
+
+Usage: python -m benchmarks.bench_cache
+"""
+
+import os
+import tempfile
+import threading
+import time
+
+SCRATCH = tempfile.mkdtemp(prefix="career-bench-cache-")
+os.environ["CACHE_DIR"] = os.path.join(SCRATCH, "cache")
+os.environ["DATABASE_PATH"] = os.path.join(SCRATCH, "bench.db")
+os.environ.setdefault("GROQ_API_KEY", "mock-key")
+
+from storage import cache  # noqa: E402  (env must be set first)
+from storage.tenants import DEFAULT_TENANT_ID  # noqa: E402
+
+ITERATIONS = 20_000
+ENTRIES = 200
+CHUNKS = ["linkedin_chunk_3@9f2c61d04ab87e15", "summary_chunk_0@41be0a7c2d9e3f58", "summary_chunk_4@c07d5e19a3b26f84"]
+RESPONSE = "I have worked on retrieval systems, APIs and data pipelines. " * 12
+
+
+def _time_ns(func, iterations: int = ITERATIONS) -> float:
+    start = time.perf_counter_ns()
+    for i in range(iterations):
+        func(i)
+    return (time.perf_counter_ns() - start) / iterations
+
+
+def concurrent_invalidation(seconds: float = 2.0) -> list:
+    """Look up memory-tier entries from several threads while invalidating; returns the errors raised."""
+    tier = cache.MemoryTier(ENTRIES * 2, ttl=3600)
+    keys = [(DEFAULT_TENANT_ID, f"question {i}", (f"chunk_{i % 10}@v1",)) for i in range(ENTRIES)]
+    errors, stop = [], threading.Event()
+
+    def lookups():
+        i = 0
+        while not stop.is_set():
+            try:
+                tier.get(keys[i % ENTRIES])
+            except Exception as e:
+                errors.append(e)
+                return
+            i += 1
+
+    threads = [threading.Thread(target=lookups) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline and not errors:
+        for key in keys:
+            tier.set(key, {"response": RESPONSE})
+        try:
+            tier.drop_chunks(DEFAULT_TENANT_ID, {f"chunk_{i}" for i in range(0, 10, 2)})
+        except Exception as e:
+            errors.append(e)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return errors
+
+
+def main():
+    queries = [f"What did you work on in project {i}?" for i in range(ENTRIES)]
+    keys = [cache.generate_cache_key(q, CHUNKS) for q in queries]
+    memory_keys = [(DEFAULT_TENANT_ID, q.lower().strip(), tuple(CHUNKS)) for q in queries]
+    for query in queries:
+        cache.set_cached_response(query, CHUNKS, RESPONSE)
+
+    memory_ns = _time_ns(lambda i: cache._memory.get(memory_keys[i % ENTRIES]))
+    disk = cache.get_cache()
+    disk_ns = _time_ns(lambda i: cache._decompress(disk.get(keys[i % ENTRIES])), ITERATIONS // 10)
+    key_ns = _time_ns(lambda i: cache.generate_cache_key(queries[i % ENTRIES], CHUNKS))
+    hot_ns = _time_ns(lambda i: cache.get_cached_response(queries[i % ENTRIES], CHUNKS))
+
+    raw_bytes = len(RESPONSE.encode())
+    stored_bytes = len(cache._compress({"response": RESPONSE})["response"])
+
+    print("=" * 60)
+    print("Cache Tier Benchmark")
+    print("=" * 60)
+    print(f"   memory tier get:       {memory_ns:10.0f} ns")
+    print(f"   disk tier get:         {disk_ns:10.0f} ns")
+    print(f"   disk key (sha256):     {key_ns:10.0f} ns  (memory hits skip this)")
+    print(f"   get_cached_response:   {hot_ns:10.0f} ns  (memory hit, incl. span + metrics)")
+    print(f"   response compression:  {raw_bytes} -> {stored_bytes} bytes")
+    print(f"\n📊 {cache.get_cache_stats()}")
+
+    # An unrelated entry must survive invalidation of the chunks above
+    other = ["projects_chunk_1@5a0e9d27c4f1b386"]
+    cache.set_cached_response("What are your hobbies?", other, RESPONSE)
+    start = time.perf_counter()
+    removed = cache.invalidate_chunks(["summary_chunk_4"])
+    invalidate_ms = (time.perf_counter() - start) * 1000
+    gone = all(cache.get_cached_response(q, CHUNKS) is None for q in queries)
+    kept = cache.get_cached_response("What are your hobbies?", other) is not None
+    print(f"   invalidate 1 chunk:    {invalidate_ms:10.2f} ms  ({removed} entries removed)")
+
+    print(f"✅ Memory tier {disk_ns / memory_ns:.0f}x faster than disk")
+    if removed != ENTRIES or not gone or not kept:
+        print("❌ Chunk invalidation removed the wrong entries")
+        raise SystemExit(1)
+    print("✅ Chunk invalidation removed exactly the affected entries")
+
+    errors = concurrent_invalidation()
+    if errors:
+        print(f"❌ Lookups during invalidation raised {type(errors[0]).__name__}: {errors[0]}")
+        raise SystemExit(1)
+    print("✅ Lookups during invalidation raised no errors")
+
+
+if __name__ == "__main__":
+    main()
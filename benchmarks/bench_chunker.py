@@ -0,0 +1,182 @@
+"""
+Chunker Benchmark - property checks and throughput for rag.chunker.
+
+Checks, for random resume-like documents:
+  - every chunk is an exact slice of the input (text == text[start:end])
+  - no chunk exceeds max_tokens, and its token count is correct
+  - every token of the input is covered by some chunk
+  - consecutive chunks advance (start and end strictly increase) and
+    overlap by at most overlap_tokens
+  - no chunk crosses a section heading
+
+Then compares throughput against the original character-based chunk_text
+on inputs up to several MB, and counts near-duplicate chunks (chunks whose
+text is contained in the previous chunk).
+
+Usage: python -m benchmarks.bench_chunker
+       python -m benchmarks.bench_chunker --iterations 5000 --seed 3 --max-mb 8
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+from config import KNOWLEDGE_DIR
+from rag.chunker import SECTION_HEADINGS, _TOKEN, chunk_document, heading_section
+
+WORDS = ["Python", "pipelines", "reduced", "latency", "by", "30%", "AWS", "Lambda", "built", "RAG",
+         "e.g.", "3.72", "U.S.", "—", "(BigQuery)", "and", "the", "models", "supercalifragilistic" * 3,
+         "résumé", "naïve", "日本語", "\u00a0", "’s"]
+
+
+def legacy_chunk_text(text: str, chunk_size: int = 500, overlap: int = 50) -> list:
+    """The original rag.knowledge_indexer.chunk_text, kept as the reference."""
+    chunks = []
+    start = 0
+    text_length = len(text)
+
+    while start < text_length:
+        end = start + chunk_size
+
+        if end < text_length:
+            last_period = text.rfind('.', start, end)
+            last_newline = text.rfind('\n', start, end)
+            break_point = max(last_period, last_newline)
+
+            if break_point > start:
+                end = break_point + 1
+
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+
+        start = end - overlap
+
+    return chunks
+
+
+def random_document(rng: random.Random) -> str:
+    headings = [h for names in SECTION_HEADINGS.values() for h in names]
+    lines = []
+    for _ in range(rng.randint(0, 60)):
+        roll = rng.random()
+        if roll < 0.1:
+            heading = rng.choice(headings)
+            lines.append(rng.choice([heading.title(), heading.upper(), f"## {heading}", f"{heading}:"]))
+        elif roll < 0.15:
+            lines.append(rng.choice(["", "   ", "\t"]))
+        else:
+            words = [rng.choice(WORDS) for _ in range(rng.randint(1, 80))]
+            sentence_ends = [". ", "! ", "? ", " "]
+            line = " ".join(w + (rng.choice(sentence_ends) if rng.random() < 0.1 else "") for w in words)
+            lines.append(("•" if rng.random() < 0.3 else "") + line)
+    return rng.choice(["\n", "\n\n", "\r\n"]).join(lines)
+
+
+def _tokens(text: str, start: int, end: int) -> int:
+    return sum(1 for _ in _TOKEN.finditer(text, start, end))
+
+
+def check_properties(text: str, max_tokens: int, overlap_tokens: int) -> list:
+    """Return a list of property violations (empty if all hold)."""
+    chunks = chunk_document(text, max_tokens, overlap_tokens)
+    errors = []
+
+    for chunk in chunks:
+        if chunk["text"] != text[chunk["start"]:chunk["end"]]:
+            errors.append("chunk text is not a slice of the input")
+        actual = _tokens(text, chunk["start"], chunk["end"])
+        if actual != chunk["tokens"] or actual > max_tokens:
+            errors.append(f"chunk has {actual} tokens (reported {chunk['tokens']}, max {max_tokens})")
+
+    covered_to = 0
+    for chunk in sorted(chunks, key=lambda c: c["start"]):
+        gap_tokens = _tokens(text, covered_to, chunk["start"]) if chunk["start"] > covered_to else 0
+        if gap_tokens:
+            errors.append(f"{gap_tokens} tokens before offset {chunk['start']} are not in any chunk")
+        covered_to = max(covered_to, chunk["end"])
+    if _tokens(text, covered_to, len(text)):
+        errors.append("tokens at the end of the input are not in any chunk")
+
+    for previous, chunk in zip(chunks, chunks[1:]):
+        if chunk["start"] >= previous["end"]:
+            continue  # no overlap (also the case across sections)
+        if chunk["start"] <= previous["start"] or chunk["end"] <= previous["end"]:
+            errors.append("chunk does not advance past the previous one")
+        if _tokens(text, chunk["start"], previous["end"]) > overlap_tokens:
+            errors.append("overlap exceeds overlap_tokens")
+
+    heading_offsets = []
+    offset = 0
+    for line in text.split("\n"):
+        if heading_section(line):
+            heading_offsets.append(offset + len(line) - len(line.lstrip()))
+        offset += len(line) + 1
+    for chunk in chunks:
+        if any(chunk["start"] < h < chunk["end"] for h in heading_offsets):
+            errors.append("chunk crosses a section heading")
+
+    return errors
+
+
+def near_duplicates(chunks: list) -> int:
+    return sum(1 for previous, chunk in zip(chunks, chunks[1:]) if chunk in previous)
+
+
+def corpus(size_bytes: int) -> str:
+    files = sorted(Path(KNOWLEDGE_DIR).glob("*.txt"))
+    base = "\n".join(f.read_text(encoding="utf-8") for f in files) or "Experience\nBuilt RAG pipelines. " * 50
+    return (base * (size_bytes // len(base) + 1))[:size_bytes]
+
+
+def _throughput(func, text: str) -> float:
+    start = time.perf_counter()
+    func(text)
+    return len(text) / (time.perf_counter() - start) / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Property checks and throughput for rag.chunker")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-mb", type=float, default=4.0)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    print("=" * 70)
+    print("Chunker Benchmark")
+    print("=" * 70)
+
+    failures = 0
+    for i in range(args.iterations):
+        text = random_document(rng)
+        max_tokens = rng.choice([1, 2, 5, 16, 64, 128])
+        overlap_tokens = rng.choice([0, 1, 4, 16, 200])
+        errors = check_properties(text, max_tokens, overlap_tokens)
+        if errors:
+            failures += 1
+            if failures <= 5:
+                print(f"❌ seed={args.seed} iteration={i} max={max_tokens} overlap={overlap_tokens}: {errors[0]}")
+    print(f"🔎 Property checks: {args.iterations - failures}/{args.iterations} documents passed")
+
+    print(f"\n{'size':>8}{'legacy MB/s':>14}{'chunker MB/s':>15}{'legacy dups':>14}{'chunker dups':>15}")
+    size = 256 * 1024
+    while size <= args.max_mb * 1024 * 1024:
+        text = corpus(size)
+        legacy_chunks = legacy_chunk_text(text)
+        new_chunks = [c["text"] for c in chunk_document(text)]
+        print(f"{size / 1024 / 1024:>7.2f}M{_throughput(legacy_chunk_text, text):>14.2f}"
+              f"{_throughput(chunk_document, text):>15.2f}"
+              f"{near_duplicates(legacy_chunks):>14}{near_duplicates(new_chunks):>15}")
+        size *= 4
+
+    if failures:
+        print(f"\n❌ {failures} documents violated chunker properties")
+        sys.exit(1)
+    print("\n✅ All chunker properties hold")
+
+
+if __name__ == "__main__":
+    main()
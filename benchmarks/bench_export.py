@@ -0,0 +1,128 @@
+"""
+Export Benchmark - streaming export throughput and memory.
+
+Seeds a scratch database with synthetic conversations, then exports the
+table with storage.export.TableExport in each format (to /dev/null) and
+reports rows/s and the Python heap peak (tracemalloc). Memory is measured
+at two table sizes: a streaming export should peak at about the same size
+for both, where reading the whole table at once (the old get_all_* style)
+grows with the table. Finally it checks that a named cursor makes the next
+export return only the new rows.
+
+The live database is never touched. No LLM is called.
+
+Usage: python -m benchmarks.bench_export
+       python -m benchmarks.bench_export --rows 1000000
+"""
+
+import os
+import shutil
+import tempfile
+
+SCRATCH = tempfile.mkdtemp(prefix="career-bench-export-")
+os.environ["DATABASE_PATH"] = os.path.join(SCRATCH, "bench.db")
+os.environ.setdefault("GROQ_API_KEY", "mock-key")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+import argparse
+import time
+import tracemalloc
+from typing import Callable, Dict
+
+from storage.database import get_connection
+from storage.export import EXPORT_FORMATS, TableExport
+
+SEED_BATCH = 10_000
+
+
+def seed(rows: int, start: int = 0):
+    """Append synthetic conversation rows."""
+    conn = get_connection()
+    for offset in range(start, start + rows, SEED_BATCH):
+        batch = range(offset, min(offset + SEED_BATCH, start + rows))
+        conn.executemany(
+            "INSERT INTO conversations (session_id, message, role) VALUES (?, ?, ?)",
+            ((f"session-{i // 10}", f"Message {i}: " + "They have shipped production systems in Python. " * 4,
+              "user" if i % 2 == 0 else "assistant") for i in batch))
+        conn.commit()
+    conn.close()
+
+
+def stream(fmt: str, cursor: str = None) -> TableExport:
+    export = TableExport("conversations", fmt, cursor_name=cursor)
+    with open(os.devnull, "wb") as out:
+        for block in export:
+            out.write(block)
+    return export
+
+
+def fetch_all():
+    """Baseline: read the whole table into memory, like get_all_leads()."""
+    conn = get_connection()
+    rows = [dict(row) for row in conn.execute("SELECT * FROM conversations ORDER BY id").fetchall()]
+    conn.close()
+    return rows
+
+
+def peak_mb(fn: Callable) -> float:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 1024 / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming export throughput and memory")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("Export Benchmark")
+    print("=" * 70)
+    try:
+        formats = [fmt for fmt in EXPORT_FORMATS if fmt != "parquet"]
+        try:
+            import pyarrow  # noqa: F401
+            formats.append("parquet")
+        except ImportError:
+            print("⚠️ pyarrow not installed: skipping parquet")
+
+        small = args.rows // 10
+        seed(small)
+        peaks: Dict[str, Dict[int, float]] = {fmt: {small: peak_mb(lambda: stream(fmt))} for fmt in formats}
+        peaks["fetchall"] = {small: peak_mb(fetch_all)}
+
+        seed(args.rows - small, start=small)
+        print(f"🌱 Seeded {args.rows:,} conversations ({os.path.getsize(os.environ['DATABASE_PATH']) / 1e6:.0f} MB)\n")
+        print(f"   {'format':<10}{'rows/s':>12}{'seconds':>10}")
+        for fmt in formats:
+            started = time.perf_counter()
+            export = stream(fmt)
+            elapsed = time.perf_counter() - started
+            print(f"   {fmt:<10}{export.rows / elapsed:>12,.0f}{elapsed:>10.2f}")
+            peaks[fmt][args.rows] = peak_mb(lambda: stream(fmt))
+        peaks["fetchall"][args.rows] = peak_mb(fetch_all)
+
+        print(f"\n   {'peak heap MB':<14}{f'{small:,} rows':>14}{f'{args.rows:,} rows':>16}")
+        for name, by_rows in peaks.items():
+            print(f"   {name:<14}{by_rows[small]:>14.1f}{by_rows[args.rows]:>16.1f}")
+
+        first = stream("ndjson", cursor="bench")
+        seed(1234, start=args.rows)
+        second = stream("ndjson", cursor="bench")
+        incremental_ok = first.rows == args.rows and second.rows == 1234 and second.since_id == first.next_since
+        print(f"\n{'✅' if incremental_ok else '❌'} Cursor export: {first.rows:,} rows, then only the "
+              f"{second.rows:,} new rows")
+    finally:
+        shutil.rmtree(SCRATCH, ignore_errors=True)
+
+    flat = all(by_rows[args.rows] < 2 * by_rows[small] + 1 for name, by_rows in peaks.items() if name != "fetchall")
+    worst = max(by_rows[args.rows] for name, by_rows in peaks.items() if name != "fetchall")
+    print(f"{'✅' if flat and incremental_ok else '❌'} Streaming export memory is flat: at most {worst:.1f} MB "
+          f"for {args.rows:,} rows (whole-table read: {peaks['fetchall'][args.rows]:.0f} MB)")
+
+
+if __name__ == "__main__":
+    main()
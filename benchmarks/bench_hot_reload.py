@@ -0,0 +1,153 @@
+"""
+Hot Reload Benchmark - query latency and empty answers during a re-index.
+
+Reader threads run retrievals against a scratch tenant's knowledge base
+while it is re-indexed, and report latency and how many retrievals came back
+empty (or failed) for:
+  1. idle:      no re-index running (baseline)
+  2. in place:  the old way, deleting the live collection and refilling it
+  3. swap:      rag.hot_reload, building a new version and publishing it
+
+Afterwards it checks that only KEEP_COLLECTION_VERSIONS versions remain.
+The live index, cache and database are never touched. No LLM is called.
+
+Usage: python -m benchmarks.bench_hot_reload
+       python -m benchmarks.bench_hot_reload --readers 8 --rounds 3
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict
+
+SCRATCH = tempfile.mkdtemp(prefix="career-bench-reload-")
+os.environ["TENANTS_DIR"] = os.path.join(SCRATCH, "tenants")
+os.environ["VECTOR_DB_DIR"] = os.path.join(SCRATCH, "chroma_db")
+os.environ["CACHE_DIR"] = os.path.join(SCRATCH, "cache")
+os.environ["DATABASE_PATH"] = os.path.join(SCRATCH, "bench.db")
+os.environ.setdefault("GROQ_API_KEY", "mock-key")
+
+from benchmarks.run_benchmarks import percentile  # noqa: E402  (env must be set first)
+from config import KNOWLEDGE_DIR  # noqa: E402
+from rag.hot_reload import KnowledgeWatcher  # noqa: E402
+from rag.knowledge_indexer import index_knowledge_base  # noqa: E402
+from rag.retriever import retreive_context  # noqa: E402
+from rag.vector_store import (KEEP_COLLECTION_VERSIONS, collection_versions, reset_collection,  # noqa: E402
+                              resolve_collection)
+from storage.tenants import TENANTS_DIR, tenant_context  # noqa: E402
+
+TENANT_ID = "bench"
+EVAL_SET_PATH = "benchmarks/retrieval_eval_set.json"
+
+
+def create_tenant() -> Path:
+    tenant_dir = Path(TENANTS_DIR) / TENANT_ID
+    shutil.copytree(KNOWLEDGE_DIR, tenant_dir / "knowledge", ignore=shutil.ignore_patterns("*.pdf"))
+    with open(tenant_dir / "tenant.json", "w", encoding="utf-8") as f:
+        json.dump({"assistant_name": "Bench"}, f)
+    return tenant_dir / "knowledge"
+
+
+def under_load(queries, readers: int, action: Callable[[], None], idle_seconds: float) -> Dict:
+    """Run retrievals from reader threads until action() returns (or for idle_seconds if it's None)."""
+    done = threading.Event()
+    lock = threading.Lock()
+    latencies, empty, errors = [], [0], [0]
+
+    def reader(offset: int):
+        i = offset
+        with tenant_context(TENANT_ID) as tenant:
+            while not done.is_set():
+                query = queries[i % len(queries)]
+                i += 1
+                start = time.perf_counter()
+                try:
+                    result = retreive_context(query, top_k=3, collection_name=tenant.collection_name)
+                    failed, got_nothing = False, not result["results"]
+                except Exception:
+                    failed, got_nothing = True, False
+                elapsed = time.perf_counter() - start
+                with lock:
+                    latencies.append(elapsed)
+                    empty[0] += got_nothing
+                    errors[0] += failed
+
+    threads = [threading.Thread(target=reader, args=(n,)) for n in range(readers)]
+    for thread in threads:
+        thread.start()
+    started = time.perf_counter()
+    if action is None:
+        time.sleep(idle_seconds)
+    else:
+        with tenant_context(TENANT_ID), contextlib.redirect_stdout(io.StringIO()):
+            action()
+    duration = time.perf_counter() - started
+    done.set()
+    for thread in threads:
+        thread.join()
+    return {"queries": len(latencies), "empty": empty[0], "errors": errors[0], "seconds": duration,
+            "p50_ms": 1000 * percentile(latencies, 50), "p99_ms": 1000 * percentile(latencies, 99)}
+
+
+def print_row(label: str, r: Dict):
+    print(f"   {label:<10}{r['queries']:>9}{r['empty']:>8}{r['errors']:>8}{r['seconds']:>9.2f}"
+          f"{r['p50_ms']:>9.2f}{r['p99_ms']:>9.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query latency and empty answers during a re-index")
+    parser.add_argument("--readers", type=int, default=4, help="Concurrent retrieval threads")
+    parser.add_argument("--rounds", type=int, default=2, help="Re-indexes per method")
+    parser.add_argument("--idle-seconds", type=float, default=2.0)
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("Hot Reload Benchmark")
+    print("=" * 70)
+    ok = True
+    try:
+        with open(EVAL_SET_PATH, "r", encoding="utf-8") as f:
+            queries = [item["query"] for item in json.load(f)]
+        knowledge_dir = create_tenant()
+        with tenant_context(TENANT_ID) as tenant, contextlib.redirect_stdout(io.StringIO()):
+            index_knowledge_base(reset=True)
+        watcher = KnowledgeWatcher(settle=False)
+
+        def in_place():
+            reset_collection(resolve_collection(tenant.collection_name))
+            index_knowledge_base(reset=False)
+
+        def swap():
+            note = knowledge_dir / "hot_reload_note.txt"
+            note.write_text(f"Updated {time.time_ns()}: available for interviews.", encoding="utf-8")
+            assert watcher.check(TENANT_ID), "watcher did not publish a new version"
+
+        print(f"\n⏱️  {args.readers} readers, {args.rounds} re-indexes per method")
+        print(f"   {'method':<10}{'queries':>9}{'empty':>8}{'errors':>8}{'seconds':>9}{'p50 ms':>9}{'p99 ms':>9}")
+        print_row("idle", under_load(queries, args.readers, None, args.idle_seconds))
+        for label, action in (("in place", in_place), ("swap", swap)):
+            for _ in range(args.rounds):
+                result = under_load(queries, args.readers, action, 0)
+                print_row(label, result)
+                if label == "swap" and (result["empty"] or result["errors"]):
+                    ok = False
+
+        versions = collection_versions(tenant.collection_name)
+        live = resolve_collection(tenant.collection_name)
+        print(f"\n🧹 Versions kept: {', '.join(versions)} (live: {live})")
+        if len(versions) > KEEP_COLLECTION_VERSIONS or versions[-1] != live:
+            ok = False
+    finally:
+        shutil.rmtree(SCRATCH, ignore_errors=True)
+    print(f"\n{'✅ Swaps served every query with context' if ok else '❌ Swap re-index lost context or versions'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""
+HTTP Cache Benchmark - bytes and server CPU per widget session.
+
+Starts api_server.py (uvicorn, scratch index, bundled mock LLM server) and
+replays widget sessions. Each session loads the widget, asks two starter
+questions and types two questions of its own:
+  - before:    the widget page and JSON uncompressed, no validators, and
+               starter questions POSTed to /api/chat like typed ones
+  - new:       first visit: hashed widget page and JSON compressed (br or
+               gzip), starters from GET /api/starters and /api/starters/answer
+  - returning: a browser with the new visit cached: the immutable widget
+               page isn't requested, starters are revalidated (304)
+
+Bytes are counted on the wire (status line, headers and encoded body).
+Server CPU is the uvicorn process's user + system time per session, read
+from /proc after a warm-up session, so every answer is a cache hit and
+the numbers show the HTTP layer rather than the LLM.
+
+Usage: python -m benchmarks.bench_http_cache
+       python -m benchmarks.bench_http_cache --sessions 50
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+import requests
+
+MOCK_PORT = 8105
+API_PORT = 8013
+BASE = f"http://127.0.0.1:{API_PORT}"
+TYPED_QUESTIONS = ["What did you work on at your last job?", "Which databases have you used in production?"]
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+
+
+def cpu_seconds(pid: int) -> float:
+    """User + system CPU time of a process, from /proc."""
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+
+
+class Client:
+    """A browser: counts wire bytes and, if caching, remembers ETags."""
+
+    def __init__(self, accept_encoding: str, caching: bool):
+        self.http = requests.Session()
+        self.http.headers["Accept-Encoding"] = accept_encoding
+        self.caching = caching
+        self.etags: Dict[str, str] = {}
+        self.bodies: Dict[str, bytes] = {}
+        self.bytes = 0
+        self.requests = 0
+
+    def request(self, method: str, url: str, **kwargs) -> bytes:
+        headers = kwargs.pop("headers", {})
+        if self.caching and url in self.etags:
+            headers["If-None-Match"] = self.etags[url]
+        response = self.http.request(method, BASE + url, headers=headers, stream=True, timeout=60, **kwargs)
+        raw = response.raw.read(decode_content=False)
+        self.bytes += len(raw) + 17 + sum(len(k) + len(v) + 4 for k, v in response.headers.items())
+        self.requests += 1
+        if response.status_code == 304:
+            return self.bodies[url]
+        response.raise_for_status()
+        body = _decode(response, raw)
+        if self.caching and "ETag" in response.headers:
+            self.etags[url], self.bodies[url] = response.headers["ETag"], body
+        return body
+
+
+def _decode(response: requests.Response, raw: bytes) -> bytes:
+    encoding = response.headers.get("Content-Encoding")
+    if encoding == "br":
+        import brotli
+        return brotli.decompress(raw)
+    if encoding == "gzip":
+        import gzip
+        return gzip.decompress(raw)
+    return raw
+
+
+def session_before(client: Client, starters: List[str]):
+    client.request("GET", "/widget/chat-widget.html")
+    for question in starters + TYPED_QUESTIONS:
+        client.request("POST", "/api/chat", json={"message": question})
+
+
+def session_after(client: Client, starters: List[str], widget_url: str, returning: bool):
+    if not returning:
+        client.request("GET", widget_url)        # immutable: a returning browser doesn't ask again
+    client.request("GET", "/api/starters")
+    history = []
+    for question in starters:
+        answer = client.request("GET", "/api/starters/answer", params={"q": question})
+        history.append([question, answer.decode()])
+    for question in TYPED_QUESTIONS:
+        client.request("POST", "/api/chat", json={"message": question, "history": history})
+        history = []
+
+
+def run(name: str, pid: int, clients: List[Client], play: Callable[[Client], None]) -> Dict:
+    """Play one session per client; per-session averages."""
+    for client in clients:
+        client.bytes = client.requests = 0
+    started = cpu_seconds(pid)
+    for client in clients:
+        play(client)
+    cpu_ms = (cpu_seconds(pid) - started) * 1000
+    return {"name": name, "bytes": sum(c.bytes for c in clients) / len(clients),
+            "requests": sum(c.requests for c in clients) / len(clients), "cpu_ms": cpu_ms / len(clients)}
+
+
+def _has_brotli() -> bool:
+    try:
+        import brotli  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bytes and server CPU per widget session, before and after")
+    parser.add_argument("--sessions", type=int, default=30)
+    parser.add_argument("--timeout", type=float, default=180.0)
+    args = parser.parse_args()
+
+    scratch = tempfile.mkdtemp(prefix="career-bench-http-")
+    env = dict(os.environ,
+               VECTOR_DB_DIR=os.path.join(scratch, "chroma_db"),
+               CACHE_DIR=os.path.join(scratch, "cache"),
+               DATABASE_PATH=os.path.join(scratch, "bench.db"),
+               LLM_BASE_URL=f"http://127.0.0.1:{MOCK_PORT}/v1",
+               GROQ_API_KEY=os.getenv("GROQ_API_KEY", "mock-key"),
+               HOT_RELOAD="0",
+               MODEL_ROUTING="0",
+               LOG_LEVEL="WARNING",
+               RATE_LIMIT_IP_PER_MINUTE="1000000",
+               RATE_LIMIT_IP_BURST="1000000",
+               RATE_LIMIT_ORIGIN_PER_MINUTE="1000000",
+               RATE_LIMIT_ORIGIN_BURST="1000000")
+
+    print("=" * 70)
+    print("HTTP Cache Benchmark")
+    print("=" * 70)
+
+    from benchmarks import mock_llm_server
+    mock_llm_server.configure(latency_ms=5.0, per_token_ms=0.0)
+    mock_llm_server.start_in_thread(port=MOCK_PORT)
+
+    server = None
+    try:
+        print("📚 Indexing scratch knowledge base...")
+        subprocess.run([sys.executable, "-m", "rag.knowledge_indexer", "--no-warm"], env=env, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        server = subprocess.Popen([sys.executable, "-m", "uvicorn", "api_server:app", "--host", "127.0.0.1",
+                                   "--port", str(API_PORT), "--log-level", "warning"], env=env,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        deadline = time.monotonic() + args.timeout
+        while True:
+            try:
+                if requests.get(f"{BASE}/health", timeout=2).status_code == 200:
+                    break
+            except requests.RequestException:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"API server did not start within {args.timeout:.0f}s")
+            time.sleep(0.2)
+
+        widget_url = requests.get(f"{BASE}/").json()["endpoints"]["widget"]
+        starters = requests.get(f"{BASE}/api/starters").json()["questions"][:2]
+        accept = "br, gzip" if _has_brotli() else "gzip"
+
+        def play_before(client: Client):
+            session_before(client, starters)
+
+        def play_new(client: Client):
+            session_after(client, starters, widget_url, returning=False)
+
+        def play_returning(client: Client):
+            session_after(client, starters, widget_url, returning=True)
+
+        # Warm-up: fill the response cache and the starter answers
+        play_before(Client("identity", caching=False))
+        play_new(Client(accept, caching=True))
+        browsers = [Client(accept, caching=True) for _ in range(args.sessions)]
+        results = [run("before", server.pid, [Client("identity", caching=False) for _ in range(args.sessions)],
+                       play_before),
+                   run("new", server.pid, browsers, play_new),
+                   run("returning", server.pid, browsers, play_returning)]
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    print(f"\n   {'session':<12}{'requests':>10}{'bytes':>10}{'server CPU ms':>16}   ({args.sessions} sessions, "
+          f"Accept-Encoding: {accept})")
+    for result in results:
+        print(f"   {result['name']:<12}{result['requests']:>10.0f}{result['bytes']:>10,.0f}{result['cpu_ms']:>16.1f}")
+
+    before_result = results[0]
+    print()
+    for result in results[1:]:
+        print(f"   {result['name']}: {1 - result['bytes'] / before_result['bytes']:.0%} fewer bytes, "
+              f"{before_result['cpu_ms'] - result['cpu_ms']:.1f} ms less server CPU per session")
+    ok = all(r["bytes"] < before_result["bytes"] for r in results[1:]) and results[2]["cpu_ms"] < before_result["cpu_ms"]
+    print(f"\n{'✅' if ok else '❌'} Compression and HTTP caching cut bytes and server CPU per session")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Index Artifact Benchmark - cold start from documents vs from a prebuilt artifact.
+
+Each run is a fresh process with an empty scratch vector store, like a new
+container, that fills it one of two ways:
+  - index:    rag.knowledge_indexer (extract PDFs, chunk, embed everything)
+  - artifact: rag.index_artifact.install_artifact (verify checksums and the
+              knowledge hash, add the memory-mapped embeddings to Chroma)
+
+It reports the time to fill the store and the whole process time. It then
+checks that both stores return the same top-3 chunks for the retrieval
+eval queries (the artifact stores float16 embeddings). The live index,
+cache and database are never touched. No LLM is called.
+
+Usage: python -m benchmarks.bench_index_artifact
+       python -m benchmarks.bench_index_artifact --runs 5
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict
+
+EVAL_SET_PATH = "benchmarks/retrieval_eval_set.json"
+
+
+def child(mode: str, artifact: str):
+    """Fill the (empty) vector store, then print timings and top-3 IDs as JSON."""
+    started = time.perf_counter()
+    from rag.index_artifact import install_artifact
+    from rag.knowledge_indexer import index_knowledge_base
+    from rag.retriever import retreive_context
+    imported = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        if mode == "index":
+            index_knowledge_base(reset=False)
+        elif not install_artifact(artifact):
+            raise SystemExit("artifact was not installed")
+    filled = time.perf_counter()
+    with open(EVAL_SET_PATH, "r", encoding="utf-8") as f:
+        queries = [item["query"] for item in json.load(f)]
+    top_ids = {query: [r["id"] for r in retreive_context(query, top_k=3)["results"]] for query in queries}
+    print(json.dumps({"import_s": imported - started, "fill_s": filled - imported, "top_ids": top_ids}))
+
+
+def run_child(mode: str, artifact: str, scratch: str, run: int) -> Dict:
+    env = dict(os.environ,
+               VECTOR_DB_DIR=os.path.join(scratch, f"chroma_{mode}_{run}"),
+               CACHE_DIR=os.path.join(scratch, f"cache_{mode}_{run}"),
+               DATABASE_PATH=os.path.join(scratch, f"bench_{mode}_{run}.db"),
+               GROQ_API_KEY=os.getenv("GROQ_API_KEY", "mock-key"),
+               LOG_LEVEL="WARNING")
+    started = time.perf_counter()
+    output = subprocess.run([sys.executable, "-m", "benchmarks.bench_index_artifact", "--child", mode,
+                             "--artifact", artifact], env=env, check=True, capture_output=True, text=True).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result["process_s"] = time.perf_counter() - started
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold start from documents vs from an index artifact")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--child", choices=("index", "artifact"), help=argparse.SUPPRESS)
+    parser.add_argument("--artifact", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args.child, args.artifact)
+        return
+
+    print("=" * 70)
+    print("Index Artifact Benchmark")
+    print("=" * 70)
+    scratch = tempfile.mkdtemp(prefix="career-bench-artifact-")
+    artifact = os.path.join(scratch, "index_artifact")
+    try:
+        env = dict(os.environ, VECTOR_DB_DIR=os.path.join(scratch, "chroma_build"),
+                   CACHE_DIR=os.path.join(scratch, "cache_build"), DATABASE_PATH=os.path.join(scratch, "build.db"))
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-m", "rag.index_artifact", "build", "--output", artifact],
+                       env=env, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        size_kb = sum(os.path.getsize(os.path.join(artifact, name)) for name in os.listdir(artifact)) / 1024
+        print(f"📦 Built artifact in {time.perf_counter() - started:.1f}s ({size_kb:.0f} KB)")
+
+        results = {mode: [run_child(mode, artifact, scratch, run) for run in range(args.runs)]
+                   for mode in ("index", "artifact")}
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    print(f"\n   {'start from':<12}{'fill s':>9}{'import s':>10}{'process s':>11}   (median of {args.runs})")
+    medians = {}
+    for mode, runs in results.items():
+        medians[mode] = {key: statistics.median(r[key] for r in runs) for key in ("fill_s", "import_s", "process_s")}
+        m = medians[mode]
+        print(f"   {mode:<12}{m['fill_s']:>9.3f}{m['import_s']:>10.2f}{m['process_s']:>11.2f}")
+
+    indexed, loaded = results["index"][0]["top_ids"], results["artifact"][0]["top_ids"]
+    same = sum(indexed[query] == loaded[query] for query in indexed)
+    print(f"\n🔍 Same top-3 chunks for {same}/{len(indexed)} eval queries")
+
+    ok = medians["artifact"]["fill_s"] < 1.0 and same == len(indexed)
+    speedup = medians["index"]["fill_s"] / medians["artifact"]["fill_s"]
+    print(f"{'✅' if ok else '❌'} Artifact fills the store in {medians['artifact']['fill_s'] * 1000:.0f} ms "
+          f"({speedup:.1f}x faster than indexing)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Profiling Benchmark - cost of the profiling mode, off and on.
+
+  - off: should_profile() with no X-Profile header and no sampling, which
+         is all an unprofiled request pays
+  - on:  retrievals from a scratch knowledge base, run plain and then under
+         profile_call(). The saved speedscope and collapsed files are
+         checked to parse, and the hottest functions are printed
+
+Usage: python -m benchmarks.bench_profiling
+       python -m benchmarks.bench_profiling --queries 200 --interval-ms 1
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+from collections import Counter
+
+SCRATCH = tempfile.mkdtemp(prefix="career-bench-profile-")
+os.environ["VECTOR_DB_DIR"] = os.path.join(SCRATCH, "chroma_db")
+os.environ["CACHE_DIR"] = os.path.join(SCRATCH, "cache")
+os.environ["DATABASE_PATH"] = os.path.join(SCRATCH, "bench.db")
+os.environ["PROFILE_DIR"] = os.path.join(SCRATCH, "profiles")
+os.environ.setdefault("GROQ_API_KEY", "mock-key")
+
+from utils import profiling  # noqa: E402  (env must be set first)
+
+ITERATIONS = 1_000_000
+EVAL_SET_PATH = "benchmarks/retrieval_eval_set.json"
+
+
+def retrieve_all(queries):
+    from rag.retriever import retreive_context
+    for query in queries:
+        retreive_context(query, top_k=3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cost of per-request profiling, off and on")
+    parser.add_argument("--queries", type=int, default=100, help="Retrievals per run")
+    parser.add_argument("--interval-ms", type=float, default=profiling.PROFILE_INTERVAL_MS)
+    args = parser.parse_args()
+    profiling.PROFILE_INTERVAL_MS = args.interval_ms
+
+    print("=" * 60)
+    print("Profiling Benchmark")
+    print("=" * 60)
+    ok = True
+    try:
+        start = time.perf_counter()
+        for _ in range(ITERATIONS):
+            profiling.should_profile(None)
+        off_ns = (time.perf_counter() - start) / ITERATIONS * 1e9
+        print(f"   off (should_profile):   {off_ns:8.0f} ns per request")
+
+        from rag.knowledge_indexer import index_knowledge_base
+        with contextlib.redirect_stdout(io.StringIO()):
+            index_knowledge_base(reset=True)
+        with open(EVAL_SET_PATH, "r", encoding="utf-8") as f:
+            eval_queries = [item["query"] for item in json.load(f)]
+        queries = [eval_queries[i % len(eval_queries)] for i in range(args.queries)]
+        retrieve_all(queries[:5])   # warm up the embedding model
+
+        start = time.perf_counter()
+        retrieve_all(queries)
+        plain = time.perf_counter() - start
+        results = {}
+        for fmt in ("speedscope", "collapsed"):
+            profiling.PROFILE_FORMAT = fmt
+            start = time.perf_counter()
+            _, profile_id = profiling.profile_call(retrieve_all, queries)
+            results[fmt] = (time.perf_counter() - start, profile_id)
+
+        print(f"   plain:                  {plain * 1000:8.1f} ms for {args.queries} retrievals")
+        for fmt, (elapsed, _) in results.items():
+            print(f"   profiled ({fmt + ')':<12} {elapsed * 1000:8.1f} ms "
+                  f"({100 * (elapsed / plain - 1):+.1f}%, every {args.interval_ms:g} ms)")
+
+        with open(profiling.get_profile_path(results["speedscope"][1]), "r", encoding="utf-8") as f:
+            speedscope = json.load(f)
+        frames = speedscope["shared"]["frames"]
+        samples = speedscope["profiles"][0]["samples"]
+        with open(profiling.get_profile_path(results["collapsed"][1]), "r", encoding="utf-8") as f:
+            collapsed_samples = sum(int(line.rsplit(" ", 1)[1]) for line in f if line.strip())
+        ok = bool(samples) and collapsed_samples > 0 and len(profiling.list_profiles()) == 2
+
+        inclusive = Counter(index for stack in samples for index in set(stack))
+        print(f"\n🔥 Hottest repo functions ({len(samples)} samples, inclusive)")
+        shown = 0
+        for index, n in inclusive.most_common():
+            frame = frames[index]
+            if frame["file"].startswith(("rag", "storage", "core", "utils")) and shown < 8:
+                print(f"   {100 * n / len(samples):5.1f}%  {frame['name']} ({frame['file']}:{frame['line']})")
+                shown += 1
+    finally:
+        shutil.rmtree(SCRATCH, ignore_errors=True)
+    print(f"\n{'✅ Profiles saved and parsed' if ok else '❌ Profiles missing or empty'}")
+
+
+if __name__ == "__main__":
+    main()
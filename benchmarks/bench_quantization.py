@@ -0,0 +1,155 @@
+"""
+Quantization Benchmark - memory, latency and recall of int8 / binary indexes.
+
+Compares rag.quantized_store against the float32 baseline, with and without
+the float rescoring pass:
+  1. Knowledge corpus: data/knowledge indexed through rag.vector_store into a
+     scratch store. Overlap of each mode's top_k with Chroma's float32 results
+     for the retrieval eval queries.
+  2. Synthetic scale: N clustered vectors. Recall@k against exact float32
+     search, and query latency as the corpus grows past what fits comfortably
+     in free-tier memory.
+
+Resident bytes count what a search keeps in memory. For float32 that is the
+vectors plus the HNSW graph, estimated as 2*M int32 links per vector at
+level 0 with Chroma's default M=16. Rescoring reads only the candidate rows
+of the memory-mapped float32 file.
+
+Usage: python -m benchmarks.bench_quantization
+       python -m benchmarks.bench_quantization --vectors 200000 --top-k 10
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+SCRATCH = tempfile.mkdtemp(prefix="career-bench-quant-")
+os.environ["VECTOR_DB_DIR"] = os.path.join(SCRATCH, "chroma_db")
+os.environ["CACHE_DIR"] = os.path.join(SCRATCH, "cache")
+os.environ["DATABASE_PATH"] = os.path.join(SCRATCH, "bench.db")
+os.environ.setdefault("GROQ_API_KEY", "mock-key")
+
+import numpy as np  # noqa: E402
+
+from benchmarks.run_benchmarks import percentile  # noqa: E402  (env must be set first)
+from rag.knowledge_indexer import index_knowledge_base  # noqa: E402
+from rag.quantized_store import (QUANTIZATION_MODES, QuantizedIndex, build_quantized_index,  # noqa: E402
+                                 search_quantized)
+from rag.vector_store import search_similar  # noqa: E402
+
+COLLECTION = "bench_quantization"
+EVAL_SET_PATH = "benchmarks/retrieval_eval_set.json"
+HNSW_M = 16
+DIMENSIONS = 384               # all-MiniLM-L6-v2
+
+
+def _timed(func: Callable[[int], object], n: int) -> Dict:
+    latencies = []
+    for i in range(n):
+        start = time.perf_counter()
+        func(i)
+        latencies.append(time.perf_counter() - start)
+    return {"p50_ms": 1000 * percentile(latencies, 50), "p99_ms": 1000 * percentile(latencies, 99)}
+
+
+def _overlap(found: List, expected: List) -> float:
+    return len(set(found) & set(expected)) / len(expected) if expected else 1.0
+
+
+def float32_resident_bytes(n: int, dimensions: int) -> int:
+    return n * dimensions * 4 + n * 2 * HNSW_M * 4
+
+
+def knowledge_corpus(top_k: int, repeats: int):
+    """Modes vs Chroma float32 on the real knowledge base and eval queries."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        index_knowledge_base(reset=True, collection_name=COLLECTION)
+    with open(EVAL_SET_PATH, "r", encoding="utf-8") as f:
+        queries = [item["query"] for item in json.load(f)]
+    baseline = {q: search_similar(q, top_k, collection_name=COLLECTION)["ids"][0] for q in queries}
+    float_timing = _timed(lambda i: search_similar(queries[i % len(queries)], top_k, collection_name=COLLECTION),
+                          len(queries) * repeats)
+    n = len(build_quantized_index(COLLECTION, "int8").ids)
+
+    print(f"\n📚 Knowledge corpus: {n} chunks, {len(queries)} queries, top_k={top_k}")
+    print(f"{'mode':<10}{'resident KB':>13}{'overlap@k':>11}{'p50 ms':>9}{'p99 ms':>9}")
+    print(f"{'float32':<10}{float32_resident_bytes(n, DIMENSIONS) / 1024:>13.1f}{1.0:>11.3f}"
+          f"{float_timing['p50_ms']:>9.2f}{float_timing['p99_ms']:>9.2f}")
+    for mode in QUANTIZATION_MODES:
+        index = build_quantized_index(COLLECTION, mode)
+        overlap = np.mean([_overlap(search_quantized(q, top_k, collection_name=COLLECTION, mode=mode)["ids"][0],
+                                    baseline[q]) for q in queries])
+        timing = _timed(lambda i: search_quantized(queries[i % len(queries)], top_k,
+                                                   collection_name=COLLECTION, mode=mode), len(queries) * repeats)
+        print(f"{mode:<10}{index.memory_bytes() / 1024:>13.1f}{overlap:>11.3f}"
+              f"{timing['p50_ms']:>9.2f}{timing['p99_ms']:>9.2f}")
+
+
+def synthetic_vectors(n: int, dimensions: int, rng: np.random.Generator) -> np.ndarray:
+    """Clustered unit vectors, closer to real embeddings than uniform noise."""
+    centers = rng.standard_normal((max(1, n // 50), dimensions)).astype(np.float32)
+    vectors = centers[rng.integers(0, len(centers), n)] + 0.6 * rng.standard_normal((n, dimensions)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def synthetic(n: int, top_k: int, queries: int, seed: int):
+    """Recall and latency at scale against exact float32 search."""
+    rng = np.random.default_rng(seed)
+    vectors = synthetic_vectors(n, DIMENSIONS, rng)
+    # Queries near stored vectors, like questions near the chunk that answers them
+    noise = rng.standard_normal((queries, DIMENSIONS)) * 0.5 / np.sqrt(DIMENSIONS)
+    query_vectors = vectors[rng.integers(0, n, queries)] + noise
+    query_vectors = (query_vectors / np.linalg.norm(query_vectors, axis=1, keepdims=True)).astype(np.float32)
+    ids = [str(i) for i in range(n)]
+    exact = [np.argsort(-(vectors @ q))[:top_k].astype(str).tolist() for q in query_vectors]
+    exact_timing = _timed(lambda i: np.argpartition(-(vectors @ query_vectors[i]), top_k)[:top_k], queries)
+
+    print(f"\n🧪 Synthetic: {n:,} vectors x {DIMENSIONS} dims, {queries} queries, recall@{top_k} vs exact float32")
+    print(f"{'mode':<18}{'resident MB':>13}{'recall@k':>10}{'p50 ms':>9}{'p99 ms':>9}")
+    print(f"{'float32 (HNSW)':<18}{float32_resident_bytes(n, DIMENSIONS) / 1e6:>13.1f}{'~1.000':>10}"
+          f"{'-':>9}{'-':>9}")
+    print(f"{'float32 exact':<18}{n * DIMENSIONS * 4 / 1e6:>13.1f}{1.0:>10.3f}"
+          f"{exact_timing['p50_ms']:>9.2f}{exact_timing['p99_ms']:>9.2f}")
+
+    for mode in QUANTIZATION_MODES:
+        directory = Path(SCRATCH) / f"synthetic.{mode}"
+        QuantizedIndex.from_vectors(mode, ids, [""] * n, [{}] * n, vectors).save(directory)
+        index = QuantizedIndex.load(directory)  # float32 vectors memory-mapped, as in production
+        for rescore in (False, True):
+            recall = np.mean([_overlap(index.search(q, top_k, rescore=rescore)["ids"][0], expected)
+                              for q, expected in zip(query_vectors, exact)])
+            timing = _timed(lambda i: index.search(query_vectors[i], top_k, rescore=rescore), queries)
+            label = f"{mode}{' + rescore' if rescore else ''}"
+            print(f"{label:<18}{index.memory_bytes() / 1e6:>13.1f}{recall:>10.3f}"
+                  f"{timing['p50_ms']:>9.2f}{timing['p99_ms']:>9.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory, latency and recall of quantized embedding indexes")
+    parser.add_argument("--vectors", type=int, default=50_000, help="Synthetic corpus size")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--repeats", type=int, default=5, help="Timed runs per knowledge query")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("Quantization Benchmark")
+    print("=" * 70)
+    try:
+        knowledge_corpus(args.top_k, args.repeats)
+        synthetic(args.vectors, args.top_k, args.queries, args.seed)
+    finally:
+        shutil.rmtree(SCRATCH, ignore_errors=True)
+    print("\n✅ Quantization benchmark complete")
+
+
+if __name__ == "__main__":
+    main()
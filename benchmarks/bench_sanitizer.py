@@ -0,0 +1,46 @@
+"""
+Sanitizer Microbenchmark - core.sanitizer vs the original three-regex cleaner.
+Times clean responses, responses with leaked calls, and streaming in small chunks.
+
+Usage: python -m benchmarks.bench_sanitizer
+"""
+
+import timeit
+
+from benchmarks.fuzz_sanitizer import legacy_clean
+from core.sanitizer import StreamSanitizer, sanitize
+
+PARAGRAPH = ("I have over five years of experience building Python services, RAG pipelines "
+             "and data platforms. Most recently I led the migration of our search stack.\n\n")
+CLEAN = PARAGRAPH * 10
+LEAKY = (PARAGRAPH * 5 + '<function=record_unknown_question>{"question": "What is your favourite food?"}'
+         + "\n\n\n\n" + PARAGRAPH * 5 + '<function=record_user_details>{"email": "a@b.c", "notes": {"src": "chat"}}</function>')
+
+
+def _stream(text: str, chunk_size: int = 8) -> str:
+    sanitizer = StreamSanitizer()
+    parts = [sanitizer.feed(text[i:i + chunk_size]) for i in range(0, len(text), chunk_size)]
+    parts.append(sanitizer.flush())
+    return "".join(parts)
+
+
+def _time(func, text: str, number: int = 2000) -> float:
+    return min(timeit.repeat(lambda: func(text), number=number, repeat=5)) / number * 1e6
+
+
+def main():
+    print("=" * 70)
+    print("Sanitizer Microbenchmark (µs per response, best of 5)")
+    print("=" * 70)
+    print(f"{'case':<12}{'chars':>8}{'legacy':>12}{'sanitize':>12}{'stream/8ch':>14}")
+    for name, text in [("clean", CLEAN), ("leaky", LEAKY)]:
+        print(f"{name:<12}{len(text):>8}{_time(legacy_clean, text):>12.1f}"
+              f"{_time(sanitize, text):>12.1f}{_time(_stream, text, 200):>14.1f}")
+
+    sanitizer = StreamSanitizer()
+    per_chunk = min(timeit.repeat(lambda: sanitizer.feed("token "), number=100_000, repeat=5)) / 100_000 * 1e9
+    print(f"\nPer streamed token feed(): {per_chunk:.0f} ns")
+
+
+if __name__ == "__main__":
+    main()
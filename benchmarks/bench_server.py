@@ -0,0 +1,156 @@
+"""
+Server Benchmark - memory and startup time, one process vs two.
+
+Starts the app each way against a scratch index (built once beforehand)
+and the bundled mock LLM server:
+  - two processes: app.py (Gradio) and api_server.py (widget API), each
+                   with its own Chroma client, embedding model and caches
+  - combined:      server.py, with Gradio mounted inside the FastAPI app
+
+Startup is the time from spawning the processes until both the UI and
+/health answer. After one /api/chat request and a settle period (cache
+warming loads the embedding model), the resident memory of all server
+processes is summed.
+
+Usage: python -m benchmarks.bench_server
+       python -m benchmarks.bench_server --runs 3 --settle 10
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import requests
+
+MOCK_PORT = 8104
+UI_PORT = 7871
+API_PORT = 8011
+COMBINED_PORT = 8012
+
+
+def rss_mb(pid: int) -> float:
+    """Resident memory of a process and its children, from /proc."""
+    total_kb, pids = 0, [pid]
+    while pids:
+        current = pids.pop()
+        try:
+            status = Path(f"/proc/{current}/status").read_text()
+            for tid in os.listdir(f"/proc/{current}/task"):
+                pids.extend(int(child) for child in Path(f"/proc/{current}/task/{tid}/children").read_text().split())
+        except (FileNotFoundError, ProcessLookupError):
+            continue
+        for line in status.splitlines():
+            if line.startswith("VmRSS:"):
+                total_kb += int(line.split()[1])
+    return total_kb / 1024
+
+
+def wait_ready(urls: List[str], timeout: float) -> bool:
+    deadline = time.monotonic() + timeout
+    pending = list(urls)
+    while pending and time.monotonic() < deadline:
+        try:
+            if requests.get(pending[0], timeout=2).status_code == 200:
+                pending.pop(0)
+                continue
+        except requests.RequestException:
+            pass
+        time.sleep(0.1)
+    return not pending
+
+
+def run_setup(name: str, commands: List[List[str]], ready_urls: List[str], api_port: int,
+              env: Dict[str, str], args) -> Dict:
+    """Start the processes, time until ready, send one chat, then measure RSS."""
+    start = time.perf_counter()
+    processes = [subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                 for command in commands]
+    try:
+        if not wait_ready(ready_urls, args.timeout):
+            raise RuntimeError(f"{name} did not become ready within {args.timeout:.0f}s")
+        startup = time.perf_counter() - start
+        response = requests.post(f"http://127.0.0.1:{api_port}/api/chat",
+                                 json={"message": "What programming languages do you know?"}, timeout=60)
+        response.raise_for_status()
+        time.sleep(args.settle)
+        return {"startup_s": startup, "rss_mb": sum(rss_mb(p.pid) for p in processes)}
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            try:
+                process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RSS and startup time of server.py vs app.py + api_server.py")
+    parser.add_argument("--runs", type=int, default=2)
+    parser.add_argument("--settle", type=float, default=5.0, help="Seconds after the first chat before measuring")
+    parser.add_argument("--timeout", type=float, default=180.0)
+    args = parser.parse_args()
+
+    scratch = tempfile.mkdtemp(prefix="career-bench-server-")
+    env = dict(os.environ,
+               VECTOR_DB_DIR=os.path.join(scratch, "chroma_db"),
+               CACHE_DIR=os.path.join(scratch, "cache"),
+               DATABASE_PATH=os.path.join(scratch, "bench.db"),
+               PROFILE_DIR=os.path.join(scratch, "profiles"),
+               LLM_BASE_URL=f"http://127.0.0.1:{MOCK_PORT}/v1",
+               GROQ_API_KEY=os.getenv("GROQ_API_KEY", "mock-key"),
+               HOT_RELOAD="0",
+               RATE_LIMIT_IP_PER_MINUTE="1000000",
+               RATE_LIMIT_IP_BURST="1000000",
+               GRADIO_ANALYTICS_ENABLED="False",
+               GRADIO_SERVER_NAME="127.0.0.1",
+               GRADIO_SERVER_PORT=str(UI_PORT))
+
+    print("=" * 70)
+    print("Server Benchmark")
+    print("=" * 70)
+
+    from benchmarks import mock_llm_server
+    mock_llm_server.configure(latency_ms=50.0, per_token_ms=0.5)
+    mock_llm_server.start_in_thread(port=MOCK_PORT)
+
+    uvicorn = [sys.executable, "-m", "uvicorn", "--host", "127.0.0.1", "--log-level", "warning"]
+    setups = {
+        "two processes": ([[sys.executable, "app.py"], uvicorn + ["api_server:app", "--port", str(API_PORT)]],
+                          [f"http://127.0.0.1:{UI_PORT}/", f"http://127.0.0.1:{API_PORT}/health"], API_PORT),
+        "combined": ([uvicorn + ["server:app", "--port", str(COMBINED_PORT)]],
+                     [f"http://127.0.0.1:{COMBINED_PORT}/ui/", f"http://127.0.0.1:{COMBINED_PORT}/health"],
+                     COMBINED_PORT),
+    }
+    results: Dict[str, List[Dict]] = {name: [] for name in setups}
+    try:
+        print("📚 Indexing scratch knowledge base...")
+        subprocess.run([sys.executable, "-m", "rag.knowledge_indexer", "--no-warm"], env=env, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        for run in range(args.runs):
+            for name, (commands, urls, api_port) in setups.items():
+                results[name].append(run_setup(name, commands, urls, api_port, env, args))
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    print(f"\n   {'setup':<16}{'startup s':>11}{'RSS MB':>10}   (median of {args.runs})")
+    summary = {}
+    for name, runs in results.items():
+        summary[name] = {key: statistics.median(r[key] for r in runs) for key in ("startup_s", "rss_mb")}
+        print(f"   {name:<16}{summary[name]['startup_s']:>11.2f}{summary[name]['rss_mb']:>10.0f}")
+
+    two, one = summary["two processes"], summary["combined"]
+    saved = 1 - one["rss_mb"] / two["rss_mb"]
+    print(f"\n{'✅' if saved > 0 else '❌'} Combined server uses {saved:.0%} less memory "
+          f"({two['rss_mb'] - one['rss_mb']:.0f} MB), startup {two['startup_s']:.1f}s -> {one['startup_s']:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
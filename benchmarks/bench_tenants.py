@@ -0,0 +1,156 @@
+"""
+Tenant Benchmark - memory per tenant and cold vs warm tenant latency.
+
+Creates N tenants in a scratch TENANTS_DIR, each with a copy of
+data/knowledge, indexes them with int8 quantization and then measures:
+  1. Memory per tenant: resident bytes of its loaded index, the process RSS
+     growth from loading every tenant, and the float32 HNSW estimate a
+     per-tenant Chroma collection would keep resident.
+  2. Cold vs warm: search latency for a tenant whose index must be loaded
+     versus one already in the index LRU.
+  3. Eviction: queries round-robin over all tenants with the LRU budget set
+     to fit only some of them; loaded bytes must never exceed the budget.
+
+The live index, cache and database are never touched. No LLM is called.
+
+Usage: python -m benchmarks.bench_tenants
+       python -m benchmarks.bench_tenants --tenants 20 --cache-tenants 5
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+SCRATCH = tempfile.mkdtemp(prefix="career-bench-tenants-")
+os.environ["TENANTS_DIR"] = os.path.join(SCRATCH, "tenants")
+os.environ["VECTOR_DB_DIR"] = os.path.join(SCRATCH, "chroma_db")
+os.environ["CACHE_DIR"] = os.path.join(SCRATCH, "cache")
+os.environ["DATABASE_PATH"] = os.path.join(SCRATCH, "bench.db")
+os.environ["VECTOR_QUANTIZATION"] = "int8"
+os.environ.setdefault("GROQ_API_KEY", "mock-key")
+
+from benchmarks.run_benchmarks import percentile  # noqa: E402  (env must be set first)
+from config import KNOWLEDGE_DIR  # noqa: E402
+from rag import quantized_store  # noqa: E402
+from rag.knowledge_indexer import index_knowledge_base  # noqa: E402
+from rag.vector_store import search_similar  # noqa: E402
+from storage.tenants import TENANTS_DIR, tenant_context  # noqa: E402
+
+EVAL_SET_PATH = "benchmarks/retrieval_eval_set.json"
+HNSW_M = 16      # Chroma's default, as in bench_quantization
+
+
+def _rss_bytes() -> int:
+    """Current resident set size (Linux), else the peak from getrusage."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def create_tenants(n: int):
+    """Write tenant.json and a knowledge copy for tenant-0 .. tenant-(n-1), then index them."""
+    tenant_ids = [f"tenant-{i}" for i in range(n)]
+    for i, tenant_id in enumerate(tenant_ids):
+        tenant_dir = Path(TENANTS_DIR) / tenant_id
+        shutil.copytree(KNOWLEDGE_DIR, tenant_dir / "knowledge", ignore=shutil.ignore_patterns("*.pdf"))
+        with open(tenant_dir / "tenant.json", "w", encoding="utf-8") as f:
+            json.dump({"assistant_name": f"Assistant {i}", "assistant_email": f"{tenant_id}@example.com"}, f)
+        with tenant_context(tenant_id), contextlib.redirect_stdout(io.StringIO()):
+            index_knowledge_base(reset=True)
+    return tenant_ids
+
+
+def search(tenant_id: str, query: str, top_k: int) -> float:
+    """Latency of one search as a tenant."""
+    with tenant_context(tenant_id) as tenant:
+        start = time.perf_counter()
+        search_similar(query, top_k, collection_name=tenant.collection_name)
+        return time.perf_counter() - start
+
+
+def memory_per_tenant(tenant_ids, queries, top_k) -> int:
+    """Load every tenant with no eviction; returns the resident bytes of one index."""
+    quantized_store._loaded = quantized_store.IndexCache(max_bytes=1 << 62)
+    search(tenant_ids[0], queries[0], top_k)  # embedding model load, not per tenant
+    rss_before = _rss_bytes()
+    for tenant_id in tenant_ids[1:]:
+        search(tenant_id, queries[0], top_k)
+    rss_per_tenant = (_rss_bytes() - rss_before) / max(1, len(tenant_ids) - 1)
+
+    index = quantized_store.get_quantized_index(f"career_knowledge__{tenant_ids[0]}", "int8")
+    n, dimensions = index.vectors.shape
+    float32_bytes = n * dimensions * 4 + n * 2 * HNSW_M * 4
+    print(f"\n🧠 Memory per tenant ({n} chunks x {dimensions} dims)")
+    print(f"   int8 index resident:     {index.resident_bytes() / 1024:>8.1f} KB")
+    print(f"   RSS growth per tenant:   {rss_per_tenant / 1024:>8.1f} KB")
+    print(f"   float32 HNSW (estimate): {float32_bytes / 1024:>8.1f} KB")
+    return index.resident_bytes()
+
+
+def cold_vs_warm(tenant_ids, queries, top_k, repeats):
+    """First search of an unloaded tenant vs searches of a loaded one."""
+    quantized_store._loaded = quantized_store.IndexCache(max_bytes=1 << 62)
+    search(tenant_ids[0], queries[0], top_k)
+    cold = [search(tenant_id, queries[i % len(queries)], top_k) for i, tenant_id in enumerate(tenant_ids[1:])]
+    warm = [search(tenant_ids[0], queries[i % len(queries)], top_k) for i in range(len(queries) * repeats)]
+    print(f"\n⏱️  Cold vs warm tenant search (top_k={top_k})")
+    print(f"   cold (load + search): p50 {1000 * percentile(cold, 50):.2f} ms, p99 {1000 * percentile(cold, 99):.2f} ms")
+    print(f"   warm (LRU hit):       p50 {1000 * percentile(warm, 50):.2f} ms, p99 {1000 * percentile(warm, 99):.2f} ms")
+
+
+def eviction(tenant_ids, queries, top_k, cache_tenants, index_bytes, rounds) -> bool:
+    """Round-robin over all tenants with room for cache_tenants indexes."""
+    budget = cache_tenants * index_bytes
+    cache = quantized_store._loaded = quantized_store.IndexCache(max_bytes=budget)
+    peak, latencies = 0, []
+    for r in range(rounds):
+        for i, tenant_id in enumerate(tenant_ids):
+            latencies.append(search(tenant_id, queries[(r + i) % len(queries)], top_k))
+            peak = max(peak, cache.bytes)
+    bounded = peak <= budget
+    print(f"\n♻️  Eviction: {len(tenant_ids)} tenants, budget {budget / 1024:.1f} KB ({cache_tenants} indexes), "
+          f"{rounds} rounds")
+    print(f"   loads {cache.loads}, evictions {cache.evictions}, loaded now {len(cache)}")
+    print(f"   peak loaded {peak / 1024:.1f} KB {'✅ within' if bounded else '❌ over'} budget")
+    print(f"   search p50 {1000 * percentile(latencies, 50):.2f} ms, p99 {1000 * percentile(latencies, 99):.2f} ms")
+    return bounded
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory per tenant and cold vs warm tenant latency")
+    parser.add_argument("--tenants", type=int, default=10)
+    parser.add_argument("--cache-tenants", type=int, default=None,
+                        help="Indexes the LRU budget fits during the eviction run (default: half)")
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--repeats", type=int, default=3, help="Warm runs per query")
+    parser.add_argument("--rounds", type=int, default=3, help="Round-robin passes in the eviction run")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("Tenant Benchmark")
+    print("=" * 70)
+    try:
+        with open(EVAL_SET_PATH, "r", encoding="utf-8") as f:
+            queries = [item["query"] for item in json.load(f)]
+        print(f"📚 Indexing {args.tenants} tenants...")
+        tenant_ids = create_tenants(args.tenants)
+        index_bytes = memory_per_tenant(tenant_ids, queries, args.top_k)
+        cold_vs_warm(tenant_ids, queries, args.top_k, args.repeats)
+        bounded = eviction(tenant_ids, queries, args.top_k, args.cache_tenants or max(1, args.tenants // 2),
+                           index_bytes, args.rounds)
+    finally:
+        shutil.rmtree(SCRATCH, ignore_errors=True)
+    print(f"\n{'✅ Tenant benchmark complete' if bounded else '❌ Loaded indexes exceeded the LRU budget'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""
+Retrieval Evaluation - offline quality and speed of retriever configurations.
+
+Scores every combination of chunk size, chunk overlap, embedding model, top_k
+and filtering against a labeled query set (benchmarks/retrieval_eval_set.json).
+Each query lists the facts a good answer needs, and each fact is a string or
+a list of alternative strings. A retrieved chunk is relevant for the facts it
+contains, ignoring case, whitespace and punctuation. This keeps the labels
+valid when chunk boundaries change.
+
+Metrics per configuration:
+  - recall@k: share of a query's facts found in the top_k chunks
+  - MRR:      1 / rank of the first chunk containing any fact
+  - nDCG@k:   each chunk gains the facts it adds, against the best possible ranking
+  - tokens:   mean tokens of the formatted context sent to the LLM
+  - p50/p99:  retrieval latency (retreive_context, after a warm-up pass)
+
+Each configuration is indexed from data/knowledge into a scratch vector store,
+so the live index, cache and database are never touched. No LLM is called.
+
+Usage: python -m benchmarks.eval_retrieval
+       python -m benchmarks.eval_retrieval --max-tokens 64 128 256 --top-k 3 5
+       python -m benchmarks.eval_retrieval --filter on off --embedding-model default all-mpnet-base-v2
+"""
+
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import math
+import os
+import re
+import shutil
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+SCRATCH = tempfile.mkdtemp(prefix="career-eval-retrieval-")
+os.environ["VECTOR_DB_DIR"] = os.path.join(SCRATCH, "chroma_db")
+os.environ["CACHE_DIR"] = os.path.join(SCRATCH, "cache")
+os.environ["DATABASE_PATH"] = os.path.join(SCRATCH, "eval.db")
+os.environ.setdefault("GROQ_API_KEY", "mock-key")
+
+from benchmarks.run_benchmarks import RESULTS_DIR, percentile  # noqa: E402  (env must be set first)
+from rag.chunker import CHUNK_MAX_TOKENS, CHUNK_OVERLAP_TOKENS, count_tokens  # noqa: E402
+from rag.knowledge_indexer import index_knowledge_base  # noqa: E402
+from rag.retriever import RECENCY_WEIGHT, retreive_context  # noqa: E402
+from rag.vector_store import delete_collection, get_or_create_collection  # noqa: E402
+
+EVAL_SET_PATH = "benchmarks/retrieval_eval_set.json"
+DEFAULT_MODEL = "default"    # Chroma's bundled all-MiniLM-L6-v2
+
+_NON_WORD = re.compile(r"\W+")
+
+
+def _normalize(text: str) -> str:
+    return _NON_WORD.sub("", text).lower()
+
+
+def load_eval_set(path: str = EVAL_SET_PATH) -> List[Dict]:
+    """
+    Load the labeled queries.
+
+    Returns:
+        List of {"query", "facts"} dicts. Each fact is a list of normalized alternatives.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        entries = json.load(f)
+    return [{
+        "query": entry["query"],
+        "facts": [[_normalize(alt) for alt in (fact if isinstance(fact, list) else [fact])]
+                  for fact in entry["facts"]],
+    } for entry in entries]
+
+
+def facts_in(text: str, facts: List[List[str]]) -> set:
+    """Indices of the facts a normalized chunk text contains."""
+    return {i for i, alternatives in enumerate(facts) if any(alt in text for alt in alternatives)}
+
+
+def _dcg(gains: List[float]) -> float:
+    return sum(gain / math.log2(rank + 2) for rank, gain in enumerate(gains))
+
+
+def _ideal_gains(documents: List[str], facts: List[List[str]], k: int) -> List[int]:
+    """Gains of the best achievable ranking: greedily take the chunk adding the most new facts."""
+    coverage = [facts_in(doc, facts) for doc in documents]
+    covered, gains = set(), []
+    for _ in range(k):
+        best = max((len(c - covered) for c in coverage), default=0)
+        if best == 0:
+            break
+        gains.append(best)
+        covered |= next(c for c in coverage if len(c - covered) == best)
+    return gains
+
+
+def score_query(retrieved: List[str], facts: List[List[str]], documents: List[str], k: int) -> Dict:
+    """
+    Score one query's retrieved chunks (normalized texts, in rank order).
+
+    Returns:
+        Dict with recall, reciprocal_rank and ndcg
+    """
+    covered, gains, reciprocal_rank = set(), [], 0.0
+    for rank, text in enumerate(retrieved[:k], 1):
+        found = facts_in(text, facts)
+        if found and not reciprocal_rank:
+            reciprocal_rank = 1.0 / rank
+        gains.append(len(found - covered))
+        covered |= found
+    ideal = _dcg(_ideal_gains(documents, facts, k))
+    return {
+        "recall": len(covered) / len(facts) if facts else 0.0,
+        "reciprocal_rank": reciprocal_rank,
+        "ndcg": _dcg(gains) / ideal if ideal else 0.0,
+    }
+
+
+def build_index(max_tokens: int, overlap_tokens: int, embedding_model: str) -> str:
+    """Index data/knowledge into a scratch collection and return its name."""
+    name = f"eval_{max_tokens}_{overlap_tokens}_{_normalize(embedding_model)}"[:60]
+    model = "" if embedding_model == DEFAULT_MODEL else embedding_model
+    with contextlib.redirect_stdout(io.StringIO()):
+        index_knowledge_base(reset=True, collection_name=name, embedding_model=model,
+                             max_tokens=max_tokens, overlap_tokens=overlap_tokens)
+    return name
+
+
+def evaluate(collection_name: str, eval_set: List[Dict], top_k: int, auto_filter: bool,
+             recency_weight: float, repeats: int) -> Dict:
+    """
+    Run the eval set against one indexed collection and retriever setting.
+
+    Returns:
+        Dict of averaged metrics and latency percentiles
+    """
+    documents = [_normalize(doc) for doc in
+                 get_or_create_collection(collection_name).get(include=["documents"])["documents"]]
+
+    def retrieve(query: str) -> Dict:
+        return retreive_context(query, top_k=top_k, auto_filter=auto_filter,
+                                recency_weight=recency_weight, collection_name=collection_name)
+
+    for item in eval_set:  # warm-up: embedding model load, HNSW index load
+        retrieve(item["query"])
+
+    latencies, scores, tokens = [], [], []
+    for item in eval_set:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            result = retrieve(item["query"])
+            latencies.append(time.perf_counter() - start)
+        retrieved = [_normalize(r["document"]) for r in result["results"]]
+        scores.append(score_query(retrieved, item["facts"], documents, top_k))
+        tokens.append(count_tokens(result["formatted_context"]))
+
+    n = len(eval_set)
+    return {
+        "recall_at_k": round(sum(s["recall"] for s in scores) / n, 4),
+        "mrr": round(sum(s["reciprocal_rank"] for s in scores) / n, 4),
+        "ndcg_at_k": round(sum(s["ndcg"] for s in scores) / n, 4),
+        "mean_prompt_tokens": round(sum(tokens) / n, 1),
+        "p50_ms": round(1000 * percentile(latencies, 50), 3),
+        "p99_ms": round(1000 * percentile(latencies, 99), 3),
+        "chunks": len(documents),
+    }
+
+
+def print_table(rows: List[Dict]):
+    header = (f"{'configuration':<44}{'recall@k':>9}{'MRR':>7}{'nDCG@k':>8}"
+              f"{'tokens':>8}{'p50 ms':>9}{'p99 ms':>9}{'chunks':>8}")
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        m = row["metrics"]
+        print(f"{row['label']:<44}{m['recall_at_k']:>9.3f}{m['mrr']:>7.3f}{m['ndcg_at_k']:>8.3f}"
+              f"{m['mean_prompt_tokens']:>8.0f}{m['p50_ms']:>9.2f}{m['p99_ms']:>9.2f}{m['chunks']:>8}")
+
+    if len(rows) > 1:
+        print()
+        for key, name, best in [("recall_at_k", "recall@k", max), ("mrr", "MRR", max), ("ndcg_at_k", "nDCG@k", max),
+                                ("mean_prompt_tokens", "fewest tokens", min), ("p50_ms", "fastest p50", min)]:
+            winner = best(rows, key=lambda r: r["metrics"][key])
+            print(f"🏆 Best {name:<14} {winner['label']} ({winner['metrics'][key]})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline retrieval quality and latency evaluation")
+    parser.add_argument("--eval-set", default=EVAL_SET_PATH)
+    parser.add_argument("--max-tokens", type=int, nargs="+", default=[CHUNK_MAX_TOKENS])
+    parser.add_argument("--overlap", type=int, nargs="+", default=[CHUNK_OVERLAP_TOKENS])
+    parser.add_argument("--embedding-model", nargs="+", default=[DEFAULT_MODEL],
+                        help=f"'{DEFAULT_MODEL}' or sentence-transformers model names")
+    parser.add_argument("--top-k", type=int, nargs="+", default=[3])
+    parser.add_argument("--filter", choices=["on", "off"], nargs="+", default=["on"],
+                        help="Infer section filters from the question")
+    parser.add_argument("--recency-weight", type=float, nargs="+", default=[RECENCY_WEIGHT])
+    parser.add_argument("--repeats", type=int, default=5, help="Timed runs per query")
+    args = parser.parse_args()
+
+    eval_set = load_eval_set(args.eval_set)
+
+    print("=" * 70)
+    print("Retrieval Evaluation")
+    print("=" * 70)
+    print(f"📋 {len(eval_set)} labeled queries from {args.eval_set}\n")
+
+    rows = []
+    try:
+        for max_tokens, overlap, model in itertools.product(args.max_tokens, args.overlap, args.embedding_model):
+            print(f"📚 Indexing max_tokens={max_tokens} overlap={overlap} model={model}...")
+            collection_name = build_index(max_tokens, overlap, model)
+            for top_k, filter_mode, weight in itertools.product(args.top_k, args.filter, args.recency_weight):
+                config = {"max_tokens": max_tokens, "overlap_tokens": overlap, "embedding_model": model,
+                          "top_k": top_k, "auto_filter": filter_mode == "on", "recency_weight": weight}
+                metrics = evaluate(collection_name, eval_set, top_k, config["auto_filter"], weight, args.repeats)
+                label = f"mt={max_tokens} ov={overlap} k={top_k} filter={filter_mode} rw={weight}"
+                if len(args.embedding_model) > 1:
+                    label += f" {model}"
+                rows.append({"label": label, "config": config, "metrics": metrics})
+            delete_collection(collection_name)
+    finally:
+        shutil.rmtree(SCRATCH, ignore_errors=True)
+
+    print()
+    print_table(rows)
+
+    results_dir = Path(RESULTS_DIR)
+    results_dir.mkdir(parents=True, exist_ok=True)
+    out_path = results_dir / f"eval_retrieval_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(out_path, "w") as f:
+        json.dump({"eval_set": args.eval_set, "queries": len(eval_set), "results": rows}, f, indent=2)
+    print(f"\n💾 Results saved to {out_path}")
+
+
+if __name__ == "__main__":
+    main()
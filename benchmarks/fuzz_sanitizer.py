@@ -0,0 +1,108 @@
+"""
+Sanitizer Fuzzer - randomized checks for core.sanitizer.
+
+Checks, for random responses with leaked function calls:
+  - streaming with random chunk boundaries gives the same output as sanitize()
+  - no well-formed leaked call survives, including nested-brace bodies
+  - on inputs the old three-regex cleaner handled, the output is unchanged
+
+Usage: python -m benchmarks.fuzz_sanitizer
+       python -m benchmarks.fuzz_sanitizer --iterations 100000 --seed 7
+"""
+
+import argparse
+import json
+import random
+import re
+import sys
+
+from core.sanitizer import StreamSanitizer, sanitize
+
+WORDS = ["I", "have", "5", "years", "of", "Python", "experience.", "a<b", "x > y", "<br>",
+         "{braces}", "\"quoted\"", "<func", "<function", "=", "\n", "\n\n", "\n\n\n\n", " ", "\t"]
+
+
+def legacy_clean(text: str) -> str:
+    """The original core.chat.clean_response, kept as the reference."""
+    text = re.sub(r'<function=\w+>\{[^}]*\}', '', text)
+    text = re.sub(r'<function=\w+>', '', text)
+    return re.sub(r'\n{3,}', '\n\n', text).strip()
+
+
+def random_json(rng: random.Random, depth: int = 0) -> dict:
+    payload = {}
+    for i in range(rng.randint(0, 3)):
+        if depth < 2 and rng.random() < 0.3:
+            payload[f"k{i}"] = random_json(rng, depth + 1)
+        else:
+            payload[f"k{i}"] = rng.choice(["x", "a } b", "{", "quote \" inside", 42, None])
+    return payload
+
+
+def random_leak(rng: random.Random, flat: bool = False) -> str:
+    name = rng.choice(["record_unknown_question", "record_user_details", "f"])
+    if flat:
+        return f'<function={name}>{{"question": "q{rng.randint(0, 9)}"}}'
+    body = json.dumps(random_json(rng)) if rng.random() < 0.8 else ""
+    closer = "</function>" if rng.random() < 0.5 else ""
+    return f"<function={name}>{body}{closer}"
+
+
+def random_text(rng: random.Random, flat: bool = False) -> str:
+    parts = []
+    for _ in range(rng.randint(0, 40)):
+        parts.append(random_leak(rng, flat) if rng.random() < 0.1 else rng.choice(WORDS))
+        parts.append(rng.choice(["", " "]))
+    return "".join(parts)
+
+
+def stream(text: str, rng: random.Random) -> str:
+    sanitizer = StreamSanitizer()
+    out = []
+    pos = 0
+    while pos < len(text):
+        size = rng.randint(1, 12)
+        out.append(sanitizer.feed(text[pos:pos + size]))
+        pos += size
+    out.append(sanitizer.flush())
+    return "".join(out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fuzz core.sanitizer")
+    parser.add_argument("--iterations", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    failures = 0
+    for i in range(args.iterations):
+        text = random_text(rng)
+        batch = sanitize(text)
+        streamed = stream(text, rng)
+        if streamed != batch:
+            failures += 1
+            print(f"❌ stream != batch\n   input={text!r}\n   batch={batch!r}\n   stream={streamed!r}")
+
+        leak = random_leak(rng)
+        if "<function=" in sanitize(f"Hello {leak} world"):
+            failures += 1
+            print(f"❌ leak survived: {leak!r}")
+
+        flat = random_text(rng, flat=True)
+        if sanitize(flat) != legacy_clean(flat):
+            failures += 1
+            print(f"❌ differs from legacy\n   input={flat!r}\n   new={sanitize(flat)!r}\n   old={legacy_clean(flat)!r}")
+
+        if failures >= 10:
+            break
+
+    print("=" * 60)
+    if failures:
+        print(f"❌ {failures} failure(s) after {i + 1} iterations (seed={args.seed})")
+        sys.exit(1)
+    print(f"✅ {args.iterations} iterations passed (seed={args.seed})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Load Test - throughput scaling of the multi-worker API against the mock LLM.
+Starts the mock server, then runs gunicorn_conf.py with 1, 2, 4 ... workers,
+drives /api/chat at a fixed per-worker concurrency and reports req/s,
+latency, errors and scaling efficiency relative to one worker.
+
+Usage: python -m benchmarks.load_test
+       python -m benchmarks.load_test --workers 1 2 4 8 --duration 20
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import httpx
+
+from benchmarks.run_benchmarks import summarize
+
+MOCK_PORT = 8110
+API_PORT = 8111
+
+
+def _wait_for(url: str, timeout: float = 120.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(url, timeout=1).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.25)
+    raise RuntimeError(f"Timed out waiting for {url}")
+
+
+def _start_server(workers: int, env: Dict) -> subprocess.Popen:
+    env = dict(env, WEB_CONCURRENCY=str(workers), BIND=f"127.0.0.1:{API_PORT}")
+    if shutil.which("gunicorn"):
+        cmd = ["gunicorn", "-c", "gunicorn_conf.py", "api_server:app"]
+    else:
+        cmd = [sys.executable, "-m", "uvicorn", "api_server:app", "--port", str(API_PORT),
+               "--workers", str(workers), "--log-level", "warning"]
+    return subprocess.Popen(cmd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.STDOUT)
+
+
+def drive_load(concurrency: int, duration: float) -> Dict:
+    """Send unique chat messages from `concurrency` threads for `duration` seconds."""
+    url = f"http://127.0.0.1:{API_PORT}/api/chat"
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + duration
+
+    def worker(worker_id: int):
+        i = 0
+        with httpx.Client(timeout=60) as client:
+            while time.perf_counter() < stop_at:
+                start = time.perf_counter()
+                try:
+                    response = client.post(url, json={"message": f"Tell me about your experience (w{worker_id}-{i})"})
+                    ok = response.status_code == 200
+                    error = None if ok else f"HTTP {response.status_code}"
+                except httpx.HTTPError as e:
+                    error = type(e).__name__
+                elapsed = time.perf_counter() - start
+                with lock:
+                    if error:
+                        errors[error] = errors.get(error, 0) + 1
+                    else:
+                        latencies.append(elapsed)
+                i += 1
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    result = summarize(latencies, time.perf_counter() - started)
+    if not latencies:
+        result.update(throughput_rps=0.0, p50_ms=0.0, p99_ms=0.0)
+    result["errors"] = errors
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-worker throughput load test")
+    cpus = multiprocessing.cpu_count()
+    default_workers = [n for n in (1, 2, 4, 8, 16) if n <= cpus] or [1]
+    parser.add_argument("--workers", type=int, nargs="+", default=default_workers)
+    parser.add_argument("--per-worker-concurrency", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=15.0, help="Seconds of load per step")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Mock LLM latency")
+    parser.add_argument("--output", default="benchmarks/results/load_test.json")
+    args = parser.parse_args()
+
+    scratch = tempfile.mkdtemp(prefix="career-load-")
+    env = dict(
+        os.environ,
+        GROQ_API_KEY=os.getenv("GROQ_API_KEY", "mock-key"),
+        LLM_BASE_URL=f"http://127.0.0.1:{MOCK_PORT}/v1",
+        DATABASE_PATH=str(Path(scratch) / "load.db"),
+        CACHE_DIR=str(Path(scratch) / "cache"),
+        PUSHOVER_USER="",
+        PUSHOVER_TOKEN="",
+        LOG_LEVEL="WARNING",
+        # One client drives all the load: measure scaling, not admission control
+        RATE_LIMIT_IP_PER_MINUTE="1000000",
+        RATE_LIMIT_IP_BURST="1000000",
+        RATE_LIMIT_ORIGIN_PER_MINUTE="1000000",
+        RATE_LIMIT_ORIGIN_BURST="1000000",
+        LLM_QUEUE_MAX="100000",
+    )
+
+    mock = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.mock_llm_server", "--port", str(MOCK_PORT),
+         "--latency-ms", str(args.latency_ms), "--jitter-ms", "0", "--per-token-ms", "0"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.STDOUT,
+    )
+    _wait_for(f"http://127.0.0.1:{MOCK_PORT}/v1/models")
+
+    print("=" * 90)
+    print(f"Load Test  (cpus={cpus}, duration={args.duration}s/step, mock latency={args.latency_ms}ms)")
+    print("=" * 90)
+
+    steps = []
+    try:
+        for workers in args.workers:
+            server = _start_server(workers, env)
+            try:
+                _wait_for(f"http://127.0.0.1:{API_PORT}/health")
+                drive_load(workers, 3.0)  # warm every worker's embedding model
+                result = drive_load(workers * args.per_worker_concurrency, args.duration)
+            finally:
+                server.terminate()
+                server.wait(timeout=30)
+            result["workers"] = workers
+            steps.append(result)
+
+            base_rps = steps[0]["throughput_rps"] / steps[0]["workers"]
+            result["scaling_efficiency"] = round(result["throughput_rps"] / (base_rps * workers), 3) if base_rps else 0.0
+            print(f"   workers={workers:<3} {result['throughput_rps']:>8.2f} req/s  "
+                  f"p50={result['p50_ms']:>8.1f}ms  p99={result['p99_ms']:>8.1f}ms  "
+                  f"efficiency={result['scaling_efficiency']:.0%}  errors={result['errors'] or 0}")
+    finally:
+        mock.terminate()
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({"cpus": cpus, "steps": steps}, indent=2))
+    print(f"\n💾 Results saved to {output}")
+
+    if any(step["errors"] for step in steps):
+        print("❌ Errors under load (see results)")
+        sys.exit(1)
+    print("✅ No errors under load")
+
+
+if __name__ == "__main__":
+    main()
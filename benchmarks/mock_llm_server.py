@@ -0,0 +1,274 @@
+"""
+Mock LLM Server - OpenAI-compatible chat completions endpoint for benchmarking.
+Lets us run core.chat.chat and /api/chat end-to-end without calling Groq.
+
+Usage: python -m benchmarks.mock_llm_server --port 8100 --latency-ms 300
+Then:  LLM_BASE_URL=http://127.0.0.1:8100/v1 python api_server.py
+
+Scenarios can be forced from the last user message:
+    [[tool:record_user_details]]    -> model calls record_user_details
+    [[tool:record_unknown_question]] -> model calls record_unknown_question
+    [[tool_use_failed]]             -> Groq-style 400 tool_use_failed error
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+TOOL_TRIGGER = re.compile(r"\[\[tool:(\w+)\]\]")
+TOOL_FAILED_TRIGGER = "[[tool_use_failed]]"
+
+
+@dataclass
+class MockSettings:
+    """Latency and behaviour knobs for the mock server."""
+    latency_ms: float = 300.0          # time to first token
+    per_token_ms: float = 2.0          # generation time per output token
+    jitter_ms: float = 50.0            # uniform +/- jitter on latency_ms
+    response_tokens: int = 120         # words in a normal answer
+    tool_call_rate: float = 0.0        # probability of a tool call when tools are offered
+    tool_use_failed_rate: float = 0.0  # probability of a tool_use_failed error
+    seed: Optional[int] = None
+    # Latency multiplier per model name (small models serve faster)
+    model_latency_scale: Dict[str, float] = field(default_factory=lambda: {"llama-3.1-8b-instant": 0.3})
+
+
+settings = MockSettings()
+_rng = random.Random()
+
+app = FastAPI(title="Mock LLM Server", description="OpenAI-compatible mock for benchmarks")
+
+
+def _estimate_tokens(text: str) -> int:
+    """Rough token estimate (~4 characters per token)."""
+    return max(1, len(text) // 4)
+
+
+def _last_user_message(messages: List[Dict]) -> str:
+    for message in reversed(messages):
+        if message.get("role") == "user":
+            return message.get("content") or ""
+    return ""
+
+
+def _answer_text(messages: List[Dict]) -> str:
+    """Build a deterministic-looking answer of settings.response_tokens words."""
+    question = _last_user_message(messages)[:60]
+    words = ["Based", "on", "my", "experience,"] + ["lorem"] * max(0, settings.response_tokens - 4)
+    return f"Regarding '{question}': " + " ".join(words)
+
+
+def _delay_seconds(output_tokens: int, model: str = "") -> float:
+    jitter = _rng.uniform(-settings.jitter_ms, settings.jitter_ms) if settings.jitter_ms else 0.0
+    scale = settings.model_latency_scale.get(model, 1.0)
+    return scale * max(0.0, settings.latency_ms + jitter + settings.per_token_ms * output_tokens) / 1000.0
+
+
+def _pick_scenario(body: Dict) -> Dict:
+    """Decide whether this request answers, calls a tool, or fails."""
+    messages = body.get("messages", [])
+    last_user = _last_user_message(messages)
+    offers_tools = bool(body.get("tools"))
+    after_tool = bool(messages) and messages[-1].get("role") == "tool"
+
+    if offers_tools and not after_tool:
+        if TOOL_FAILED_TRIGGER in last_user or _rng.random() < settings.tool_use_failed_rate:
+            return {"kind": "tool_use_failed"}
+        match = TOOL_TRIGGER.search(last_user)
+        if match:
+            return {"kind": "tool_call", "tool": match.group(1)}
+        if _rng.random() < settings.tool_call_rate:
+            return {"kind": "tool_call", "tool": "record_unknown_question"}
+    return {"kind": "answer"}
+
+
+def _tool_arguments(tool_name: str, question: str) -> str:
+    if tool_name == "record_user_details":
+        return json.dumps({"email": "bench@example.com", "name": "Benchmark", "notes": "mock"})
+    return json.dumps({"question": question})
+
+
+_seen_prefixes = set()
+
+
+def _cached_prefix_tokens(messages: List[Dict]) -> int:
+    """Simulate provider prefix caching: the longest message prefix seen before is cached."""
+    cached = 0
+    running = 0
+    key = 0
+    for message in messages:
+        key = hash((key, message.get("role"), str(message.get("content"))))
+        running += _estimate_tokens(str(message.get("content") or ""))
+        if key in _seen_prefixes:
+            cached = running
+        else:
+            _seen_prefixes.add(key)
+    return cached
+
+
+def _usage(messages: List[Dict], completion_tokens: int) -> Dict:
+    prompt_tokens = sum(_estimate_tokens(str(m.get("content") or "")) for m in messages)
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+        "prompt_tokens_details": {"cached_tokens": _cached_prefix_tokens(messages)},
+    }
+
+
+def _completion(model: str, message: Dict, finish_reason: str, usage: Dict) -> Dict:
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex[:24]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+        "usage": usage,
+    }
+
+
+def _chunk(completion_id: str, model: str, delta: Dict, finish_reason: Optional[str] = None) -> str:
+    payload = {
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+    return f"data: {json.dumps(payload)}\n\n"
+
+
+async def _stream_answer(model: str, text: str):
+    """Yield an answer as SSE chunks, pacing tokens by per_token_ms."""
+    completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+    await asyncio.sleep(_delay_seconds(0, model))
+    yield _chunk(completion_id, model, {"role": "assistant", "content": ""})
+    per_token_seconds = settings.per_token_ms * settings.model_latency_scale.get(model, 1.0) / 1000.0
+    for word in text.split(" "):
+        if per_token_seconds:
+            await asyncio.sleep(per_token_seconds)
+        yield _chunk(completion_id, model, {"content": word + " "})
+    yield _chunk(completion_id, model, {}, finish_reason="stop")
+    yield "data: [DONE]\n\n"
+
+
+@app.post("/v1/chat/completions")
+@app.post("/openai/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    model = body.get("model", "mock-model")
+    messages = body.get("messages", [])
+    scenario = _pick_scenario(body)
+
+    if scenario["kind"] == "tool_use_failed":
+        await asyncio.sleep(_delay_seconds(0, model))
+        return JSONResponse(status_code=400, content={
+            "error": {
+                "message": "Failed to call a function. Please adjust your prompt. See 'failed_generation' for more details.",
+                "type": "invalid_request_error",
+                "code": "tool_use_failed",
+                "failed_generation": '<function=record_unknown_question>{"question": "mock"}</function>',
+            }
+        })
+
+    if scenario["kind"] == "tool_call":
+        await asyncio.sleep(_delay_seconds(20, model))
+        message = {
+            "role": "assistant",
+            "content": None,
+            "tool_calls": [{
+                "id": f"call_{uuid.uuid4().hex[:12]}",
+                "type": "function",
+                "function": {
+                    "name": scenario["tool"],
+                    "arguments": _tool_arguments(scenario["tool"], _last_user_message(messages)),
+                },
+            }],
+        }
+        return _completion(model, message, "tool_calls", _usage(messages, 20))
+
+    text = _answer_text(messages)
+    if body.get("stream"):
+        return StreamingResponse(_stream_answer(model, text), media_type="text/event-stream")
+
+    output_tokens = _estimate_tokens(text)
+    await asyncio.sleep(_delay_seconds(output_tokens, model))
+    message = {"role": "assistant", "content": text}
+    return _completion(model, message, "stop", _usage(messages, output_tokens))
+
+
+@app.get("/v1/models")
+async def list_models():
+    return {"object": "list", "data": [{"id": "mock-model", "object": "model"}]}
+
+
+def configure(**overrides):
+    """Update mock settings in place (used by the benchmark runner)."""
+    for key, value in overrides.items():
+        if value is not None:
+            setattr(settings, key, value)
+    if settings.seed is not None:
+        _rng.seed(settings.seed)
+
+
+def start_in_thread(host: str = "127.0.0.1", port: int = 8100, timeout: float = 10.0) -> uvicorn.Server:
+    """
+    Start the mock server in a daemon thread and wait until it accepts requests.
+
+    Raises:
+        RuntimeError: if the server exits (e.g. the port is taken) or isn't up within timeout seconds
+    """
+    server = uvicorn.Server(uvicorn.Config(app, host=host, port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + timeout
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError(f"Mock LLM server failed to start on {host}:{port} (port in use?)")
+        if time.monotonic() > deadline:
+            server.should_exit = True
+            raise RuntimeError(f"Mock LLM server did not start on {host}:{port} within {timeout:.0f}s")
+        time.sleep(0.01)
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI-compatible mock LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency-ms", type=float)
+    parser.add_argument("--per-token-ms", type=float)
+    parser.add_argument("--jitter-ms", type=float)
+    parser.add_argument("--response-tokens", type=int)
+    parser.add_argument("--tool-call-rate", type=float)
+    parser.add_argument("--tool-use-failed-rate", type=float)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    configure(
+        latency_ms=args.latency_ms,
+        per_token_ms=args.per_token_ms,
+        jitter_ms=args.jitter_ms,
+        response_tokens=args.response_tokens,
+        tool_call_rate=args.tool_call_rate,
+        tool_use_failed_rate=args.tool_use_failed_rate,
+        seed=args.seed,
+    )
+    print(f"🧪 Mock LLM server on http://{args.host}:{args.port}/v1")
+    print(f"   Settings: {settings}")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Routing Replay - latency and cost of model routing on logged queries.
+
+Replays user messages through core.chat.chat against the mock LLM server,
+once with every turn on MODEL and once with core/router.py choosing
+between FAST_MODEL and MODEL. The mock serves FAST_MODEL faster (see
+MockSettings.model_latency_scale) and cost comes from MODEL_PRICING, so
+the comparison shows what routing saves. The answers are mock text; answer
+quality has to be judged separately.
+
+Queries come from the user messages logged in a database's conversations
+table (--db), or from benchmarks/replay_queries.json when there are none.
+Each run starts with an empty response cache, and repeated queries hit it
+as they would in production.
+
+Usage: python -m benchmarks.replay_routing
+       python -m benchmarks.replay_routing --db data/leads.db --limit 500
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List
+
+SCRATCH = tempfile.mkdtemp(prefix="career-replay-")
+os.environ["VECTOR_DB_DIR"] = os.path.join(SCRATCH, "chroma_db")
+os.environ["CACHE_DIR"] = os.path.join(SCRATCH, "cache")
+os.environ["DATABASE_PATH"] = os.path.join(SCRATCH, "replay.db")
+os.environ["HOT_RELOAD"] = "0"
+os.environ.setdefault("GROQ_API_KEY", "mock-key")
+
+from benchmarks.run_benchmarks import percentile  # noqa: E402  (env must be set first)
+
+MOCK_PORT = 8102
+QUERIES_PATH = "benchmarks/replay_queries.json"
+
+
+def load_queries(db_path: str, limit: int) -> List[str]:
+    """Logged user messages, oldest first, or the bundled sample."""
+    if db_path and Path(db_path).exists():
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        try:
+            rows = conn.execute(
+                "SELECT message FROM conversations WHERE role = 'user' AND message != '' ORDER BY id LIMIT ?",
+                (limit,)).fetchall()
+        except sqlite3.OperationalError:
+            rows = []
+        conn.close()
+        if rows:
+            print(f"📋 {len(rows)} logged queries from {db_path}")
+            return [row[0] for row in rows]
+    with open(QUERIES_PATH, "r", encoding="utf-8") as f:
+        queries = json.load(f)[:limit]
+    print(f"📋 {len(queries)} sample queries from {QUERIES_PATH}")
+    return queries
+
+
+def replay(queries: List[str], routing: bool) -> Dict:
+    """Run every query through chat() with routing on or off."""
+    from core import router
+    from core.budget import RequestBudget
+    from core.chat import chat
+    from storage.cache import clear_cache
+    from storage.database import get_connection
+
+    router.MODEL_ROUTING = routing
+    clear_cache()
+    conn = get_connection()
+    watermark = conn.execute("SELECT COALESCE(MAX(id), 0) FROM model_routes").fetchone()[0]
+    conn.close()
+
+    latencies, cost = [], 0.0
+    for query in queries:
+        budget = RequestBudget()
+        start = time.perf_counter()
+        chat(query, [], budget)
+        latencies.append(time.perf_counter() - start)
+        cost += budget.cost_usd
+
+    conn = get_connection()
+    routes = conn.execute("SELECT model, reason FROM model_routes WHERE id > ?", (watermark,)).fetchall()
+    conn.close()
+    return {
+        "p50_ms": 1000 * percentile(latencies, 50),
+        "p95_ms": 1000 * percentile(latencies, 95),
+        "mean_ms": 1000 * sum(latencies) / len(latencies),
+        "cost_usd": cost,
+        "llm_turns": len(routes),
+        "models": Counter(row["model"] for row in routes),
+        "reasons": Counter(f"{row['reason']} -> {row['model']}" for row in routes),
+    }
+
+
+def print_run(label: str, r: Dict):
+    models = ", ".join(f"{model} x{n}" for model, n in r["models"].most_common())
+    print(f"   {label:<10}{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}{r['mean_ms']:>9.1f}"
+          f"{r['cost_usd'] * 1000:>13.4f}   {models}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay logged queries with and without model routing")
+    parser.add_argument("--db", default="data/leads.db", help="Database with logged conversations")
+    parser.add_argument("--limit", type=int, default=1000)
+    parser.add_argument("--latency-ms", type=float, default=300.0, help="Mock time to first token (large model)")
+    parser.add_argument("--per-token-ms", type=float, default=2.0, help="Mock time per output token (large model)")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("Routing Replay")
+    print("=" * 70)
+    queries = load_queries(args.db, args.limit)
+
+    from benchmarks import mock_llm_server
+    mock_llm_server.configure(latency_ms=args.latency_ms, per_token_ms=args.per_token_ms, jitter_ms=0.0, seed=0)
+    mock_llm_server.start_in_thread(port=MOCK_PORT)
+
+    import config
+    config.openai_client.base_url = f"http://127.0.0.1:{MOCK_PORT}/v1"
+    import importlib
+    tools_module = importlib.import_module("core.tools")  # core.tools is shadowed by the tools list
+    tools_module.PUSHOVER_USER = tools_module.PUSHOVER_TOKEN = None
+
+    from rag.knowledge_indexer import index_knowledge_base
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            index_knowledge_base(reset=True)
+        print(f"🧪 Mock: {args.latency_ms:.0f} ms + {args.per_token_ms} ms/token, "
+              f"{config.FAST_MODEL} x{mock_llm_server.settings.model_latency_scale.get(config.FAST_MODEL, 1.0)}\n")
+        print(f"   {'run':<10}{'p50 ms':>9}{'p95 ms':>9}{'mean ms':>9}{'cost m$':>13}   models")
+        baseline = replay(queries, routing=False)
+        print_run("all large", baseline)
+        routed = replay(queries, routing=True)
+        print_run("routed", routed)
+
+        print("\n🔀 Routing decisions")
+        for reason, n in routed["reasons"].most_common():
+            print(f"   {reason:<44}{n:>5}")
+
+        saved_cost = 1 - routed["cost_usd"] / baseline["cost_usd"] if baseline["cost_usd"] else 0.0
+        saved_latency = 1 - routed["mean_ms"] / baseline["mean_ms"] if baseline["mean_ms"] else 0.0
+    finally:
+        shutil.rmtree(SCRATCH, ignore_errors=True)
+    print(f"\n{'✅' if saved_cost > 0 else '❌'} Routing saved {saved_cost:.0%} of LLM cost "
+          f"and {saved_latency:.0%} of mean latency")
+
+
+if __name__ == "__main__":
+    main()
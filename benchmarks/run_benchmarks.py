@@ -0,0 +1,290 @@
+"""
+Benchmark Suite - end-to-end latency of the chat pipeline against the mock LLM server.
+Runs retrieval, cache, prompt build, tool loop and HTTP scenarios, reports
+p50/p95/p99 latency, throughput and per-stage breakdowns, and flags regressions
+against a stored baseline.
+
+Usage: python -m benchmarks.run_benchmarks
+       python -m benchmarks.run_benchmarks --requests 200 --concurrency 8
+       python -m benchmarks.run_benchmarks --save-baseline
+"""
+
+import argparse
+import json
+import math
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List
+
+MOCK_PORT = 8100
+API_PORT = 8101
+RESULTS_DIR = "benchmarks/results"
+BASELINE_PATH = "benchmarks/baseline.json"
+REGRESSION_THRESHOLD = 0.20  # 20% slower p95 / lower throughput than baseline
+
+# The OpenAI client refuses to start without a key; the mock server ignores it
+os.environ.setdefault("GROQ_API_KEY", "mock-key")
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def summarize(latencies: List[float], wall_time: float = 0.0) -> Dict:
+    """Summarize a list of latencies (seconds) into milliseconds."""
+    if not latencies:
+        return {"count": 0}
+    summary = {
+        "count": len(latencies),
+        "mean_ms": round(1000 * sum(latencies) / len(latencies), 3),
+        "p50_ms": round(1000 * percentile(latencies, 50), 3),
+        "p95_ms": round(1000 * percentile(latencies, 95), 3),
+        "p99_ms": round(1000 * percentile(latencies, 99), 3),
+        "max_ms": round(1000 * max(latencies), 3),
+    }
+    if wall_time:
+        summary["throughput_rps"] = round(len(latencies) / wall_time, 2)
+    return summary
+
+
+class StageTimer:
+    """Collects per-stage durations by wrapping pipeline functions."""
+
+    def __init__(self):
+        self.durations = defaultdict(list)
+
+    def wrap(self, stage: str, func: Callable) -> Callable:
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.durations[stage].append(time.perf_counter() - start)
+        timed.__wrapped__ = func
+        return timed
+
+    def reset(self):
+        self.durations.clear()
+
+    def summary(self) -> Dict:
+        return {stage: summarize(values) for stage, values in self.durations.items()}
+
+
+def instrument_pipeline(timer: StageTimer):
+    """Wrap the functions core.chat calls so each stage is timed."""
+    import importlib
+    chat_module = importlib.import_module("core.chat")  # core.chat is shadowed by the chat function
+
+    for stage, name in [
+        ("retrieval", "retreive_context"),
+        ("cache_lookup", "get_cached_response"),
+        ("prompt_build", "build_messages"),
+        ("tool_calls", "handle_tool_calls"),
+        ("sanitize", "clean_response"),
+        ("cache_write", "set_cached_response"),
+    ]:
+        setattr(chat_module, name, timer.wrap(stage, getattr(chat_module, name)))
+
+    # Patch the class: chat() calls the API through per-request client copies
+    completions_class = type(chat_module.openai_client.chat.completions)
+    completions_class.create = timer.wrap("llm_round_trip", completions_class.create)
+
+
+def run_sequential(name: str, func: Callable[[int], object], n: int, timer: StageTimer) -> Dict:
+    """Run func(i) n times sequentially and summarize."""
+    timer.reset()
+    latencies = []
+    started = time.perf_counter()
+    for i in range(n):
+        start = time.perf_counter()
+        func(i)
+        latencies.append(time.perf_counter() - start)
+    wall_time = time.perf_counter() - started
+    result = summarize(latencies, wall_time)
+    result["stages"] = timer.summary()
+    print(f"   {name:<24} p50={result['p50_ms']:>9.2f}ms  p95={result['p95_ms']:>9.2f}ms  "
+          f"p99={result['p99_ms']:>9.2f}ms  {result['throughput_rps']:>8.2f} req/s")
+    return result
+
+
+def run_http(name: str, n: int, concurrency: int, timer: StageTimer) -> Dict:
+    """POST to /api/chat with a thread pool and summarize."""
+    import httpx
+
+    url = f"http://127.0.0.1:{API_PORT}/api/chat"
+    timer.reset()
+
+    def one(i: int) -> float:
+        with httpx.Client(timeout=60) as client:
+            start = time.perf_counter()
+            response = client.post(url, json={"message": f"What is your experience? (http #{i})"})
+            response.raise_for_status()
+            return time.perf_counter() - start
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(one, range(n)))
+    wall_time = time.perf_counter() - started
+
+    result = summarize(latencies, wall_time)
+    result["concurrency"] = concurrency
+    result["stages"] = timer.summary()
+    print(f"   {name:<24} p50={result['p50_ms']:>9.2f}ms  p95={result['p95_ms']:>9.2f}ms  "
+          f"p99={result['p99_ms']:>9.2f}ms  {result['throughput_rps']:>8.2f} req/s")
+    return result
+
+
+def find_regressions(results: Dict, baseline: Dict, threshold: float = REGRESSION_THRESHOLD) -> List[str]:
+    """Compare p95 latency and throughput per scenario against a baseline run."""
+    regressions = []
+    for name, current in results["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous or not current.get("count"):
+            continue
+        if previous.get("p95_ms") and current["p95_ms"] > previous["p95_ms"] * (1 + threshold):
+            regressions.append(
+                f"{name}: p95 {current['p95_ms']:.2f}ms vs baseline {previous['p95_ms']:.2f}ms"
+            )
+        if previous.get("throughput_rps") and current["throughput_rps"] < previous["throughput_rps"] * (1 - threshold):
+            regressions.append(
+                f"{name}: throughput {current['throughput_rps']:.2f} req/s vs baseline {previous['throughput_rps']:.2f} req/s"
+            )
+    return regressions
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end latency benchmarks")
+    parser.add_argument("--requests", type=int, default=50, help="Requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent clients for HTTP scenario")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Mock LLM time to first token")
+    parser.add_argument("--per-token-ms", type=float, default=0.0, help="Mock LLM time per output token")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the new baseline")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    args = parser.parse_args()
+
+    from benchmarks import mock_llm_server
+    mock_llm_server.configure(latency_ms=args.latency_ms, per_token_ms=args.per_token_ms,
+                              jitter_ms=0.0, seed=0)
+    mock_llm_server.start_in_thread(port=MOCK_PORT)
+
+    # Keep benchmark cache and DB writes out of data/ (read when config is imported)
+    scratch = tempfile.mkdtemp(prefix="career-bench-")
+    os.environ["CACHE_DIR"] = str(Path(scratch) / "cache")
+    os.environ["DATABASE_PATH"] = str(Path(scratch) / "bench.db")
+    # Every benchmark request comes from 127.0.0.1: measure the pipeline, not the rate limits
+    os.environ.setdefault("RATE_LIMIT_IP_PER_MINUTE", "1000000")
+    os.environ.setdefault("RATE_LIMIT_IP_BURST", "1000000")
+    os.environ.setdefault("RATE_LIMIT_ORIGIN_PER_MINUTE", "1000000")
+    os.environ.setdefault("RATE_LIMIT_ORIGIN_BURST", "1000000")
+    # Scenarios force tool calls through the large model; routing is measured by replay_routing
+    os.environ.setdefault("MODEL_ROUTING", "0")
+
+    # Point the shared client at the mock before anything calls it
+    import config
+    config.openai_client.base_url = f"http://127.0.0.1:{MOCK_PORT}/v1"
+
+    import importlib
+    tools_module = importlib.import_module("core.tools")  # core.tools is shadowed by the tools list
+    tools_module.PUSHOVER_USER = tools_module.PUSHOVER_TOKEN = None
+
+    from rag.vector_store import get_collection_stats
+    from rag.knowledge_indexer import index_knowledge_base
+    if get_collection_stats()["total_documents"] == 0:
+        print("📚 Vector store empty — indexing knowledge base first...")
+        index_knowledge_base(reset=False)
+
+    timer = StageTimer()
+    instrument_pipeline(timer)
+
+    from core.chat import chat
+    from rag.retriever import retreive_context
+
+    import uvicorn
+    import api_server
+    server = uvicorn.Server(uvicorn.Config(api_server.app, host="127.0.0.1", port=API_PORT, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+
+    n = args.requests
+    print("=" * 100)
+    print(f"Benchmark Suite  (requests={n}, mock latency={args.latency_ms}ms)")
+    print("=" * 100)
+
+    chat("What are your skills?", [])  # warm the embedding model and cache
+    scenarios = {
+        "retrieval": run_sequential(
+            "retrieval", lambda i: retreive_context(f"What projects have you worked on? #{i}"), n, timer),
+        "chat_cache_miss": run_sequential(
+            "chat_cache_miss", lambda i: chat(f"Tell me about your experience #{i}", []), n, timer),
+        "chat_cache_hit": run_sequential(
+            "chat_cache_hit", lambda i: chat("What are your skills?", []), n, timer),
+        "chat_tool_loop": run_sequential(
+            "chat_tool_loop", lambda i: chat(f"[[tool:record_unknown_question]] favourite food #{i}", []), n, timer),
+        "chat_tool_use_failed": run_sequential(
+            "chat_tool_use_failed", lambda i: chat(f"[[tool_use_failed]] hobbies #{i}", []), n, timer),
+        "http_chat": run_http("http_chat", n, args.concurrency, timer),
+    }
+    server.should_exit = True
+
+    results = {
+        "timestamp": datetime.now().isoformat(),
+        "git_commit": _git_commit(),
+        "settings": {
+            "requests": n,
+            "concurrency": args.concurrency,
+            "mock_latency_ms": args.latency_ms,
+            "mock_per_token_ms": args.per_token_ms,
+        },
+        "scenarios": scenarios,
+    }
+
+    baseline_path = Path(args.baseline)
+    if baseline_path.exists():
+        baseline = json.loads(baseline_path.read_text())
+        results["baseline_commit"] = baseline.get("git_commit")
+        results["regressions"] = find_regressions(results, baseline, args.threshold)
+    else:
+        results["regressions"] = []
+
+    results_dir = Path(RESULTS_DIR)
+    results_dir.mkdir(parents=True, exist_ok=True)
+    out_path = results_dir / f"bench_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    out_path.write_text(json.dumps(results, indent=2))
+    print(f"\n💾 Results saved to {out_path}")
+
+    if args.save_baseline:
+        baseline_path.write_text(json.dumps(results, indent=2))
+        print(f"📌 Baseline updated: {baseline_path}")
+
+    if results["regressions"]:
+        print(f"\n❌ {len(results['regressions'])} regression(s) vs baseline:")
+        for regression in results["regressions"]:
+            print(f"   - {regression}")
+        sys.exit(1)
+    print("\n✅ No regressions detected")
+
+
+if __name__ == "__main__":
+    main()
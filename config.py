@@ -3,16 +3,20 @@ Configuration - loads environment variables.
 """
 
 import os
+from pathlib import Path
 from dotenv import load_dotenv
 from openai import OpenAI
 
 # Load environment variables
 load_dotenv(override=True)
 
+# LLM endpoint (override to point at benchmarks/mock_llm_server.py)
+LLM_BASE_URL = os.getenv("LLM_BASE_URL", "https://api.groq.com/openai/v1")
+
 # OpenAI client
 openai_client = OpenAI(
     api_key=os.getenv("GROQ_API_KEY"),
-    base_url="https://api.groq.com/openai/v1"
+    base_url=LLM_BASE_URL
 )
 
 # Pushover credentials
@@ -27,7 +31,48 @@ ASSISTANT_EMAIL = "arpit.shrotriya5945@gmail.com"
 # Model settings
 MODEL = "llama-3.3-70b-versatile"
 
+# Small, fast model for simple turns (greetings, short lookups); see core/router.py.
+# MODEL_ROUTING=0 sends every turn to MODEL.
+FAST_MODEL = os.getenv("FAST_MODEL", "llama-3.1-8b-instant")
+MODEL_ROUTING = os.getenv("MODEL_ROUTING", "1") == "1"
+
+# USD per million (input, output) tokens, for per-request cost accounting
+MODEL_PRICING = {
+    "llama-3.3-70b-versatile": (0.59, 0.79),
+    "llama-3.1-8b-instant": (0.05, 0.08),
+}
+
+# Per-request execution budget for the tool-call loop
+MAX_LLM_ROUNDS = int(os.getenv("MAX_LLM_ROUNDS", "4"))
+REQUEST_DEADLINE_SECONDS = float(os.getenv("REQUEST_DEADLINE_SECONDS", "30"))
+
+# Embedding model for the vector store: "" uses Chroma's bundled all-MiniLM-L6-v2 (ONNX);
+# any other name is loaded with sentence-transformers. Re-index with a reset after changing it.
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "")
+
+# Tenant directories (storage/tenants.py)
+TENANTS_DIR = os.getenv("TENANTS_DIR", "data/tenants")
+TENANTS_CONFIGURED = Path(TENANTS_DIR).is_dir() and any((p / "tenant.json").exists() for p in Path(TENANTS_DIR).iterdir())
+
+# Compact embedding index for searches: "none" (Chroma HNSW, float32), "int8" or "binary"
+# (see rag/quantized_store.py; built when indexing). Defaults to int8 when tenants are
+# configured: only quantized indexes are held in the INDEX_CACHE_MB LRU, while Chroma
+# keeps every tenant's float32 HNSW graph it has loaded.
+VECTOR_QUANTIZATION = os.getenv("VECTOR_QUANTIZATION", "int8" if TENANTS_CONFIGURED else "none")
+
 # Paths
 KNOWLEDGE_DIR = "data/knowledge"
-DATABASE_PATH = "data/leads.db"
-VECTOR_DB_DIR = "data/chroma_db"
\ No newline at end of file
+DATABASE_PATH = os.getenv("DATABASE_PATH", "data/leads.db")
+VECTOR_DB_DIR = os.getenv("VECTOR_DB_DIR", "data/chroma_db")
+
+# Multi-worker settings
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+VECTOR_STORE_READ_ONLY = os.getenv("VECTOR_STORE_READ_ONLY", "0") == "1"
+
+# Admin endpoints (/admin/*) and X-Profile require this token; unset disables them
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+# Proxies trusted to set X-Forwarded-For (comma-separated IPs or networks, "*" for any).
+# Rate limits key on the client address, so behind a proxy (HF Spaces, nginx) this must
+# include it or every visitor shares the proxy's bucket. Same variable uvicorn reads.
+FORWARDED_ALLOW_IPS = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
@@ -0,0 +1,225 @@
+"""
+Admission control - per-client rate limits and a bounded LLM gate.
+
+Two layers keep one noisy client from starving everyone else:
+  - RateLimiter: token buckets per client IP and per Origin, checked before
+    any work is done. An empty bucket is a 429 with the seconds until the
+    next token.
+  - LLMGate: at most LLM_MAX_CONCURRENCY requests in the LLM phase at once,
+    waiting in a bounded priority queue. A full queue, or a wait longer than
+    LLM_QUEUE_TIMEOUT_SECONDS (or the request's deadline), raises Overloaded
+    right away (a 503) instead of piling up requests that will time out.
+
+The gate sits after the response cache lookup in core.chat, so cache hits
+never queue. Background LLM calls (session summaries, cache warming) go
+through it too, at PRIORITY_LOW, so they never take a slot a visitor is
+waiting for. Limits are per worker process.
+
+Rate limits key on the client address. Behind a reverse proxy that is the
+address from X-Forwarded-For, trusted only from FORWARDED_ALLOW_IPS
+(config.py).
+
+Usage:
+    retry_after = rate_limiter.check(ip, origin)   # None if admitted
+    with llm_gate.slot(PRIORITY_NORMAL, timeout=10):
+        ...LLM calls...
+"""
+
+import heapq
+import itertools
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Optional
+
+from utils.log import get_logger
+from utils.metrics import gauge, ADMISSION_REJECTIONS, LLM_QUEUE_WAIT
+
+logger = get_logger(__name__)
+
+# Token buckets: sustained requests per minute and burst size
+RATE_LIMIT_IP_PER_MINUTE = float(os.getenv("RATE_LIMIT_IP_PER_MINUTE", "20"))
+RATE_LIMIT_IP_BURST = int(os.getenv("RATE_LIMIT_IP_BURST", "10"))
+RATE_LIMIT_ORIGIN_PER_MINUTE = float(os.getenv("RATE_LIMIT_ORIGIN_PER_MINUTE", "300"))
+RATE_LIMIT_ORIGIN_BURST = int(os.getenv("RATE_LIMIT_ORIGIN_BURST", "60"))
+RATE_LIMIT_MAX_CLIENTS = 10_000     # buckets kept per limiter (least recently seen dropped)
+
+# LLM gate
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_QUEUE_MAX = int(os.getenv("LLM_QUEUE_MAX", "32"))
+LLM_QUEUE_TIMEOUT_SECONDS = float(os.getenv("LLM_QUEUE_TIMEOUT_SECONDS", "10"))
+
+# Queue priorities (lower is served first)
+PRIORITY_HIGH = 0       # conversation already in progress
+PRIORITY_NORMAL = 1     # first message of a session
+PRIORITY_LOW = 2        # background work: session summaries, cache warming
+LLM_BACKGROUND_TIMEOUT_SECONDS = float(os.getenv("LLM_BACKGROUND_TIMEOUT_SECONDS", "60"))
+
+# Rejection reasons (metric labels)
+REJECT_IP = "rate_limit_ip"
+REJECT_ORIGIN = "rate_limit_origin"
+REJECT_QUEUE_FULL = "queue_full"
+REJECT_QUEUE_TIMEOUT = "queue_timeout"
+
+
+class Overloaded(Exception):
+    """Raised when the LLM gate can't admit a request in time."""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class TokenBuckets:
+    """
+    Token buckets keyed by client, refilled lazily on each take.
+
+    Buckets for the least recently seen clients are dropped past max_keys;
+    a dropped client simply starts again with a full bucket.
+    """
+
+    def __init__(self, per_minute: float, burst: int, max_keys: int = RATE_LIMIT_MAX_CLIENTS):
+        self.rate = per_minute / 60.0
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()   # key -> [tokens, last refill]
+        self._lock = threading.Lock()
+
+    def take(self, key: str, now: Optional[float] = None) -> float:
+        """
+        Take one token for a client.
+
+        Returns:
+            0.0 if admitted, else seconds until a token is available
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [float(self.burst), now]
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+            if bucket[0] >= 1.0:
+                bucket[0] -= 1.0
+                return 0.0
+            return (1.0 - bucket[0]) / self.rate if self.rate > 0 else float("inf")
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class RateLimiter:
+    """Per-IP and per-Origin token buckets; a request needs a token from both."""
+
+    def __init__(self):
+        self.by_ip = TokenBuckets(RATE_LIMIT_IP_PER_MINUTE, RATE_LIMIT_IP_BURST)
+        self.by_origin = TokenBuckets(RATE_LIMIT_ORIGIN_PER_MINUTE, RATE_LIMIT_ORIGIN_BURST)
+
+    def check(self, ip: str, origin: Optional[str]) -> Optional[float]:
+        """
+        Admit or reject a request.
+
+        Args:
+            ip: Client address
+            origin: Origin header (requests without one share the "none" bucket)
+
+        Returns:
+            None if admitted, else seconds the client should wait (Retry-After)
+        """
+        wait = self.by_ip.take(ip)
+        if wait:
+            ADMISSION_REJECTIONS.labels(REJECT_IP).inc()
+            return wait
+        wait = self.by_origin.take(origin or "none")
+        if wait:
+            ADMISSION_REJECTIONS.labels(REJECT_ORIGIN).inc()
+            return wait
+        return None
+
+
+class LLMGate:
+    """
+    Counting semaphore with a bounded priority queue.
+
+    Requests take a free slot immediately; otherwise they wait in order of
+    (priority, arrival). A released slot is handed straight to the next
+    waiter, so later arrivals can't jump the queue.
+    """
+
+    def __init__(self, max_concurrency: int, max_queue: int):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.in_flight = 0
+        self._waiters = []      # heap of [priority, seq, event]
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    def acquire(self, priority: int = PRIORITY_NORMAL, timeout: float = LLM_QUEUE_TIMEOUT_SECONDS):
+        """
+        Wait for a slot.
+
+        Raises:
+            Overloaded: if the queue is full or no slot frees up within timeout
+        """
+        with self._lock:
+            if self.in_flight < self.max_concurrency and not self._waiters:
+                self.in_flight += 1
+                LLM_QUEUE_WAIT.observe(0.0)
+                return
+            reason = REJECT_QUEUE_FULL if len(self._waiters) >= self.max_queue else None
+            if reason is None and timeout <= 0:
+                reason = REJECT_QUEUE_TIMEOUT
+            if reason:
+                ADMISSION_REJECTIONS.labels(reason).inc()
+                raise Overloaded(reason, retry_after=1.0)
+            entry = [priority, next(self._seq), threading.Event()]
+            heapq.heappush(self._waiters, entry)
+
+        started = time.perf_counter()
+        granted = entry[2].wait(timeout)
+        if not granted:
+            with self._lock:
+                # A slot may have been handed over between the timeout and the lock
+                granted = entry[2].is_set()
+                if not granted:
+                    self._waiters.remove(entry)
+                    heapq.heapify(self._waiters)
+        LLM_QUEUE_WAIT.observe(time.perf_counter() - started)
+        if not granted:
+            ADMISSION_REJECTIONS.labels(REJECT_QUEUE_TIMEOUT).inc()
+            logger.warning("No LLM slot after %.1fs (%d in flight, %d queued)",
+                           timeout, self.in_flight, len(self._waiters))
+            raise Overloaded(REJECT_QUEUE_TIMEOUT, retry_after=timeout)
+
+    def release(self):
+        """Free a slot, handing it to the highest-priority waiter if any."""
+        with self._lock:
+            if self._waiters:
+                heapq.heappop(self._waiters)[2].set()
+            else:
+                self.in_flight -= 1
+
+    @contextmanager
+    def slot(self, priority: int = PRIORITY_NORMAL, timeout: float = LLM_QUEUE_TIMEOUT_SECONDS):
+        """Hold a slot for the duration of a block."""
+        self.acquire(priority, timeout)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+
+rate_limiter = RateLimiter()
+llm_gate = LLMGate(LLM_MAX_CONCURRENCY, LLM_QUEUE_MAX)
+gauge("llm_in_flight", "Requests holding an LLM slot", lambda: llm_gate.in_flight)
+gauge("llm_queue_depth", "Requests waiting for an LLM slot", lambda: llm_gate.queue_depth())
@@ -0,0 +1,92 @@
+"""
+Budget - request-scoped execution budget for the tool-call loop.
+Caps the number of LLM rounds, enforces a wall-clock deadline that can be
+cancelled from outside, and accounts tokens and cost per round.
+"""
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+from config import MODEL_PRICING, MAX_LLM_ROUNDS, REQUEST_DEADLINE_SECONDS
+
+# Don't start an LLM round with less time than this left
+MIN_ROUND_SECONDS = 1.0
+
+# Reasons a budget ran out
+EXHAUSTED_ROUNDS = "max_rounds"
+EXHAUSTED_DEADLINE = "deadline"
+EXHAUSTED_CANCELLED = "cancelled"
+
+
+@dataclass
+class RequestBudget:
+    """Limits and usage for a single chat request."""
+    max_rounds: int = MAX_LLM_ROUNDS
+    deadline_seconds: float = REQUEST_DEADLINE_SECONDS
+    started_at: float = field(default_factory=time.monotonic)
+    rounds: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cost_usd: float = 0.0
+    exhausted_reason: Optional[str] = None
+    _cancelled: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    def cancel(self):
+        """Stop the request at the next round boundary (e.g. client went away)."""
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    def remaining(self) -> float:
+        """Seconds left before the deadline (never negative)."""
+        return max(0.0, self.deadline_seconds - self.elapsed())
+
+    def time_left(self) -> bool:
+        """True if there is enough time and no cancellation for one more LLM call."""
+        if self.cancelled:
+            self.exhausted_reason = EXHAUSTED_CANCELLED
+            return False
+        if self.remaining() < MIN_ROUND_SECONDS:
+            self.exhausted_reason = EXHAUSTED_DEADLINE
+            return False
+        return True
+
+    def can_start_round(self) -> bool:
+        """True if another LLM round fits in the budget; records why not otherwise."""
+        if not self.time_left():
+            return False
+        if self.rounds >= self.max_rounds:
+            self.exhausted_reason = EXHAUSTED_ROUNDS
+            return False
+        return True
+
+    def record_round(self, model: str, usage: Optional[object]) -> float:
+        """Count a completed LLM round and add its tokens and cost; returns the round's cost."""
+        self.rounds += 1
+        if usage is None:
+            return 0.0
+        prompt = getattr(usage, "prompt_tokens", 0) or 0
+        completion = getattr(usage, "completion_tokens", 0) or 0
+        self.prompt_tokens += prompt
+        self.completion_tokens += completion
+        input_price, output_price = MODEL_PRICING.get(model, (0.0, 0.0))
+        cost = (prompt * input_price + completion * output_price) / 1_000_000
+        self.cost_usd += cost
+        return cost
+
+    def to_dict(self) -> dict:
+        return {
+            "rounds": self.rounds,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cost_usd": round(self.cost_usd, 6),
+            "duration_ms": round(self.elapsed() * 1000, 1),
+            "exhausted_reason": self.exhausted_reason,
+        }
@@ -2,113 +2,287 @@
 Chat logic - loads knowledge and handles conversation.
 """
 
-import re
-from openai import BadRequestError
-from config import openai_client, MODEL, ASSISTANT_NAME
+import logging
+import time
+from functools import lru_cache
+from typing import Optional
+from openai import APIStatusError, APITimeoutError, BadRequestError
+from config import openai_client, MODEL
+from core.admission import (llm_gate, LLM_BACKGROUND_TIMEOUT_SECONDS, LLM_QUEUE_TIMEOUT_SECONDS, PRIORITY_LOW,
+                            PRIORITY_NORMAL)
+from core.budget import RequestBudget, EXHAUSTED_DEADLINE, EXHAUSTED_ROUNDS, MIN_ROUND_SECONDS
+from core.router import RouteDecision, route, escalate
+from core.sanitizer import sanitize
 from core.tools import tools, handle_tool_calls
 from rag.retriever import retreive_context
 from storage.cache import get_cached_response, set_cached_response
+from storage.database import add_request_budget, add_model_route
+from storage.tenants import get_tenant
+from utils.log import get_logger, get_request_id, log_event
+from utils.metrics import (
+    span, record_usage, CHAT_REQUESTS, LLM_REQUESTS, TOOL_LOOP_ITERATIONS, LLM_COST, BUDGET_EXHAUSTED,
+    MODEL_ROUTES, LLM_MODEL_SECONDS, LLM_MODEL_COST
+)
+
+logger = get_logger(__name__)
 
 
 def clean_response(text: str) -> str:
     """Remove raw function call text that the model sometimes leaks into responses."""
-    # Remove <function=...>{...} patterns
-    text = re.sub(r'<function=\w+>\{[^}]*\}', '', text)
-    # Remove any leftover <function=...> tags
-    text = re.sub(r'<function=\w+>', '', text)
-    # Clean up extra whitespace
-    text = re.sub(r'\n{3,}', '\n\n', text).strip()
-    return text
-
-# Build system prompt
-def build_system_prompt(retrieved_context: str = "") -> str:
+    return sanitize(text)
+
+def summarize_history(previous_summary: str, messages: list) -> str:
     """
-    Build the system prompt with dynamically retrieved context.
-    
+    Fold older conversation turns into a short rolling summary.
+
+    Runs as a background task, so it waits for an LLM slot at PRIORITY_LOW.
+    Falls back to a truncated transcript if the LLM call fails or no slot
+    frees up, so session compaction never loses turns.
+
     Args:
-        retrieved_context: Context retrieved from vector database for current query
+        previous_summary: Summary of even earlier turns ("" if none)
+        messages: List of {"role", "content"} dicts to fold in
+
+    Returns:
+        Updated summary text
     """
-    prompt = f"""You are acting as {ASSISTANT_NAME}. You are answering questions on {ASSISTANT_NAME}'s website, \
-particularly questions related to {ASSISTANT_NAME}'s career, background, skills and experience. \
-Your responsibility is to represent {ASSISTANT_NAME} for interactions on the website as faithfully as possible.
- 
-{retrieved_context}
+    transcript = "\n".join(f"{m['role']}: {m['content']}" for m in messages)
+    prompt = (
+        "Update the summary of this conversation with a website visitor. Keep names, emails, "
+        "companies, roles and open questions; drop pleasantries. Reply with the summary only, "
+        "at most 120 words.\n\n"
+        f"Current summary:\n{previous_summary or '(none)'}\n\nNew turns:\n{transcript}"
+    )
+    try:
+        with llm_gate.slot(PRIORITY_LOW, timeout=LLM_BACKGROUND_TIMEOUT_SECONDS):
+            response = openai_client.chat.completions.create(
+                model=MODEL,
+                messages=[{"role": "user", "content": prompt}],
+                max_tokens=200
+            )
+        record_usage(response.usage)
+        return response.choices[0].message.content.strip()
+    except Exception as e:
+        logger.warning("History summarization failed, using truncated transcript: %s", e)
+        truncated = "; ".join(f"{m['role']}: {m['content'][:100]}" for m in messages)
+        return f"{previous_summary} {truncated}".strip()[-2000:]
+
+
+# Static system prompt: identical on every request (per tenant) so provider-side
+# prefix (KV) caching can reuse it. Per-query context goes after the history.
+SYSTEM_PROMPT_TEMPLATE = """You are acting as {name}. You are answering questions on {name}'s website, \
+particularly questions related to {name}'s career, background, skills and experience. \
+Your responsibility is to represent {name} for interactions on the website as faithfully as possible.
  
 Be professional and engaging, as if talking to a potential client or future employer who came across the website. \
-Use the context provided above to answer questions accurately. Always cite sources when referencing specific information.
+Before each user message you will receive the relevant context from the knowledge base. \
+Use that context to answer questions accurately. Always cite sources when referencing specific information.
  
 If you don't know the answer to any question, use your record_unknown_question tool to record the question that you couldn't answer, even if it's about something trivial or unrelated to career. \
 If the user is engaging in discussion, try to steer them towards getting in touch via email; ask for their email and record it using your record_user_details tool.
  
-With this context, please chat with the user, always staying in character as {ASSISTANT_NAME}."""
-    
-    return prompt
+Please chat with the user, always staying in character as {name}."""
+
+
+@lru_cache(maxsize=1024)
+def _system_message(assistant_name: str) -> dict:
+    return {"role": "system", "content": SYSTEM_PROMPT_TEMPLATE.format(name=assistant_name)}
+
+
+def build_system_prompt() -> str:
+    """Return the current tenant's static system prompt (persona and rules), built once per tenant."""
+    return _system_message(get_tenant().assistant_name)["content"]
+
+
+def build_messages(retrieved_context: str, history: list, user_query: str) -> list:
+    """
+    Assemble the LLM messages with a stable prefix.
+
+    Order: static system prompt, conversation history, retrieved context,
+    user message. Only the tail changes between requests, so the prefix
+    (and, within a session, the history) can be served from the provider's
+    prompt cache.
+
+    Args:
+        retrieved_context: Context retrieved from vector database for current query
+        history: Prior messages as {"role", "content"} dicts
+        user_query: The user's current message
+    """
+    # Sanitize history to remove unsupported fields like metadata
+    messages = [_system_message(get_tenant().assistant_name)]
+    messages.extend({"role": msg["role"], "content": msg["content"]} for msg in history)
+    messages.append({"role": "system", "content": retrieved_context})
+    messages.append({"role": "user", "content": user_query})
+    return messages
+
+
+# Reply used when the budget runs out before the model produced an answer
+BUDGET_FALLBACK_RESPONSE = (
+    "Sorry, I couldn't finish that answer in time. Could you ask again, or share your email "
+    "so {name} can follow up with you directly?"
+)
+
+
+def _complete(messages: list, budget: RequestBudget, use_tools: bool = True, model: str = MODEL):
+    """
+    One LLM round trip, bounded by the time left in the request budget.
+
+    Client-side retries are disabled: a timed-out call would otherwise be
+    retried past the deadline.
+    """
+    client = openai_client.with_options(timeout=budget.remaining(), max_retries=0)
+    kwargs = {"model": model, "messages": messages}
+    if use_tools:
+        kwargs["tools"] = tools
+    started = time.perf_counter()
+    with span("llm_round_trip"):
+        response = client.chat.completions.create(**kwargs)
+    LLM_MODEL_SECONDS.labels(model).observe(time.perf_counter() - started)
+    LLM_REQUESTS.labels("ok").inc()
+    record_usage(response.usage)
+    LLM_MODEL_COST.labels(model).inc(budget.record_round(model, response.usage))
+    return response
+
+
+def _record_route(decision: RouteDecision, query: str, budget: RequestBudget):
+    """Log the turn's routing decision with its latency and cost."""
+    MODEL_ROUTES.labels(decision.model, decision.reason).inc()
+    usage = budget.to_dict()
+    log_event(logger, logging.INFO, "model_route", model=decision.model, reason=decision.reason,
+              top_score=round(decision.top_score, 3), words=decision.words,
+              duration_ms=usage["duration_ms"], cost_usd=usage["cost_usd"])
+    try:
+        add_model_route(get_request_id(), query, decision.model, decision.reason, decision.top_score, usage)
+    except Exception as e:
+        logger.warning("Failed to record model route: %s", e)
+
+
+def _record_budget(budget: RequestBudget, cache_hit: bool):
+    """Store the request's budget usage in the analytics tables."""
+    TOOL_LOOP_ITERATIONS.observe(budget.rounds)
+    LLM_COST.inc(budget.cost_usd)
+    if budget.exhausted_reason:
+        BUDGET_EXHAUSTED.labels(budget.exhausted_reason).inc()
+    try:
+        add_request_budget(get_request_id(), cache_hit, budget.to_dict())
+    except Exception as e:
+        logger.warning("Failed to record request budget: %s", e)
 
 
 # Main chat function
-def chat(message, history):
+def chat(message, history, budget: Optional[RequestBudget] = None, priority: int = PRIORITY_NORMAL):
     """
     Process a chat message with RAG-powered context retrieval.
+
+    The tool-call loop runs within a RequestBudget: at most MAX_LLM_ROUNDS
+    LLM calls (the last one without tools, so the model has to answer) and
+    a wall-clock deadline. If the budget runs out first, a polite fallback
+    reply is returned and nothing is cached.
+
+    Cache misses wait for an LLM slot (core/admission.py) before the loop;
+    cache hits don't. core/router.py picks the model: simple turns get one
+    round on FAST_MODEL without tools, and go to MODEL if that fails.
     
     Args:
         message: User's current message
         history: Chat history from Gradio (list of [user_msg, assistant_msg] pairs)
+        budget: Optional budget created by the caller (so it can cancel the request)
+        priority: LLM queue priority (PRIORITY_HIGH for conversations in progress)
+
+    Raises:
+        Overloaded: if no LLM slot frees up in time (callers answer 503)
 
     """
     user_query = message
+    budget = budget or RequestBudget()
+    CHAT_REQUESTS.inc()
 
     # Retrieve relevant context for this specific query
-    retrieval_result = retreive_context(user_query, top_k=3)
+    with span("retrieval"):
+        retrieval_result = retreive_context(user_query, top_k=3, collection_name=get_tenant().collection_name)
     retrieved_context = retrieval_result['formatted_context']
+    chunk_versions = retrieval_result['chunk_versions']
 
     # Check cache first
-    cached = get_cached_response(user_query, retrieved_context)
+    cached = get_cached_response(user_query, chunk_versions)
     if cached:
+        _record_budget(budget, cache_hit=True)
         return cached['response']
     
-    # Build system prompt
-    system_prompt = build_system_prompt(retrieved_context)
-    
-    # Build messages list (sanitize history to remove unsupported fields like metadata)
-    clean_history = [{"role": msg["role"], "content": msg["content"]} for msg in history]
-    messages = [{"role": "system", "content": system_prompt}] + clean_history + [{"role": "user", "content": user_query}]
-    
-    done = False
-    while not done:
-        try:
-            response = openai_client.chat.completions.create(
-                model=MODEL,
-                messages=messages,
-                tools=tools
-            )
-        except BadRequestError as e:
-            # Groq sometimes fails with tool_use_failed when model outputs raw function text
-            # Retry without tools to get a normal response
-            print(f"⚠️ Tool use failed, retrying without tools: {e}")
-            response = openai_client.chat.completions.create(
-                model=MODEL,
-                messages=messages
-            )
-            done = True
-            break
-        
-        finish_reason = response.choices[0].finish_reason
-        
-        if finish_reason == "tool_calls":
-            tool_message = response.choices[0].message
-            tool_calls = tool_message.tool_calls
-            results = handle_tool_calls(tool_calls)
-            messages.append(tool_message)
-            messages.extend(results)
-        else:
-            done = True
-    
-    final_response = response.choices[0].message.content
-    
+    with span("prompt_build"):
+        messages = build_messages(retrieved_context, history, user_query)
+    decision = route(user_query, retrieval_result, history)
+
+    # Wait no longer than the request could still use an LLM round
+    queue_timeout = min(LLM_QUEUE_TIMEOUT_SECONDS, budget.remaining() - MIN_ROUND_SECONDS)
+    if not budget.time_left() or queue_timeout <= 0:
+        budget.exhausted_reason = budget.exhausted_reason or EXHAUSTED_DEADLINE
+        _record_budget(budget, cache_hit=False)
+        return BUDGET_FALLBACK_RESPONSE.format(name=get_tenant().assistant_name)
+    llm_gate.acquire(priority, timeout=queue_timeout)
+    final_response = None
+    try:
+        while budget.can_start_round():
+            # On the last round the model has to answer: no tools
+            last_round = budget.rounds >= budget.max_rounds - 1
+            if decision.model != MODEL:
+                # Simple turn: one round on the fast model, without tools
+                try:
+                    response = _complete(messages, budget, use_tools=False, model=decision.model)
+                    final_response = response.choices[0].message.content
+                except APIStatusError as e:
+                    logger.warning("%s failed: %s", decision.model, e)
+                    budget.record_round(decision.model, None)
+                if final_response:
+                    break
+                # The fast model couldn't answer: retry the turn on the large model
+                LLM_REQUESTS.labels("escalated").inc()
+                decision = escalate(decision)
+                continue
+            try:
+                response = _complete(messages, budget, use_tools=not last_round)
+            except BadRequestError as e:
+                # Groq sometimes fails with tool_use_failed when model outputs raw function text
+                # Retry without tools to get a normal response
+                logger.warning("Tool use failed, retrying without tools: %s", e)
+                LLM_REQUESTS.labels("tool_use_failed").inc()
+                budget.record_round(MODEL, None)
+                if not budget.can_start_round():
+                    break
+                try:
+                    response = _complete(messages, budget, use_tools=False)
+                    final_response = response.choices[0].message.content
+                except (BadRequestError, APIStatusError) as retry_error:
+                    logger.warning("Retry without tools failed: %s", retry_error)
+                    budget.record_round(MODEL, None)
+                break
+
+            if response.choices[0].finish_reason == "tool_calls":
+                tool_message = response.choices[0].message
+                results = handle_tool_calls(tool_message.tool_calls)
+                messages.append(tool_message)
+                messages.extend(results)
+            else:
+                final_response = response.choices[0].message.content
+                break
+        if final_response is None and not budget.exhausted_reason:
+            # The loop ended without an answer (e.g. still calling tools on the last round)
+            budget.exhausted_reason = EXHAUSTED_ROUNDS
+    except APITimeoutError:
+        budget.exhausted_reason = EXHAUSTED_DEADLINE
+        logger.warning("LLM call hit the request deadline after %.1fs", budget.elapsed())
+    finally:
+        llm_gate.release()
+        _record_budget(budget, cache_hit=False)
+        _record_route(decision, user_query, budget)
+
+    if final_response is None:
+        return BUDGET_FALLBACK_RESPONSE.format(name=get_tenant().assistant_name)
+
     # Clean any leaked function call text from response
     final_response = clean_response(final_response)
     
     # Cache the response
-    set_cached_response(user_query, retrieved_context, final_response)
+    set_cached_response(user_query, chunk_versions, final_response)
     
     return final_response
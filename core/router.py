@@ -0,0 +1,114 @@
+"""
+Model Router - send simple chat turns to a small, fast model.
+
+Each cache-missing turn is classified with cheap local heuristics on the
+message, the retrieval scores and the history length:
+  - large model (MODEL, with tools) when the visitor shares contact details
+    (record_user_details), asks a multi-part, long or open-ended question,
+    the knowledge base has no good match (record_unknown_question may be
+    needed), or the conversation is long enough that context matters
+  - fast model (FAST_MODEL, no tools, one round) for greetings, thanks and
+    short questions with a strong retrieval match, such as contact info
+
+Greetings may address the tenant's assistant by name ("thanks Sam"); the
+pattern is built per assistant name and cached.
+
+If the fast model fails, chat() escalates the turn to the large model.
+
+Usage:
+    decision = route(message, retrieval_result, history)
+    decision.model, decision.use_tools, decision.reason
+"""
+
+import os
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List
+
+from config import MODEL, FAST_MODEL, MODEL_ROUTING
+from storage.tenants import get_tenant
+
+# Routing thresholds
+ROUTER_MAX_FAST_WORDS = int(os.getenv("ROUTER_MAX_FAST_WORDS", "20"))
+ROUTER_MIN_FAST_SCORE = float(os.getenv("ROUTER_MIN_FAST_SCORE", "0.45"))
+ROUTER_MAX_FAST_HISTORY = int(os.getenv("ROUTER_MAX_FAST_HISTORY", "6"))   # messages
+
+_SMALLTALK_PHRASES = (
+    r"hi+|hello|hey|yo|hiya|thanks?(?: you)?(?: so much| a lot)?|thx|ty|ok(?:ay)?|cool|great|nice|"
+    r"awesome|got it|bye|goodbye|see you|good (?:morning|afternoon|evening|night)"
+)
+_EMAIL = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+")
+_OPEN_ENDED = re.compile(
+    r"\b(?:why|explain|compare|comparison|difference|versus|vs\.?|trade-?offs?|walk me through|"
+    r"how (?:would|did|do|does|can|could)|design|approach|opinion|think about|pros and cons|in detail)\b",
+    re.IGNORECASE,
+)
+
+# Decision reasons (metric labels)
+REASON_DISABLED = "routing_disabled"
+REASON_CONTACT_SHARED = "contact_shared"
+REASON_SMALLTALK = "smalltalk"
+REASON_COMPLEX = "complex"
+REASON_LOW_RELEVANCE = "low_relevance"
+REASON_LONG_HISTORY = "long_history"
+REASON_SIMPLE_LOOKUP = "simple_lookup"
+REASON_ESCALATED = "escalated"
+
+
+@dataclass(frozen=True)
+class RouteDecision:
+    """Model for one chat turn and why it was chosen."""
+    model: str
+    use_tools: bool
+    reason: str
+    top_score: float
+    words: int
+
+
+@lru_cache(maxsize=None)
+def _smalltalk(assistant_name: str) -> re.Pattern:
+    """Greeting/thanks pattern, optionally addressed to the assistant by full or first name."""
+    names = {" ".join(assistant_name.split()), assistant_name.split()[0]} if assistant_name.strip() else set()
+    addressees = "|".join(["there", "again"] + [re.escape(name).replace(r"\ ", r"\s+") for name in names])
+    return re.compile(rf"^\s*(?:{_SMALLTALK_PHRASES})(?:\s+(?:{addressees}))?\s*[!.?]*\s*$", re.IGNORECASE)
+
+
+def _large(reason: str, top_score: float, words: int) -> RouteDecision:
+    return RouteDecision(MODEL, True, reason, top_score, words)
+
+
+def route(message: str, retrieval_result: Dict, history: List) -> RouteDecision:
+    """
+    Pick the model for a chat turn.
+
+    Args:
+        message: User's current message
+        retrieval_result: retreive_context() output (its results carry a 'score')
+        history: Conversation so far (messages)
+
+    Returns:
+        RouteDecision with the model, whether to offer tools, and the reason
+    """
+    results = retrieval_result.get("results") or []
+    top_score = max((r.get("score", 0.0) for r in results), default=0.0)
+    words = len(message.split())
+
+    if not MODEL_ROUTING or FAST_MODEL == MODEL:
+        return _large(REASON_DISABLED, top_score, words)
+    if _EMAIL.search(message):
+        return _large(REASON_CONTACT_SHARED, top_score, words)
+    if _smalltalk(get_tenant().assistant_name).match(message):
+        return RouteDecision(FAST_MODEL, False, REASON_SMALLTALK, top_score, words)
+    if words > ROUTER_MAX_FAST_WORDS or message.count("?") > 1 or _OPEN_ENDED.search(message):
+        return _large(REASON_COMPLEX, top_score, words)
+    if top_score < ROUTER_MIN_FAST_SCORE:
+        return _large(REASON_LOW_RELEVANCE, top_score, words)
+    if len(history) > ROUTER_MAX_FAST_HISTORY:
+        return _large(REASON_LONG_HISTORY, top_score, words)
+    return RouteDecision(FAST_MODEL, False, REASON_SIMPLE_LOOKUP, top_score, words)
+
+
+def escalate(decision: RouteDecision) -> RouteDecision:
+    """The large-model decision for a turn the fast model couldn't answer."""
+    return _large(REASON_ESCALATED, decision.top_score, decision.words)
@@ -0,0 +1,174 @@
+"""
+Sanitizer - strips function-call text the model sometimes leaks into responses.
+Removes <function=name>{...}</function> fragments (nested braces included),
+collapses runs of 3+ newlines and trims surrounding whitespace in one pass.
+
+StreamSanitizer does the same incrementally: feed() returns everything that
+cannot be the start of a leaked tag right away, holding back only a possible
+partial tag, an unfinished JSON body, or trailing whitespace.
+"""
+
+import re
+
+# Precompiled patterns
+_OPEN_TAG = re.compile(r"<function=(\w+)>")
+_CLOSE_TAG = "</function>"
+_OPEN_PREFIX = "<function="
+_NEWLINES = re.compile(r"\n{3,}")
+
+MAX_HELD_TAG = 80        # longest partial "<function=name" we wait on
+MAX_BODY_CHARS = 4096    # unbalanced JSON longer than this is treated as text
+
+# Scanner states
+_TEXT, _AFTER_TAG, _BODY = range(3)
+
+
+def _could_be_tag(fragment: str) -> bool:
+    """True if fragment (starting with '<') may still grow into a tag."""
+    if len(fragment) > MAX_HELD_TAG:
+        return False
+    if _CLOSE_TAG.startswith(fragment) or _OPEN_PREFIX.startswith(fragment):
+        return True
+    return fragment.startswith(_OPEN_PREFIX) and fragment[len(_OPEN_PREFIX):].replace("_", "a").isalnum()
+
+
+class StreamSanitizer:
+    """
+    Incremental response sanitizer.
+
+    Usage:
+        sanitizer = StreamSanitizer()
+        for chunk in stream:
+            yield sanitizer.feed(chunk)
+        yield sanitizer.flush()
+    """
+
+    __slots__ = ("_held", "_pending_ws", "_started", "_state", "_body", "_depth", "_in_string", "_escape")
+
+    def __init__(self):
+        self._held = ""          # possible partial tag from the previous chunk
+        self._pending_ws = ""    # trailing whitespace not yet emitted
+        self._started = False    # any non-whitespace emitted yet
+        self._state = _TEXT
+        self._body = []          # JSON body of a leaked call, until it closes
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def _emit(self, text: str, out: list):
+        if not text:
+            return
+        combined = self._pending_ws + text
+        core = combined.rstrip()
+        self._pending_ws = combined[len(core):]
+        if not core:
+            return
+        if not self._started:
+            core = core.lstrip()
+            self._started = True
+        out.append(_NEWLINES.sub("\n\n", core) if "\n\n\n" in core else core)
+
+    def _consume_body(self, data: str, pos: int) -> int:
+        """Scan a JSON body from pos; returns the index after it, or -1 if it continues."""
+        depth, in_string, escape = self._depth, self._in_string, self._escape
+        end = len(data)
+        i = pos
+        while i < end:
+            ch = data[i]
+            i += 1
+            if in_string:
+                if escape:
+                    escape = False
+                elif ch == "\\":
+                    escape = True
+                elif ch == '"':
+                    in_string = False
+            elif ch == '"':
+                in_string = True
+            elif ch == "{":
+                depth += 1
+            elif ch == "}":
+                depth -= 1
+                if depth == 0:
+                    self._body.clear()
+                    self._depth, self._in_string, self._escape = 0, False, False
+                    return i
+        self._body.append(data[pos:])
+        self._depth, self._in_string, self._escape = depth, in_string, escape
+        return -1
+
+    def _release_body(self) -> str:
+        body = "".join(self._body)
+        self._body.clear()
+        self._depth, self._in_string, self._escape = 0, False, False
+        self._state = _TEXT
+        return body
+
+    def feed(self, chunk: str) -> str:
+        """Process a chunk and return the text that is safe to emit now."""
+        data = self._held + chunk if self._held else chunk
+        self._held = ""
+        out = []
+        pos = 0
+        end = len(data)
+
+        while pos < end:
+            if self._state == _BODY:
+                next_pos = self._consume_body(data, pos)
+                if next_pos == -1:
+                    if sum(map(len, self._body)) > MAX_BODY_CHARS:
+                        # Not a leaked call after all: rescan it as text
+                        out.append(self.feed(self._release_body()))
+                    return "".join(out)
+                self._state = _TEXT
+                pos = next_pos
+                continue
+
+            if self._state == _AFTER_TAG:
+                if data[pos] == "{":
+                    self._state = _BODY
+                else:
+                    self._state = _TEXT
+                continue
+
+            lt = data.find("<", pos)
+            if lt == -1:
+                self._emit(data[pos:], out)
+                break
+            self._emit(data[pos:lt], out)
+
+            match = _OPEN_TAG.match(data, lt)
+            if match:
+                pos = match.end()
+                self._state = _AFTER_TAG
+                continue
+            if data.startswith(_CLOSE_TAG, lt):
+                pos = lt + len(_CLOSE_TAG)
+                continue
+            if _could_be_tag(data[lt:]):
+                self._held = data[lt:]
+                break
+            self._emit("<", out)
+            pos = lt + 1
+
+        return "".join(out)
+
+    def flush(self) -> str:
+        """Finish the stream and return any remaining safe text."""
+        out = []
+        while self._state == _BODY and self._body:
+            # Unterminated JSON is kept as text, but leaks inside it are still removed
+            out.append(self.feed(self._release_body()))
+        if self._held:
+            # A partial tag that never completed is ordinary text
+            self._emit(self._held, out)
+        self.__init__()
+        return "".join(out)
+
+
+def sanitize(text: str) -> str:
+    """Remove leaked function-call text from a complete response."""
+    if not text:
+        return ""
+    sanitizer = StreamSanitizer()
+    return sanitizer.feed(text) + sanitizer.flush()
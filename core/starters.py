@@ -0,0 +1,115 @@
+"""
+Starter Questions - canned questions the widget offers, with cacheable answers.
+
+The starters are the reviewed questions (REVIEWED_ANSWERS_PATH) followed
+by the FAQ of rag/cache_warmer.py, the first STARTER_QUESTION_COUNT of
+them. Their answers come from chat() like any other question, so they are
+usually warm response cache hits, and are then kept in memory per tenant
+together with a validator.
+
+A starter's answer only changes when the knowledge base does. The
+validator is therefore the live collection version (rag/vector_store.py
+aliases, a cheap file stat), and a repeat request, or a conditional one
+from a browser or CDN, is answered without retrieval, the response
+cache or the LLM. Answers cut short by the request budget are returned
+but not kept.
+
+Usage:
+    questions, etag = starter_questions()
+    answer = cached_starter(question) or answer_starter(question)
+"""
+
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from core.budget import RequestBudget
+from core.chat import chat
+from rag.cache_warmer import FAQ_QUESTIONS, load_reviewed_answers
+from rag.vector_store import resolve_collection
+from storage.tenants import get_tenant
+from utils.http_cache import make_etag
+from utils.metrics import STARTER_ANSWERS
+
+STARTER_QUESTION_COUNT = int(os.getenv("STARTER_QUESTION_COUNT", "4"))
+
+_lock = threading.Lock()
+_questions: Dict[str, Tuple[str, List[str], str]] = {}    # tenant ID -> (version, questions, etag)
+_answers: Dict[Tuple[str, str], Tuple[str, str, str]] = {}  # (tenant ID, question) -> (version, answer, etag)
+
+
+def _normalize(question: str) -> str:
+    return " ".join(question.lower().split())
+
+
+def _version() -> Tuple[str, str]:
+    tenant = get_tenant()
+    return tenant.tenant_id, resolve_collection(tenant.collection_name)
+
+
+def starter_questions() -> Tuple[List[str], str]:
+    """
+    The current tenant's starter questions.
+
+    Returns:
+        (questions, ETag)
+    """
+    tenant_id, version = _version()
+    cached = _questions.get(tenant_id)
+    if cached and cached[0] == version:
+        return cached[1], cached[2]
+
+    questions, seen = [], set()
+    for question in list(load_reviewed_answers()) + FAQ_QUESTIONS:
+        if _normalize(question) not in seen:
+            seen.add(_normalize(question))
+            questions.append(question)
+    questions = questions[:STARTER_QUESTION_COUNT]
+    etag = make_etag(tenant_id, version, *questions)
+    with _lock:
+        _questions[tenant_id] = (version, questions, etag)
+    return questions, etag
+
+
+def find_starter(question: str) -> Optional[str]:
+    """The starter question matching the text (case and spacing ignored), or None."""
+    wanted = _normalize(question)
+    return next((q for q in starter_questions()[0] if _normalize(q) == wanted), None)
+
+
+def cached_starter(question: str) -> Optional[Tuple[str, str]]:
+    """
+    A starter's kept answer, if it is still valid for the live index.
+
+    Returns:
+        (answer, ETag), or None if answer_starter() has to run
+    """
+    tenant_id, version = _version()
+    cached = _answers.get((tenant_id, question))
+    if cached and cached[0] == version:
+        STARTER_ANSWERS.labels("memory").inc()
+        return cached[1], cached[2]
+    return None
+
+
+def answer_starter(question: str) -> Tuple[str, Optional[str]]:
+    """
+    Answer a starter question with chat() and keep the answer.
+
+    Raises:
+        Overloaded: if the answer isn't cached and no LLM slot frees up in time
+
+    Returns:
+        (answer, ETag); the ETag is None for a fallback answer that must not be cached
+    """
+    tenant_id, version = _version()
+    budget = RequestBudget()
+    answer = chat(question, [], budget)
+    if budget.exhausted_reason:
+        STARTER_ANSWERS.labels("fallback").inc()
+        return answer, None
+    STARTER_ANSWERS.labels("chat").inc()
+    etag = make_etag(tenant_id, version, question, answer)
+    with _lock:
+        _answers[(tenant_id, question)] = (version, answer, etag)
+    return answer, etag
@@ -4,17 +4,22 @@ Replaces notebook cells 4-14.
 """
 
 import json
+import logging
 import requests
 from config import PUSHOVER_USER, PUSHOVER_TOKEN, PUSHOVER_URL
 from storage.database import add_lead, add_knowledge_gap
+from utils.metrics import span, TOOL_CALLS
+from utils.log import get_logger, log_event
+
+logger = get_logger(__name__)
 
 
 # Cell 4: Push notification function
 def push(message):
     """Send a push notification via Pushover."""
-    print(f"Push: {message}")
+    log_event(logger, logging.INFO, "push", message=message)
     if not PUSHOVER_USER or not PUSHOVER_TOKEN:
-        print("Pushover not configured, skipping notification")
+        logger.debug("Pushover not configured, skipping notification")
         return
     
     payload = {
@@ -25,7 +30,7 @@ def push(message):
     try:
         requests.post(PUSHOVER_URL, data=payload, timeout=2)
     except Exception as e:
-        print(f"Push notification failed: {e}")
+        logger.warning("Push notification failed: %s", e)
 
 
 # Record user details
@@ -96,6 +101,7 @@ tools = [
     {"type": "function", "function": record_user_details_json},
     {"type": "function", "function": record_unknown_question_json}
 ]
+TOOL_NAMES = {tool["function"]["name"] for tool in tools}
 
 
 # Handle tool calls (using globals() like the notebook)
@@ -105,11 +111,15 @@ def handle_tool_calls(tool_calls):
     for tool_call in tool_calls:
         tool_name = tool_call.function.name
         arguments = json.loads(tool_call.function.arguments)
-        print(f"Tool called: {tool_name}", flush=True)
+        log_event(logger, logging.INFO, "tool_called", tool=tool_name)
         
-        # Use globals() to find the function    
-        tool = globals().get(tool_name)
-        result = tool(**arguments) if tool else {}
+        # Use globals() to find the function; the name comes from the model,
+        # so only offered tools run and other names share one metric label
+        known = tool_name in TOOL_NAMES
+        tool = globals().get(tool_name) if known else None
+        TOOL_CALLS.labels(tool_name if known else "unknown").inc()
+        with span("tool_call"):
+            result = tool(**arguments) if tool else {}
         
         results.append({
             "role": "tool",
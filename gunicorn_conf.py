@@ -0,0 +1,64 @@
+"""
+Gunicorn configuration - multi-worker deployment of the widget API.
+
+Usage: gunicorn -c gunicorn_conf.py api_server:app
+       WEB_CONCURRENCY=8 gunicorn -c gunicorn_conf.py api_server:app
+       gunicorn -c gunicorn_conf.py server:app      # with the Gradio UI (sticky sessions)
+
+The master indexes the knowledge base once (in a subprocess, before any
+worker forks) and then starts workers with VECTOR_STORE_READ_ONLY=1, so
+Chroma has a single writer. That writer is then the hot-reload watcher
+(python -m rag.hot_reload), which the master runs alongside the workers and
+stops on exit. The response cache is warmed in the background by
+python -m rag.cache_warmer, so workers listen as soon as the index exists
+rather than after the warm-up's LLM calls. SQLite (leads) and DiskCache
+(responses) are shared by all workers in WAL mode.
+"""
+
+import multiprocessing
+import os
+import subprocess
+import sys
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Each worker loads its own embedding model and Chroma client after fork;
+# preloading would share SQLite handles and threads across the fork.
+preload_app = False
+
+timeout = int(os.getenv("WORKER_TIMEOUT", "60"))
+graceful_timeout = 30
+keepalive = 5
+
+# Proxies whose X-Forwarded-For is trusted for the client address (rate limits key on it)
+forwarded_allow_ips = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
+
+
+# Hot-reload watcher process, started by the master (same switch as rag/hot_reload.py;
+# not imported, so the master doesn't load Chroma before forking)
+HOT_RELOAD = os.getenv("HOT_RELOAD", "1") == "1"
+_watcher = []
+_warmer = []
+
+
+def on_starting(server):
+    """Index the knowledge base once, as the only Chroma writer, then warm the cache in the background."""
+    server.log.info("Indexing knowledge base (if empty) before starting workers")
+    subprocess.run([sys.executable, "-m", "rag.knowledge_indexer", "--if-empty", "--no-warm"], check=False)
+    server.log.info("Warming the response cache in the background")
+    _warmer.append(subprocess.Popen([sys.executable, "-m", "rag.cache_warmer"], start_new_session=True,
+                                    env=dict(os.environ, VECTOR_STORE_READ_ONLY="1")))
+    if HOT_RELOAD:
+        server.log.info("Starting knowledge hot-reload watcher")
+        _watcher.append(subprocess.Popen([sys.executable, "-m", "rag.hot_reload"]))
+    os.environ["VECTOR_STORE_READ_ONLY"] = "1"
+
+
+def on_exit(server):
+    """Stop the hot-reload watcher, and the cache warmer if it is still running, with the master."""
+    for process in _watcher + _warmer:
+        if process.poll() is None:
+            process.terminate()
+            process.wait(timeout=30)
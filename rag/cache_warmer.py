@@ -0,0 +1,222 @@
+"""
+Cache Warmer - pre-populates the response cache after indexing.
+Answers a FAQ list plus the most frequent past questions so the first
+visitors after a deploy get cached answers instead of waiting on the LLM.
+
+Answers come from a reviewed answers file when one exists, otherwise they
+are generated once with the normal prompt (without tools, so warming never
+records leads or knowledge gaps). Entries are tagged with the index version
+and questions already cached for their current chunks are skipped, so
+re-running the warmer after an unchanged deploy makes no LLM calls.
+Warms the current tenant's cache (storage/tenants.py).
+
+Usage: python -m rag.cache_warmer
+       python -m rag.cache_warmer --dry-run
+       python -m rag.cache_warmer --tenant acme
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from config import openai_client, MODEL
+from core.admission import llm_gate, LLM_BACKGROUND_TIMEOUT_SECONDS, PRIORITY_LOW
+from core.chat import build_messages, clean_response
+from rag.retriever import retreive_context
+from rag.vector_store import get_index_version
+from storage.cache import CACHE_SIZE_LIMIT, get_cached_response, set_cached_response, set_index_version
+from storage.database import get_top_queries
+from storage.tenants import get_tenant, tenant_context
+from utils.log import get_logger
+from utils.metrics import record_usage
+
+# Warming configuration
+CACHE_WARM_MAX_ENTRIES = int(os.getenv("CACHE_WARM_MAX_ENTRIES", "100"))
+CACHE_WARM_MEMORY_FRACTION = float(os.getenv("CACHE_WARM_MEMORY_FRACTION", "0.01"))  # of available RAM
+CACHE_WARM_TOP_QUERIES = 50            # past questions considered from analytics
+REVIEWED_ANSWERS_PATH = os.getenv("REVIEWED_ANSWERS_PATH", "data/reviewed_answers.json")
+ENTRY_OVERHEAD_BYTES = 512             # key, pickling and metadata per cache entry
+
+# Questions most widget visitors ask
+FAQ_QUESTIONS = [
+    "What is your experience?",
+    "Tell me about your skills",
+    "What projects have you worked on?",
+    "What is your educational background?",
+    "What technologies do you work with?",
+    "Where do you currently work?",
+    "Are you open to new opportunities?",
+    "How can I contact you?",
+]
+
+logger = get_logger(__name__)
+
+
+def _available_memory_bytes() -> Optional[int]:
+    """Memory available to new allocations, or None if it can't be read."""
+    try:
+        with open("/proc/meminfo") as meminfo:
+            for line in meminfo:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def warm_budget_bytes() -> int:
+    """
+    Bytes the warm set may take: a fraction of available memory, and never
+    more than half the cache so warming cannot evict live traffic.
+    """
+    budget = CACHE_SIZE_LIMIT // 2
+    available = _available_memory_bytes()
+    if available is not None:
+        budget = min(budget, int(available * CACHE_WARM_MEMORY_FRACTION))
+    return budget
+
+
+def load_reviewed_answers(path: str = REVIEWED_ANSWERS_PATH) -> Dict[str, str]:
+    """
+    Load reviewed answers: a JSON list of {"question", "answer"} objects.
+
+    Returns:
+        Dict of normalized question -> answer (empty if the file doesn't exist)
+    """
+    answers_path = Path(path)
+    if not answers_path.exists():
+        return {}
+    with open(answers_path, "r", encoding="utf-8") as f:
+        entries = json.load(f)
+    return {entry["question"].lower().strip(): entry["answer"] for entry in entries}
+
+
+def collect_questions(max_entries: int = CACHE_WARM_MAX_ENTRIES) -> List[Dict]:
+    """
+    Build the warm set: reviewed answers and FAQ first, then popular past questions.
+
+    Returns:
+        List of {"question", "source"} dicts without duplicates
+    """
+    questions = []
+    seen = set()
+
+    def add(question: str, source: str):
+        key = question.lower().strip()
+        if key and key not in seen:
+            seen.add(key)
+            questions.append({"question": question, "source": source})
+
+    for question in load_reviewed_answers():
+        add(question, "reviewed")
+    for question in FAQ_QUESTIONS:
+        add(question, "faq")
+    try:
+        for row in get_top_queries(limit=CACHE_WARM_TOP_QUERIES):
+            add(row["query"], "analytics")
+    except Exception as e:
+        logger.warning("Could not load top queries for warming: %s", e)
+
+    return questions[:max_entries]
+
+
+def generate_answer(question: str, context: str) -> str:
+    """Answer a question with the normal prompt, without tools (behind visitors in the LLM gate)."""
+    with llm_gate.slot(PRIORITY_LOW, timeout=LLM_BACKGROUND_TIMEOUT_SECONDS):
+        response = openai_client.chat.completions.create(
+            model=MODEL,
+            messages=build_messages(context, [], question),
+        )
+    record_usage(response.usage)
+    return clean_response(response.choices[0].message.content)
+
+
+def warm_cache(dry_run: bool = False) -> Dict:
+    """
+    Populate the response cache for the warm set.
+
+    Args:
+        dry_run: Only report what would be warmed
+
+    Returns:
+        Dict with counts of warmed, already cached, failed and skipped questions
+    """
+    collection_name = get_tenant().collection_name
+    index_version = get_index_version(collection_name)
+    set_index_version(index_version)
+    reviewed = load_reviewed_answers()
+    budget = warm_budget_bytes()
+    used = 0
+    stats = {"index_version": index_version, "warmed": 0, "already_cached": 0,
+             "failed": 0, "over_budget": 0, "bytes": 0}
+
+    for item in collect_questions():
+        question = item["question"]
+        retrieval = retreive_context(question, top_k=3, collection_name=collection_name)
+        context = retrieval["formatted_context"]
+
+        cached = get_cached_response(question, retrieval["chunk_versions"], record=False)
+        if cached:
+            stats["already_cached"] += 1
+            used += len(question) + len(cached["response"]) + ENTRY_OVERHEAD_BYTES
+            continue
+
+        if dry_run:
+            print(f"   📝 [{item['source']}] {question}")
+            continue
+
+        # Even an empty answer wouldn't fit: stop before paying for an LLM call
+        if used + len(question.encode()) + ENTRY_OVERHEAD_BYTES > budget:
+            stats["over_budget"] += 1
+            break
+
+        try:
+            answer = reviewed.get(question.lower().strip()) or generate_answer(question, context)
+        except Exception as e:
+            logger.warning("Failed to warm %r: %s", question, e)
+            stats["failed"] += 1
+            continue
+
+        entry_bytes = len(question.encode()) + len(answer.encode()) + ENTRY_OVERHEAD_BYTES
+        if used + entry_bytes > budget:
+            stats["over_budget"] += 1
+            break
+        used += entry_bytes
+
+        set_cached_response(question, retrieval["chunk_versions"], answer, metadata={
+            "warmed": True,
+            "source": item["source"],
+            "index_version": index_version,
+        })
+        stats["warmed"] += 1
+
+    stats["bytes"] = used
+    logger.info("Cache warming finished: %s", stats)
+    return stats
+
+
+if __name__ == "__main__":
+    import sys
+
+    print("=" * 60)
+    print("Cache Warmer")
+    print("=" * 60)
+
+    dry_run = "--dry-run" in sys.argv
+    tenant_id = sys.argv[sys.argv.index("--tenant") + 1] if "--tenant" in sys.argv else None
+    print(f"💾 Warm budget: {warm_budget_bytes() / 1024:.0f} KB, max {CACHE_WARM_MAX_ENTRIES} entries")
+    with tenant_context(tenant_id):
+        stats = warm_cache(dry_run=dry_run)
+
+    print(f"\n🔖 Index version: {stats['index_version']}")
+    print(f"   🔥 Warmed: {stats['warmed']}")
+    print(f"   ✅ Already cached: {stats['already_cached']}")
+    if stats["failed"]:
+        print(f"   ❌ Failed: {stats['failed']}")
+    if stats["over_budget"]:
+        print(f"   ⚠️  Stopped at memory budget ({stats['bytes'] / 1024:.0f} KB)")
+    print("\n✅ Cache warming complete!")
@@ -0,0 +1,450 @@
+"""
+Chunker - sentence- and section-aware chunking sized in tokens.
+
+Text is split into segments (sentences, lines and resume bullets), each
+segment is counted in tokens, and consecutive segments are packed into
+chunks of at most max_tokens. Chunks never cross a section heading
+(Experience, Skills, Education, ...) and carry the section as metadata.
+Consecutive chunks overlap by whole segments, up to overlap_tokens.
+
+Everything works on character offsets into the original text: chunk text is
+sliced once per chunk, so chunking is linear in the input size. With numpy,
+the document's token offsets are found in one pass over its characters;
+segment bounds, token counts and heading candidates are then searches in
+those offsets rather than further passes over the text. Tokenizing every
+character still makes this several times slower than a fixed-size splitter.
+
+Usage:
+    from rag.chunker import chunk_document
+    for chunk in chunk_document(text):
+        chunk["text"], chunk["section"], chunk["tokens"]
+"""
+
+import os
+import re
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+from itertools import accumulate
+from typing import Dict, List, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pure-Python path below
+    np = None
+
+# Chunking configuration (MiniLM embeds at most 256 word pieces)
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "128"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "16"))
+
+# Section headings as they appear on their own line in resumes and profiles
+SECTION_HEADINGS = {
+    "summary": ["summary", "about", "about me", "profile", "professional summary", "objective"],
+    "experience": ["experience", "work experience", "professional experience", "employment",
+                   "employment history", "work history"],
+    "skills": ["skills", "technical skills", "top skills", "core skills", "key skills", "core competencies"],
+    "education": ["education", "academic background", "education and training"],
+    "projects": ["project", "projects", "personal projects", "selected projects"],
+    "certifications": ["certifications", "certificates", "licenses & certifications", "licenses and certifications"],
+    "publications": ["publications", "research"],
+    "awards": ["awards", "honors", "honors & awards", "achievements"],
+    "contact": ["contact", "contact information"],
+}
+DEFAULT_SECTION = "general"
+
+_HEADING_LOOKUP = {heading: section for section, headings in SECTION_HEADINGS.items() for heading in headings}
+
+# Precompiled patterns
+_TOKEN = re.compile(r"\w+|[^\w\s]")   # word or single punctuation mark
+_HEADING_CHARS = re.compile(r"^[#\s]*(.*?)[\s:]*$")
+# A heading alone on its line (optional markdown '#' and trailing ':')
+_HEADING_LINE = re.compile(
+    r"^(?:[^\S\n]|#)*(?:" + "|".join(sorted(map(re.escape, _HEADING_LOOKUP), key=len, reverse=True))
+    + r")(?:[^\S\n]|:)*$",
+    re.MULTILINE | re.IGNORECASE,
+)
+# What _HEADING_LINE allows around a heading: \s (every str.isspace()
+# character, the last being U+3000) with '#' before it and ':' after it
+_SPACES = "".join(c for c in map(chr, range(0x3001)) if c.isspace())
+_HEADING_LEAD, _HEADING_TRAIL = _SPACES + "#", _SPACES + ":"
+_HEADING_OFFSETS = {heading: [m.start() for m in _TOKEN.finditer(heading)] for heading in _HEADING_LOOKUP}
+_MAX_HEADING_TOKENS = max(len(offsets) for offsets in _HEADING_OFFSETS.values())
+# Segment boundaries: line break, bullet, or sentence end followed by whitespace
+_BOUNDARY = re.compile(r"[\n•]|[.!?]\s")
+
+
+def _heading_shape(initial, count, second, third):
+    """
+    Shape of a line's tokens other than '#' and ':': first character, token
+    count, and where the second and third tokens start relative to the first.
+    Works on ints and numpy arrays alike.
+    """
+    return ((initial * 8 + count) * 64 + second) * 64 + third
+
+
+# A line without a heading's shape is never a heading. Initials are lowercased
+# with | 0x20; non-ASCII first letters may case-fold to ASCII ones, so 0x80
+# (the code of every non-ASCII character, see _classify) stands in for them
+_HEADING_SHAPES = sorted({
+    _heading_shape(initial | 0x20, len(offsets), (offsets + [0, 0])[1], (offsets + [0, 0])[2])
+    for heading, offsets in _HEADING_OFFSETS.items()
+    for initial in (ord(heading[0]), 0x80)
+})
+
+
+def heading_section(line: str) -> str:
+    """Return the section a heading line starts, or "" if it isn't a heading."""
+    if len(line) > 40:
+        return ""
+    match = _HEADING_CHARS.match(line)
+    return _HEADING_LOOKUP.get(match.group(1).lower(), "")
+
+
+def count_tokens(text: str) -> int:
+    """Tokens in text, counted the same way chunk sizes are."""
+    return len(_token_starts(text))
+
+
+def _segments(text: str) -> Tuple[List[int], List[int]]:
+    """Split text into segments (lines, sentences, bullets) with whitespace trimmed."""
+    starts, ends = [], []
+
+    def add(start: int, end: int):
+        segment = text[start:end]
+        stripped = segment.strip()
+        if stripped:
+            start += len(segment) - len(segment.lstrip())
+            starts.append(start)
+            ends.append(start + len(stripped))
+
+    position = 0
+    for match in _BOUNDARY.finditer(text):
+        boundary = match.start()
+        char = text[boundary]
+        if char == "\n":
+            add(position, boundary)
+            position = boundary + 1
+        elif char == "•":
+            add(position, boundary)  # the bullet starts the next segment
+            position = boundary
+        else:
+            add(position, boundary + 1)  # keep the sentence-ending punctuation
+            position = boundary + 1
+    add(position, len(text))
+    return starts, ends
+
+
+def _classify(text: str):
+    """
+    Character classes for the numpy paths, as _TOKEN and _BOUNDARY see them.
+
+    Returns:
+        (codes, is_word, is_space, newlines, bullets): codes are uint8 code
+        points with every non-ASCII character replaced by 0x80, so comparing
+        against ASCII punctuation never matches a wider character
+    """
+    if text.isascii():
+        codes = np.frombuffer(text.encode("ascii"), dtype=np.uint8)
+        wide = None
+    else:
+        # UTF-16 is half the size of UTF-32 and one unit per character unless
+        # the text has characters outside the Basic Multilingual Plane
+        encoded = text.encode("utf-16-le")
+        if len(encoded) == 2 * len(text):
+            codepoints = np.frombuffer(encoded, dtype=np.uint16)
+        else:
+            codepoints = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+        wide = np.flatnonzero(codepoints > 127)
+        codes = codepoints.astype(np.uint8)
+        codes[wide] = 0x80
+    # ASCII classes from range checks (wrapping uint8 subtraction), reusing
+    # two scratch arrays: a table lookup per character costs far more
+    scratch = np.subtract(codes, 48)
+    is_word = scratch < 10                                  # 0-9
+    mask = np.empty_like(is_word)
+    np.bitwise_or(codes, 0x20, out=scratch)
+    scratch -= 97
+    is_word |= np.less(scratch, 26, out=mask)               # A-Z, a-z
+    is_word |= np.equal(codes, 95, out=mask)                # _
+    np.subtract(codes, 9, out=scratch)
+    is_space = scratch < 5                                  # \t \n \v \f \r
+    np.subtract(codes, 28, out=scratch)
+    is_space |= np.less(scratch, 5, out=mask)               # \x1c-\x1f, space
+    newlines = np.flatnonzero(np.equal(codes, 10, out=mask))
+    if wide is None or not wide.size:
+        return codes, is_word, is_space, newlines, np.empty(0, dtype=np.intp)
+    wide_codepoints = codepoints[wide]
+    if codepoints.dtype == np.uint16:
+        bmp_word, bmp_space = _bmp_tables()
+        is_word[wide] = bmp_word[wide_codepoints]
+        is_space[wide] = bmp_space[wide_codepoints]
+    else:
+        # Outside the Basic Multilingual Plane: once per distinct code point
+        unique, inverse = np.unique(wide_codepoints, return_inverse=True)
+        chars = [chr(c) for c in unique.tolist()]
+        is_word[wide] = np.array([c.isalnum() or c == "_" for c in chars], dtype=bool)[inverse]
+        is_space[wide] = np.array([c.isspace() for c in chars], dtype=bool)[inverse]
+    return codes, is_word, is_space, newlines, wide[wide_codepoints == ord("•")]
+
+
+@lru_cache(maxsize=1)
+def _bmp_tables():
+    """\\w and \\s lookup tables for every code point below U+10000 (built on first non-ASCII text)."""
+    chars = [chr(c) for c in range(0x10000)]
+    return (np.array([c.isalnum() or c == "_" for c in chars], dtype=bool),
+            np.array([c.isspace() for c in chars], dtype=bool))
+
+
+def _token_starts(text: str, classes=None):
+    """Offsets where each token starts, vectorized when numpy is available."""
+    if np is None or not text:
+        return [m.start() for m in _TOKEN.finditer(text)]
+    _, is_word, is_space, _, _ = classes if classes is not None else _classify(text)
+    # A token starts at every non-space character that doesn't continue a word
+    starts = ~is_space
+    continues = is_word[1:] & is_word[:-1]
+    starts[1:] &= np.logical_not(continues, out=continues)
+    return np.flatnonzero(starts)
+
+
+def _segments_vectorized(text: str, classes, token_starts, max_tokens: int):
+    """
+    _segments() plus per-segment token counts, from one pass over the token offsets.
+
+    Every boundary cuts the text at one offset: a newline (dropped as
+    whitespace), a bullet (which starts the next segment) or the whitespace
+    after sentence-ending punctuation. Punctuation is a token of its own, so
+    sentence ends are found among the token starts rather than the characters.
+    A segment's first non-space character always starts a token, so searching
+    the cuts in token_starts gives trimmed starts and token counts together.
+    Segments longer than max_tokens are cut as in _split_long_segments().
+
+    Returns:
+        (starts, ends, counts) as numpy arrays
+    """
+    codes, _, is_space, newlines, bullets = classes
+    length = len(codes)
+    marks = codes[token_starts]
+    punctuation = token_starts[(marks == 46) | (marks == 33) | (marks == 63)]   # . ! ?
+    punctuation = punctuation[punctuation + 1 < length]
+    sentence_cuts = punctuation[is_space[punctuation + 1]] + 1
+    bounds = np.concatenate(([0], np.sort(np.concatenate((newlines, bullets, sentence_cuts))), [length]))
+    # Tokens before each bound: segment i holds tokens tokens[i] to tokens[i + 1] - 1
+    tokens = np.searchsorted(token_starts, bounds)
+    counts = np.diff(tokens)
+    keep = np.flatnonzero(counts)
+    first_tokens, ends, counts = tokens[keep], bounds[keep + 1], counts[keep]
+    if counts.max(initial=0) > max_tokens:
+        # One piece per max_tokens tokens; all but the last end where the next starts
+        pieces = (counts + max_tokens - 1) // max_tokens
+        segment = np.repeat(np.arange(len(counts)), pieces)
+        offset = (np.arange(len(segment)) - np.repeat(np.cumsum(pieces) - pieces, pieces)) * max_tokens
+        first_tokens = first_tokens[segment] + offset
+        following = token_starts[np.minimum(first_tokens + max_tokens, len(token_starts) - 1)]
+        ends = np.where(offset + max_tokens < counts[segment], following, ends[segment])
+        counts = np.minimum(counts[segment] - offset, max_tokens)
+    starts = token_starts[first_tokens]
+    _trim_ends(text, is_space, starts, ends)
+    return starts, ends, counts
+
+
+def _trim_ends(text: str, is_space, starts, ends):
+    """Move ends back past trailing whitespace, in place (each range has a non-space character)."""
+    # Usually there's none: step back a character at a time a few times, then
+    # strip whatever long runs remain one range at a time
+    trailing = np.flatnonzero(is_space[ends - 1])
+    for _ in range(8):
+        if not trailing.size:
+            return
+        ends[trailing] -= 1
+        trailing = trailing[is_space[ends[trailing] - 1]]
+    for i in trailing.tolist():
+        ends[i] = starts[i] + len(text[starts[i]:ends[i]].rstrip())
+
+
+def _headings(text: str, classes=None, token_starts=None):
+    """
+    Heading lines as (offset, section, heading): the lines _HEADING_LINE matches.
+
+    With numpy, only lines shaped like a heading are checked, and ASCII lines
+    are looked up directly instead of going through the regex.
+    """
+    if classes is None:
+        lines = ((match.start(), match.group()) for match in _HEADING_LINE.finditer(text))
+    else:
+        lines = _heading_candidates(text, classes, token_starts)
+    for start, line in lines:
+        name = line.lstrip(_HEADING_LEAD).rstrip(_HEADING_TRAIL).lower()
+        if classes is None or name in _HEADING_LOOKUP or (not name.isascii() and _HEADING_LINE.match(line)):
+            yield start, _HEADING_LOOKUP[name], line.strip()
+
+
+def _heading_candidates(text: str, classes, token_starts):
+    """(offset, line) for the lines whose tokens are shaped like a heading's."""
+    codes, _, _, newlines, _ = classes
+    bounds = np.concatenate(([0], newlines + 1))
+    marks = codes[token_starts]
+    words = token_starts[(marks != 35) & (marks != 58)]   # all but '#' and ':'
+    # Tokens before each line start: line i holds words[tokens[i]:tokens[i + 1]]
+    tokens = np.searchsorted(words, np.append(bounds, len(text)))
+    counts = np.diff(tokens)
+    lines = np.flatnonzero((counts > 0) & (counts <= _MAX_HEADING_TOKENS))
+    counts, tokens = counts[lines], tokens[lines]
+    first = words[tokens]
+    later = [np.where(counts > i, np.minimum(words[np.minimum(tokens + i, len(words) - 1)] - first, 63), 0)
+             for i in (1, 2)]
+    shapes = _heading_shape((codes[first] | 0x20).astype(np.intp), counts, *later)
+    lines = lines[np.isin(shapes, _HEADING_SHAPES)]
+    line_ends = np.append(newlines, len(text))
+    for start, end in zip(bounds[lines].tolist(), line_ends[lines].tolist()):
+        yield start, text[start:end]
+
+
+def _count_between(token_starts, starts, ends) -> List[int]:
+    """Tokens starting within each [start, end) range."""
+    return [bisect_left(token_starts, end) - bisect_left(token_starts, start) for start, end in zip(starts, ends)]
+
+
+def _split_long_segments(text, token_starts, starts, ends, counts, max_tokens):
+    """Cut segments longer than max_tokens at token boundaries."""
+    if max(counts, default=0) <= max_tokens:
+        return starts, ends, counts
+    new_starts, new_ends, new_counts = [], [], []
+    for start, end, count in zip(starts, ends, counts):
+        if count <= max_tokens:
+            new_starts.append(start)
+            new_ends.append(end)
+            new_counts.append(count)
+            continue
+        first_token = bisect_left(token_starts, start)
+        for i in range(0, count, max_tokens):
+            piece_start = token_starts[first_token + i]
+            piece_end = token_starts[first_token + i + max_tokens] if i + max_tokens < count else end
+            while piece_end > piece_start and text[piece_end - 1].isspace():
+                piece_end -= 1
+            new_starts.append(piece_start)
+            new_ends.append(piece_end)
+            new_counts.append(min(max_tokens, count - i))
+    return new_starts, new_ends, new_counts
+
+
+def _packing_steps(cumulative, section_bounds, max_tokens, overlap_tokens) -> Tuple[List[int], List[int]]:
+    """
+    For a chunk starting at each segment: where it ends and where the next chunk starts.
+
+    Args:
+        cumulative: cumulative[i] = tokens in segments before i (one entry per segment, plus the total)
+        section_bounds: First segment of each section, then the number of segments
+
+    Returns:
+        (last, following): the chunk starting at segment i holds segments
+        i..last[i]-1 and the next chunk starts at following[i], which is the
+        section's end once a chunk reaches it
+    """
+    if np is not None:
+        cumulative = np.asarray(cumulative)
+        first = np.arange(len(cumulative) - 1)
+        section_ends = np.repeat(section_bounds[1:], np.diff(section_bounds))
+        # Largest last such that segments first..last-1 fit in max_tokens
+        last = np.clip(np.searchsorted(cumulative, cumulative[:-1] + max_tokens, side="right") - 1,
+                       first + 1, section_ends)
+        # Next chunk starts at the earliest segment that keeps the overlap within
+        # overlap_tokens and still leaves room for segment `last`, so it always
+        # extends past this chunk instead of repeating it
+        following = np.maximum(
+            np.searchsorted(cumulative, cumulative[last] - overlap_tokens),
+            np.searchsorted(cumulative, cumulative[np.minimum(last + 1, len(first))] - max_tokens),
+        )
+        following = np.where(last < section_ends, np.clip(following, first + 1, last), last)
+        return last.tolist(), following.tolist()
+    last, following = [], []
+    for section_start, section_end in zip(section_bounds, section_bounds[1:]):
+        for first in range(section_start, section_end):
+            end = max(bisect_right(cumulative, cumulative[first] + max_tokens, first + 1, section_end + 1) - 1,
+                      first + 1)
+            last.append(end)
+            following.append(end if end >= section_end else max(
+                bisect_left(cumulative, cumulative[end] - overlap_tokens, first + 1, end),
+                bisect_left(cumulative, cumulative[end + 1] - max_tokens, first + 1, end),
+            ))
+    return last, following
+
+
+def chunk_document(text: str, max_tokens: int = CHUNK_MAX_TOKENS,
+                   overlap_tokens: int = CHUNK_OVERLAP_TOKENS) -> List[Dict]:
+    """
+    Split a document into token-sized chunks along sentence and section boundaries.
+
+    Args:
+        text: Document text
+        max_tokens: Maximum tokens per chunk
+        overlap_tokens: Maximum tokens repeated from the end of the previous chunk
+
+    Returns:
+        List of dicts with text, section, heading, start, end (offsets into text) and tokens
+    """
+    if max_tokens < 1:
+        raise ValueError("max_tokens must be at least 1")
+    overlap_tokens = max(0, min(overlap_tokens, max_tokens - 1))
+
+    # Segments with their token counts; cumulative[i] = tokens in segments before i
+    if np is not None and text:
+        classes = _classify(text)
+        token_starts = _token_starts(text, classes)
+        starts, ends, counts = _segments_vectorized(text, classes, token_starts, max_tokens)
+        cumulative = np.concatenate(([0], np.cumsum(counts)))
+    else:
+        classes = None
+        starts, ends = _segments(text)
+        token_starts = _token_starts(text)
+        counts = _count_between(token_starts, starts, ends)
+        starts, ends, counts = _split_long_segments(text, token_starts, starts, ends, counts, max_tokens)
+        cumulative = list(accumulate(counts, initial=0))
+    if not len(starts):
+        return []
+
+    # Sections start at heading lines; the heading stays in its section's first chunk
+    sections = [(DEFAULT_SECTION, "")]
+    offsets = []
+    for offset, section, heading in _headings(text, classes, token_starts):
+        sections.append((section, heading))
+        offsets.append(offset)
+    section_bounds = [0] + _positions(starts, offsets) + [len(starts)]
+    last, following = _packing_steps(cumulative, section_bounds, max_tokens, overlap_tokens)
+
+    # Follow the chain of chunks through each section
+    firsts, labels = [], []
+    for section, first, section_end in zip(sections, section_bounds, section_bounds[1:]):
+        count = len(firsts)
+        while first < section_end:
+            firsts.append(first)
+            first = following[first]
+        labels.extend([section] * (len(firsts) - count))
+    lasts = [last[first] for first in firsts]
+
+    return [
+        {
+            "text": text[start:end],
+            "section": section,
+            "heading": heading,
+            "start": start,
+            "end": end,
+            "tokens": after - before,
+        }
+        for start, end, before, after, (section, heading) in zip(
+            _take(starts, firsts), _take(ends, [end - 1 for end in lasts]),
+            _take(cumulative, firsts), _take(cumulative, lasts), labels)
+    ]
+
+
+def _positions(values, targets) -> List[int]:
+    """bisect_left() of each target in sorted values (a list or numpy array)."""
+    if np is not None and isinstance(values, np.ndarray):
+        return np.searchsorted(values, targets).tolist()
+    return [bisect_left(values, target) for target in targets]
+
+
+def _take(values, indices) -> List[int]:
+    """values[i] for each index, as Python ints (values is a list or numpy array)."""
+    if np is not None and isinstance(values, np.ndarray):
+        return values[indices].tolist()
+    return [values[i] for i in indices]
@@ -0,0 +1,137 @@
+"""
+Hot Reload - re-index the knowledge base when its files change.
+
+A background thread polls each tenant's knowledge directory every
+HOT_RELOAD_INTERVAL_SECONDS. When the directory's fingerprint (file names,
+sizes and modification times) differs from the one the live index was built
+from, and has stayed the same for one more poll (so half-copied files aren't
+indexed), the knowledge base is re-indexed with reset=True. That builds a
+new collection version next to the live one and swaps it in atomically, so
+queries keep hitting the old version until the new one is complete.
+
+Only the single Chroma writer runs the watcher: app.py and a single-process
+api_server start it in-process; under gunicorn the master starts
+`python -m rag.hot_reload` alongside the read-only workers.
+
+Usage: python -m rag.hot_reload            # watch until interrupted
+       python -m rag.hot_reload --once     # re-index anything that changed, then exit
+"""
+
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from rag.knowledge_indexer import index_knowledge_base, knowledge_fingerprint
+from rag.vector_store import get_published, get_index_version
+from storage.cache import set_index_version
+from storage.tenants import list_tenants, tenant_context
+from utils.log import get_logger
+from utils.metrics import KNOWLEDGE_RELOADS
+
+logger = get_logger(__name__)
+
+# Watcher settings
+HOT_RELOAD = os.getenv("HOT_RELOAD", "1") == "1"
+HOT_RELOAD_INTERVAL_SECONDS = float(os.getenv("HOT_RELOAD_INTERVAL_SECONDS", "30"))
+
+
+class KnowledgeWatcher:
+    """Polls knowledge directories and swaps in a fresh index when one changes."""
+
+    def __init__(self, interval: float = HOT_RELOAD_INTERVAL_SECONDS, settle: bool = True):
+        self.interval = interval
+        self.settle = settle            # wait for one unchanged poll before re-indexing
+        self._pending: Dict[str, str] = {}   # tenant ID -> fingerprint seen on the last poll
+        self._attempted: Dict[str, str] = {}  # tenant ID -> fingerprint last re-indexed (or failed)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def check(self, tenant_id: str) -> bool:
+        """
+        Re-index one tenant if its knowledge directory changed.
+
+        Returns:
+            True if a new index version was published
+        """
+        with tenant_context(tenant_id) as tenant:
+            if not Path(tenant.knowledge_dir).exists():
+                return False
+            fingerprint = knowledge_fingerprint(tenant.knowledge_dir)
+            published = get_published(tenant.collection_name)
+            if published and published.get("fingerprint") == fingerprint:
+                self._pending.pop(tenant_id, None)
+                return False
+            if self._attempted.get(tenant_id) == fingerprint:
+                return False    # already tried this content; wait for the next change
+            if self.settle and self._pending.get(tenant_id) != fingerprint:
+                self._pending[tenant_id] = fingerprint
+                return False
+            self._pending.pop(tenant_id, None)
+            self._attempted[tenant_id] = fingerprint
+
+            logger.info("Knowledge for tenant %s changed, re-indexing", tenant_id)
+            started = time.perf_counter()
+            try:
+                index_knowledge_base(reset=True)
+                if (get_published(tenant.collection_name) or {}).get("fingerprint") != fingerprint:
+                    raise RuntimeError("no new index version was published (no documents?)")
+                set_index_version(get_index_version(tenant.collection_name))
+            except Exception:
+                KNOWLEDGE_RELOADS.labels("failed").inc()
+                logger.exception("Re-indexing tenant %s failed; still serving the previous version", tenant_id)
+                return False
+            KNOWLEDGE_RELOADS.labels("swapped").inc()
+            logger.info("Tenant %s re-indexed and swapped in %.1fs", tenant_id, time.perf_counter() - started)
+            return True
+
+    def check_all(self) -> int:
+        """Check every tenant; returns the number re-indexed."""
+        return sum(self.check(tenant_id) for tenant_id in list_tenants())
+
+    def run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check_all()
+            except Exception:
+                logger.exception("Knowledge watcher poll failed")
+
+    def start(self) -> "KnowledgeWatcher":
+        """Start polling in a daemon thread."""
+        self._thread = threading.Thread(target=self.run, name="knowledge-watcher", daemon=True)
+        self._thread.start()
+        logger.info("Watching knowledge directories every %.0fs", self.interval)
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+
+def start_watcher() -> Optional[KnowledgeWatcher]:
+    """Start the background watcher unless HOT_RELOAD=0."""
+    if not HOT_RELOAD:
+        return None
+    return KnowledgeWatcher().start()
+
+
+if __name__ == "__main__":
+    import sys
+
+    print("=" * 60)
+    print("Knowledge Hot Reload")
+    print("=" * 60)
+
+    if "--once" in sys.argv:
+        reindexed = KnowledgeWatcher(settle=False).check_all()
+        print(f"✅ {reindexed} tenant(s) re-indexed")
+    else:
+        print(f"👀 Watching {', '.join(list_tenants())} every {HOT_RELOAD_INTERVAL_SECONDS:.0f}s (Ctrl+C to stop)")
+        watcher = KnowledgeWatcher().start()
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            watcher.stop()
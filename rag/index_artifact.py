@@ -0,0 +1,274 @@
+"""
+Index Artifact - a prebuilt, checksummed knowledge index to load at startup.
+
+Indexing on startup extracts every PDF and embeds the whole corpus, which a
+fresh container (e.g. a HuggingFace Space) pays on every boot. Instead, the
+index is built once, next to the knowledge directory, and shipped with it:
+
+    index_artifact/
+        manifest.json    format, embedding model, chunk settings, knowledge
+                         content hash, chunk count, file checksums
+        records.json     chunk IDs, texts and metadata
+        embeddings.npy   embeddings (INDEX_ARTIFACT_DTYPE, float16 by default)
+
+On startup an empty vector store is filled from the artifact. The embeddings
+are memory-mapped and added to Chroma batch by batch, with no extraction and
+no embedding model loaded. The artifact is only used if it matches: the same
+format, embedding model and chunk settings, a knowledge directory with the
+same content hash (file names and bytes, so checkouts and copies still
+match), and file checksums that verify. Otherwise startup falls back to
+indexing the documents.
+
+The artifact is installed like a re-index: as a new collection version that
+is published atomically, recording the knowledge fingerprint so hot reload
+doesn't re-index it straight away.
+
+Usage: python -m rag.index_artifact build               # after editing data/knowledge
+       python -m rag.index_artifact verify
+       python -m rag.index_artifact install             # load into the vector store now
+       python -m rag.index_artifact build --tenant acme
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from config import EMBEDDING_MODEL, VECTOR_QUANTIZATION
+from rag.chunker import CHUNK_MAX_TOKENS, CHUNK_OVERLAP_TOKENS
+from rag.knowledge_indexer import knowledge_content_hash, knowledge_fingerprint, load_chunks
+from rag.vector_store import (add_documents, delete_collection, embed_texts, gc_collection_versions,
+                              get_chunk_hashes, get_or_create_collection, new_collection_version,
+                              publish_collection)
+from storage.cache import invalidate_chunks
+from storage.tenants import Tenant, get_tenant, tenant_context
+from utils.log import get_logger
+
+logger = get_logger(__name__)
+
+ARTIFACT_FORMAT = 1
+INDEX_ARTIFACT_DTYPE = os.getenv("INDEX_ARTIFACT_DTYPE", "float16")    # float16 | float32
+INDEX_ARTIFACT_VERIFY = os.getenv("INDEX_ARTIFACT_VERIFY", "1") == "1"  # check file checksums on load
+EMBED_BATCH_SIZE = 100
+
+MANIFEST_FILE = "manifest.json"
+RECORDS_FILE = "records.json"
+EMBEDDINGS_FILE = "embeddings.npy"
+
+
+class InvalidArtifact(ValueError):
+    """The artifact is missing, corrupt, or was built from different knowledge or settings."""
+
+
+@dataclass
+class IndexArtifact:
+    """A loaded artifact; embeddings are memory-mapped."""
+    manifest: Dict
+    ids: List[str]
+    documents: List[str]
+    metadatas: List[Dict]
+    embeddings: np.ndarray
+
+
+def artifact_dir(tenant: Optional[Tenant] = None) -> Path:
+    """Where a tenant's artifact lives: next to its knowledge directory (data/index_artifact by default)."""
+    tenant = tenant or get_tenant()
+    return Path(tenant.knowledge_dir).parent / "index_artifact"
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def build_artifact(output_dir: Optional[Path] = None, max_tokens: int = CHUNK_MAX_TOKENS,
+                   overlap_tokens: int = CHUNK_OVERLAP_TOKENS) -> Dict:
+    """
+    Chunk and embed the current tenant's knowledge directory into an artifact.
+
+    The artifact is written to a temporary directory and moved into place
+    when complete.
+
+    Args:
+        output_dir: Artifact directory (default: artifact_dir())
+        max_tokens: Maximum tokens per chunk
+        overlap_tokens: Tokens repeated between consecutive chunks
+
+    Returns:
+        The artifact's manifest
+    """
+    tenant = get_tenant()
+    output_dir = Path(output_dir or artifact_dir(tenant))
+    knowledge_dir = Path(tenant.knowledge_dir)
+    if not knowledge_dir.exists():
+        raise InvalidArtifact(f"Knowledge directory not found: {knowledge_dir}")
+
+    content_hash = knowledge_content_hash(knowledge_dir)
+    documents, metadatas, ids = load_chunks(knowledge_dir, max_tokens, overlap_tokens)
+    if not documents:
+        raise InvalidArtifact(f"No documents found in {knowledge_dir}")
+
+    print(f"\n🧮 Embedding {len(documents)} chunks...")
+    batches = [np.asarray(embed_texts(documents[i:i + EMBED_BATCH_SIZE], tenant.collection_name), dtype=np.float32)
+               for i in range(0, len(documents), EMBED_BATCH_SIZE)]
+    embeddings = np.concatenate(batches).astype(INDEX_ARTIFACT_DTYPE)
+
+    tmp_dir = output_dir.with_name(f"{output_dir.name}.tmp-{os.getpid()}")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+    np.save(tmp_dir / EMBEDDINGS_FILE, embeddings)
+    with open(tmp_dir / RECORDS_FILE, "w", encoding="utf-8") as f:
+        json.dump({"ids": ids, "documents": documents, "metadatas": metadatas}, f)
+    manifest = {
+        "format": ARTIFACT_FORMAT,
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "embedding_model": EMBEDDING_MODEL,
+        "dimensions": int(embeddings.shape[1]),
+        "dtype": INDEX_ARTIFACT_DTYPE,
+        "chunk_max_tokens": max_tokens,
+        "chunk_overlap_tokens": overlap_tokens,
+        "knowledge_hash": content_hash,
+        "chunks": len(ids),
+        "checksums": {name: _sha256(tmp_dir / name) for name in (RECORDS_FILE, EMBEDDINGS_FILE)},
+    }
+    with open(tmp_dir / MANIFEST_FILE, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    # Swap the finished artifact into place
+    old_dir = output_dir.with_name(f"{output_dir.name}.old-{os.getpid()}")
+    if output_dir.exists():
+        os.replace(output_dir, old_dir)
+    os.replace(tmp_dir, output_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+    logger.info("Built index artifact %s: %d chunks", output_dir, len(ids))
+    return manifest
+
+
+def verify_artifact(directory: Path, knowledge_dir: Path, checksums: bool = INDEX_ARTIFACT_VERIFY,
+                    max_tokens: int = CHUNK_MAX_TOKENS, overlap_tokens: int = CHUNK_OVERLAP_TOKENS) -> Dict:
+    """
+    Check that an artifact can stand in for indexing a knowledge directory.
+
+    Returns:
+        The manifest
+
+    Raises:
+        InvalidArtifact: With the reason it can't be used
+    """
+    try:
+        with open(Path(directory) / MANIFEST_FILE, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        raise InvalidArtifact(f"No artifact in {directory}")
+    except ValueError as e:
+        raise InvalidArtifact(f"Unreadable manifest: {e}")
+
+    if manifest.get("format") != ARTIFACT_FORMAT:
+        raise InvalidArtifact(f"Format {manifest.get('format')}, expected {ARTIFACT_FORMAT}")
+    if manifest.get("embedding_model") != EMBEDDING_MODEL:
+        raise InvalidArtifact(f"Built with embedding model {manifest.get('embedding_model')!r}, "
+                              f"configured {EMBEDDING_MODEL!r}")
+    if (manifest.get("chunk_max_tokens"), manifest.get("chunk_overlap_tokens")) != (max_tokens, overlap_tokens):
+        raise InvalidArtifact("Built with different chunk settings")
+    if manifest.get("knowledge_hash") != knowledge_content_hash(knowledge_dir):
+        raise InvalidArtifact(f"Stale: {knowledge_dir} changed since the artifact was built")
+    if checksums:
+        for name, expected in manifest.get("checksums", {}).items():
+            path = Path(directory) / name
+            if not path.exists() or _sha256(path) != expected:
+                raise InvalidArtifact(f"Checksum mismatch for {name}")
+    return manifest
+
+
+def load_artifact(directory: Path, knowledge_dir: Path) -> IndexArtifact:
+    """Verify and open an artifact (embeddings memory-mapped)."""
+    manifest = verify_artifact(directory, knowledge_dir)
+    with open(Path(directory) / RECORDS_FILE, "r", encoding="utf-8") as f:
+        records = json.load(f)
+    embeddings = np.load(Path(directory) / EMBEDDINGS_FILE, mmap_mode="r")
+    if not (len(records["ids"]) == len(records["documents"]) == len(embeddings) == manifest["chunks"]):
+        raise InvalidArtifact("Record and embedding counts differ")
+    return IndexArtifact(manifest, records["ids"], records["documents"], records["metadatas"], embeddings)
+
+
+def install_artifact(directory: Optional[Path] = None) -> bool:
+    """
+    Fill the current tenant's live collection from its artifact.
+
+    Returns:
+        True if the artifact was installed; False (with the reason printed)
+        if there is no usable artifact and the caller should index instead
+    """
+    tenant = get_tenant()
+    directory = Path(directory or artifact_dir(tenant))
+    started = time.perf_counter()
+    try:
+        artifact = load_artifact(directory, Path(tenant.knowledge_dir))
+    except InvalidArtifact as e:
+        print(f"⚠️ Index artifact not used: {e}")
+        return False
+
+    collection_name = tenant.collection_name
+    previous_hashes = get_chunk_hashes(collection_name)
+    target = new_collection_version(collection_name)
+    try:
+        get_or_create_collection(target)
+        add_documents(artifact.documents, artifact.metadatas, artifact.ids, target, embeddings=artifact.embeddings)
+        if VECTOR_QUANTIZATION != "none":
+            from rag.quantized_store import build_quantized_index
+            build_quantized_index(target, VECTOR_QUANTIZATION)
+    except Exception:
+        delete_collection(target)
+        raise
+    publish_collection(collection_name, target, knowledge_fingerprint(tenant.knowledge_dir))
+    gc_collection_versions(collection_name)
+
+    current_hashes = {chunk_id: meta.get("content_hash") for chunk_id, meta in zip(artifact.ids, artifact.metadatas)}
+    changed = [chunk_id for chunk_id, content_hash in previous_hashes.items()
+               if current_hashes.get(chunk_id) != content_hash]
+    if changed:
+        invalidate_chunks(changed)
+
+    print(f"⚡ Loaded index artifact ({len(artifact.ids)} chunks, built {artifact.manifest['built_at']}) "
+          f"in {(time.perf_counter() - started) * 1000:.0f} ms")
+    return True
+
+
+if __name__ == "__main__":
+    import sys
+
+    print("=" * 60)
+    print("Index Artifact")
+    print("=" * 60)
+
+    command = sys.argv[1] if len(sys.argv) > 1 and not sys.argv[1].startswith("--") else "build"
+    tenant_id = sys.argv[sys.argv.index("--tenant") + 1] if "--tenant" in sys.argv else None
+    output = Path(sys.argv[sys.argv.index("--output") + 1]) if "--output" in sys.argv else None
+    with tenant_context(tenant_id) as tenant:
+        directory = output or artifact_dir(tenant)
+        try:
+            if command == "build":
+                manifest = build_artifact(directory)
+                size = sum(path.stat().st_size for path in directory.iterdir())
+                print(f"\n✅ Built {directory}: {manifest['chunks']} chunks, {manifest['dimensions']} dims "
+                      f"({manifest['dtype']}), {size / 1024:.0f} KB")
+            elif command == "verify":
+                manifest = verify_artifact(directory, Path(tenant.knowledge_dir), checksums=True)
+                print(f"✅ {directory} matches {tenant.knowledge_dir} ({manifest['chunks']} chunks)")
+            elif command == "install":
+                sys.exit(0 if install_artifact(directory) else 1)
+            else:
+                print(f"⚠️ Unknown command {command!r}: use build, verify or install")
+                sys.exit(2)
+        except InvalidArtifact as e:
+            print(f"❌ {e}")
+            sys.exit(1)
@@ -1,60 +1,39 @@
 """
 Knowledge Indexer - Loads documents, chunks them, and stores in vector database
+
+A full re-index (reset=True) of a live collection never empties it: the new
+index is built as a separate collection version and swapped in when
+complete (see rag/vector_store.py), so queries keep their context
+throughout. rag/hot_reload.py runs it when the knowledge directory changes.
 """
 
+from datetime import datetime
 from json import load
+import hashlib
 import os
+import re
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 from pypdf import PdfReader
-from config import KNOWLEDGE_DIR
-from rag.vector_store import add_documents, reset_collection, get_collection_stats
-
-def chunk_text(text: str, chunk_size: int=500, overlap: int=50) -> List[str]:
-    """
-    Split text into overlapping chunks.
-
-    Args:
-        text: The text to chunk
-        chunk_size: Maximum characters per chunk
-        overlap: Number of characters to overlap between chunks
-    
-    Returns:
-        List of text chunks
-    """
-    chunks = []
-    start = 0
-    text_length = len(text)
-
-    while start < text_length:
-        end = start + chunk_size
-
-        if end < text_length:
-            # Look for sentence endings in the last 100 characters
-            last_period = text.rfind('.', start, end)
-            last_newline = text.rfind('\n', start, end)
-            break_point = max(last_period, last_newline)
-
-            if break_point > start:
-                end = break_point + 1
+from config import VECTOR_QUANTIZATION
+from rag.chunker import chunk_document, CHUNK_MAX_TOKENS, CHUNK_OVERLAP_TOKENS
+from rag.vector_store import (add_documents, reset_collection, get_collection_stats, get_chunk_hashes,
+                              content_hash_of, get_or_create_collection, new_collection_version,
+                              publish_collection, resolve_collection, gc_collection_versions,
+                              delete_collection)
+from storage.cache import invalidate_chunks
+from storage.tenants import get_tenant, tenant_context
 
-        chunk = text[start:end].strip()
-        if chunk:
-            chunks.append(chunk)
-        
-        start = end - overlap
-
-    return chunks
+# Years in file names ("CV_2024v2") and in text; "Present" means the current year
+_YEAR = re.compile(r"(?<!\d)(?:19|20)\d{2}(?!\d)")
+_PRESENT = re.compile(r"\b(?:present|current|now)\b", re.IGNORECASE)
 
 def load_pdf(file_path: str) -> str:
     """
     Load a PDF file and return its text content.
     """
     reader = PdfReader(file_path)
-    text = ""
-    for page in reader.pages:
-        text += page.extract_text() + "\n"
-    return text
+    return "".join((page.extract_text() or "") + "\n" for page in reader.pages)
 
 def load_text_file(file_path: str) -> str:
     """
@@ -64,28 +43,67 @@ def load_text_file(file_path: str) -> str:
         return f.read()
 
 
-def index_knowledge_base(reset: bool=False):
+def document_year(file_path: Path, text: str) -> int:
+    """
+    Year a document was written, used to prefer the newest CV or profile.
 
+    Taken from the file name when it has one, otherwise the latest year the
+    text mentions (a role ending "Present" counts as this year), otherwise
+    the file's modification time.
     """
-    Load all knowledge documents, chunk them, and store in vector database.
-    
-    Args:
-        reset: If True, clear existing collection before indexing
+    name_years = [int(y) for y in _YEAR.findall(file_path.stem)]
+    if name_years:
+        return max(name_years)
+    current_year = datetime.now().year
+    text_years = [int(y) for y in _YEAR.findall(text) if int(y) <= current_year]
+    if text_years:
+        latest = max(text_years)
+        return current_year if _PRESENT.search(text) else latest
+    return datetime.fromtimestamp(file_path.stat().st_mtime).year
+
+
+def knowledge_content_hash(knowledge_dir) -> str:
     """
-    if reset:
-        print("🗑️  Resetting vector database...")
-        reset_collection()
+    Hash of a knowledge directory's file names and contents.
 
-    knowledge_dir = Path(KNOWLEDGE_DIR)
+    Unlike knowledge_fingerprint it survives copies and checkouts (which
+    reset modification times), so index artifacts are checked against it.
+    """
+    digest = hashlib.sha256()
+    knowledge_dir = Path(knowledge_dir)
+    if knowledge_dir.exists():
+        for file_path in sorted(knowledge_dir.iterdir()):
+            if file_path.is_file():
+                digest.update(f"{file_path.name}\0{file_path.stat().st_size}\0".encode())
+                with open(file_path, "rb") as f:
+                    for block in iter(lambda: f.read(1 << 20), b""):
+                        digest.update(block)
+    return digest.hexdigest()
 
-    if not knowledge_dir.exists():
-        print(f"⚠️ Knowledge directory not found: {knowledge_dir}")
-        return
-    
+
+def knowledge_fingerprint(knowledge_dir) -> str:
+    """Fingerprint of a knowledge directory's files (names, sizes and modification times)."""
+    digest = hashlib.sha256()
+    knowledge_dir = Path(knowledge_dir)
+    if knowledge_dir.exists():
+        for file_path in sorted(knowledge_dir.iterdir()):
+            if file_path.is_file():
+                stat = file_path.stat()
+                digest.update(f"{file_path.name}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()[:16]
+
+
+def load_chunks(knowledge_dir: Path, max_tokens: int = CHUNK_MAX_TOKENS,
+                overlap_tokens: int = CHUNK_OVERLAP_TOKENS) -> Tuple[List[str], List[Dict], List[str]]:
+    """
+    Extract and chunk every supported file in a knowledge directory.
+
+    Returns:
+        (chunk texts, chunk metadata, chunk IDs)
+    """
     all_documents = []
     all_metadatas = []
     all_ids = []
-    chunk_counter = 0
 
     # Process all files in knowledge directory
     for file_path in knowledge_dir.iterdir():
@@ -104,45 +122,143 @@ def index_knowledge_base(reset: bool=False):
                 print(f"   ⏭️ Skipping unsupported file type: {file_path.suffix}")
                 continue
             
-            # Chunk the document
-            chunks = chunk_text(text, chunk_size=500, overlap=50)
-            print(f"   ✂️  Created {len(chunks)} chunks")
+            # Chunk the document by sentences and resume sections
+            chunks = chunk_document(text, max_tokens, overlap_tokens)
+            doc_year = document_year(file_path, text)
+            print(f"   ✂️  Created {len(chunks)} chunks (dated {doc_year})")
 
             # Create metadata and IDs for each chunk
+            # IDs depend only on the file name and position, so they are stable across runs
             for i, chunk in enumerate(chunks):
-                all_documents.append(chunk)
+                all_documents.append(chunk["text"])
                 all_metadatas.append({
                     "source": file_path.name,
                     "source_type": source_type,
+                    "section": chunk["section"],
+                    "heading": chunk["heading"],
                     "chunk_index": i,
-                    "total_chunks": len(chunks)
+                    "total_chunks": len(chunks),
+                    "doc_year": doc_year,
+                    "content_hash": content_hash_of(chunk["text"])
                 })
-                all_ids.append(f"{file_path.stem}_chunk_{chunk_counter}")
-                chunk_counter += 1
+                all_ids.append(f"{file_path.name}_chunk_{i}")
 
         except Exception as e:
             print(f"❌ Error processing {file_path.name}: {e}")
 
+    return all_documents, all_metadatas, all_ids
+
+
+def index_knowledge_base(reset: bool=False, collection_name: Optional[str] = None,
+                         embedding_model: Optional[str] = None, max_tokens: int = CHUNK_MAX_TOKENS,
+                         overlap_tokens: int = CHUNK_OVERLAP_TOKENS):
+
+    """
+    Load all knowledge documents, chunk them, and store in vector database.
+
+    Indexes the current tenant's knowledge directory (storage/tenants.py).
+    
+    Args:
+        reset: If True, rebuild from scratch (as a new version swapped in when
+            done for the live collection; in place for scratch collections)
+        collection_name: Collection to index into (default: the tenant's; evaluations use scratch ones)
+        embedding_model: Embedding model for a reset collection (default EMBEDDING_MODEL)
+        max_tokens: Maximum tokens per chunk
+        overlap_tokens: Tokens repeated between consecutive chunks
+    """
+    tenant = get_tenant()
+    live_collection = collection_name is None or collection_name == tenant.collection_name
+    collection_name = collection_name or tenant.collection_name
+
+    knowledge_dir = Path(tenant.knowledge_dir)
+
+    if not knowledge_dir.exists():
+        print(f"⚠️ Knowledge directory not found: {knowledge_dir}")
+        return
+
+    # Content hashes of the current index, to find chunks this run changes
+    previous_hashes = get_chunk_hashes(collection_name)
+    fingerprint = knowledge_fingerprint(knowledge_dir)
+
+    # Rebuilds of the live collection go into a new version, published when complete
+    swap = reset and live_collection
+    target = collection_name
+    if swap:
+        target = new_collection_version(collection_name)
+        print(f"🆕 Building new index version {target}...")
+        get_or_create_collection(target, embedding_model)
+    elif reset:
+        print("🗑️  Resetting vector database...")
+        reset_collection(collection_name, embedding_model)
+    
+    all_documents, all_metadatas, all_ids = load_chunks(knowledge_dir, max_tokens, overlap_tokens)
+
     # Add all documents to vector store
     if all_documents:
         print(f"\n💾 Storing {len(all_documents)} chunks in vector database...")
-        add_documents(all_documents, all_metadatas, all_ids)
+        add_documents(all_documents, all_metadatas, all_ids, target)
+
+        if VECTOR_QUANTIZATION != "none":
+            from rag.quantized_store import build_quantized_index
+            index = build_quantized_index(target, VECTOR_QUANTIZATION)
+            print(f"   🗜️  Built {VECTOR_QUANTIZATION} index ({index.memory_bytes() / 1024:.0f} KB resident)")
+
+        if live_collection:
+            # Switch readers over, recording what the index was built from (for hot reload)
+            publish_collection(collection_name, target if swap else resolve_collection(collection_name),
+                               fingerprint)
+            for stale in gc_collection_versions(collection_name):
+                print(f"   🧹 Removed old index version {stale}")
+
+        # Drop cached answers built on chunks that were edited or removed
+        current_hashes = {chunk_id: meta["content_hash"] for chunk_id, meta in zip(all_ids, all_metadatas)}
+        changed = [chunk_id for chunk_id, content_hash in previous_hashes.items()
+                   if current_hashes.get(chunk_id) != content_hash]
+        if changed and live_collection:
+            removed = invalidate_chunks(changed)
+            print(f"   ♻️  {len(changed)} chunks changed, invalidated {removed} cached answers")
 
         # Show Stats
-        stats = get_collection_stats()
+        stats = get_collection_stats(collection_name)
         print(f"\n✅ Indexing complete!")
         print(f"   📊 Total documents in database: {stats['total_documents']}")
     else:
+        if swap:
+            # Keep serving the previous version rather than an empty one
+            delete_collection(target)
         print(f"\n⚠️  No documents found to index")
 
 
 if __name__ == "__main__":
+    import sys
+
     print("="*60)
     print(f"Knowledge Base Indexer")
     print("="*60)
 
-    # Index the knowledge base (reset=True to start fresh)
-    index_knowledge_base(reset=True)
+    tenant_id = sys.argv[sys.argv.index("--tenant") + 1] if "--tenant" in sys.argv else None
+    with tenant_context(tenant_id) as tenant:
+        print(f"👤 Tenant: {tenant.tenant_id} ({tenant.knowledge_dir})")
+        if "--if-empty" in sys.argv:
+            # Used by gunicorn_conf.py: index once before workers start,
+            # from the prebuilt index artifact when it matches
+            from rag.index_artifact import install_artifact
+            if get_collection_stats(tenant.collection_name)["total_documents"] == 0 and not install_artifact():
+                index_knowledge_base(reset=False)
+            else:
+                print("✅ Vector store already populated, skipping indexing")
+        else:
+            # Index the knowledge base (reset=True to start fresh)
+            index_knowledge_base(reset=True)
+
+        if "--no-warm" not in sys.argv:
+            # Pre-populate the response cache for FAQ and popular questions
+            from rag.cache_warmer import warm_cache
+            try:
+                stats = warm_cache()
+                print(f"🔥 Cache warmed: {stats['warmed']} new, {stats['already_cached']} already cached")
+            except Exception as e:
+                print(f"⚠️ Cache warming skipped: {e}")
 
     print("="*60)
     print("\nKnowledge base indexing complete!")
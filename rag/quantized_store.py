@@ -0,0 +1,401 @@
+"""
+Quantized Store - compact int8 / binary embedding index with float rescoring.
+
+Chroma keeps every embedding as float32 plus an in-memory HNSW graph. With
+VECTOR_QUANTIZATION=int8 or binary, searches use this index instead:
+  - int8:   one signed byte per dimension plus a float32 scale per vector (~4x smaller)
+  - binary: one bit per dimension, compared by Hamming distance (~32x smaller)
+
+Only the codes are held in memory. Quantized scores pick
+top_k * RESCORE_MULTIPLIER candidates. Their exact cosine similarity is then
+computed from the float32 vectors, which stay on disk and are memory-mapped,
+so only the rescored rows are paged in.
+
+The index is built from the Chroma collection after indexing (see
+rag.knowledge_indexer) and stored under VECTOR_DB_DIR/quantized/. Searches
+return the same shape as rag.vector_store.search_similar.
+
+Indexes (one per tenant collection) are loaded on first search into an LRU
+bounded by INDEX_CACHE_MB of resident memory; evicted indexes are reopened
+from disk on demand. This is what keeps memory bounded with many tenants:
+Chroma has no way to unload a collection's HNSW graph.
+
+Usage: python -m rag.quantized_store            # build for VECTOR_QUANTIZATION
+       python -m rag.quantized_store binary     # build a specific mode
+"""
+
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from config import VECTOR_DB_DIR, VECTOR_QUANTIZATION
+from rag.vector_store import COLLECTION_NAME, embed_texts, get_or_create_collection, resolve_collection
+from utils.log import get_logger
+from utils.metrics import gauge, VECTOR_INDEX_EVENTS
+
+logger = get_logger(__name__)
+
+QUANTIZATION_MODES = ("int8", "binary")
+QUANTIZED_DIR = Path(VECTOR_DB_DIR) / "quantized"
+
+# Candidates rescored with float32 vectors, per requested result
+RESCORE_MULTIPLIER = {"int8": 4, "binary": 10}
+SCORE_BLOCK_ROWS = 8192        # rows scored per block, bounds temporary memory
+FILTER_CACHE_SIZE = 64         # where filters whose row masks are kept
+INDEX_CACHE_BYTES = int(float(os.getenv("INDEX_CACHE_MB", "256")) * 1024 * 1024)  # loaded indexes
+
+
+def _matches(metadata: Dict, where: Dict) -> bool:
+    """Evaluate the subset of Chroma where filters the retriever uses ($and, $or, $in, $gte, ...)."""
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(_matches(metadata, clause) for clause in condition):
+                return False
+            continue
+        if key == "$or":
+            if not any(_matches(metadata, clause) for clause in condition):
+                return False
+            continue
+        value = metadata.get(key)
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        for op, operand in condition.items():
+            if op == "$eq":
+                ok = value == operand
+            elif op == "$ne":
+                ok = value != operand
+            elif op == "$in":
+                ok = value in operand
+            elif op == "$nin":
+                ok = value not in operand
+            elif value is None:
+                ok = False
+            elif op == "$gt":
+                ok = value > operand
+            elif op == "$gte":
+                ok = value >= operand
+            elif op == "$lt":
+                ok = value < operand
+            elif op == "$lte":
+                ok = value <= operand
+            else:
+                raise ValueError(f"Unsupported where operator: {op}")
+            if not ok:
+                return False
+    return True
+
+
+def quantize_int8(vectors: np.ndarray):
+    """Symmetric per-vector int8 quantization: vectors ~= codes * scales[:, None]."""
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def quantize_binary(vectors: np.ndarray) -> np.ndarray:
+    """Sign bits packed 8 per byte."""
+    return np.packbits(vectors > 0, axis=1)
+
+
+def _popcount(packed: np.ndarray) -> np.ndarray:
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(packed).sum(axis=1, dtype=np.int32)
+    return _POPCOUNT_TABLE[packed].sum(axis=1, dtype=np.int32)
+
+
+_POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+class QuantizedIndex:
+    """Quantized codes in memory, float32 vectors memory-mapped for rescoring."""
+
+    def __init__(self, mode: str, ids: List[str], documents: List[str], metadatas: List[Dict],
+                 codes: np.ndarray, vectors: np.ndarray, scales: Optional[np.ndarray] = None,
+                 records_bytes: int = 0):
+        if mode not in QUANTIZATION_MODES:
+            raise ValueError(f"Unknown quantization mode: {mode}")
+        self.mode = mode
+        self.ids = ids
+        self.documents = documents
+        self.metadatas = metadatas
+        self.codes = codes
+        self.scales = scales
+        self.vectors = vectors
+        self.records_bytes = records_bytes
+        self._filter_masks: OrderedDict = OrderedDict()
+        self._filter_lock = threading.Lock()       # searches run in concurrent threads
+
+    @classmethod
+    def from_vectors(cls, mode: str, ids: List[str], documents: List[str], metadatas: List[Dict],
+                     vectors: np.ndarray) -> "QuantizedIndex":
+        """Quantize normalized float vectors (kept as given for rescoring)."""
+        vectors = _normalize(np.asarray(vectors, dtype=np.float32))
+        if mode == "int8":
+            codes, scales = quantize_int8(vectors)
+        else:
+            codes, scales = quantize_binary(vectors), None
+        return cls(mode, ids, documents, metadatas, codes, vectors, scales)
+
+    def memory_bytes(self) -> int:
+        """Bytes the index keeps resident for scoring (codes and scales)."""
+        return self.codes.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    def resident_bytes(self) -> int:
+        """Approximate memory held while loaded: codes, scales, documents and metadata."""
+        return self.memory_bytes() + self.records_bytes
+
+    def _mask(self, where: Optional[Dict]) -> Optional[np.ndarray]:
+        if not where:
+            return None
+        key = json.dumps(where, sort_keys=True)
+        with self._filter_lock:
+            mask = self._filter_masks.get(key)
+            if mask is not None:
+                self._filter_masks.move_to_end(key)
+                return mask
+        # Computed outside the lock; a concurrent search may compute the same mask
+        mask = np.array([_matches(meta or {}, where) for meta in self.metadatas], dtype=bool)
+        with self._filter_lock:
+            self._filter_masks[key] = mask
+            if len(self._filter_masks) > FILTER_CACHE_SIZE:
+                self._filter_masks.popitem(last=False)
+        return mask
+
+    def _approximate_scores(self, query: np.ndarray) -> np.ndarray:
+        """Quantized similarity of every row to the query (higher is closer)."""
+        scores = np.empty(len(self.ids), dtype=np.float32)
+        if self.mode == "int8":
+            for start in range(0, len(scores), SCORE_BLOCK_ROWS):
+                block = self.codes[start:start + SCORE_BLOCK_ROWS]
+                scores[start:start + len(block)] = (block @ query) * self.scales[start:start + len(block)]
+        else:
+            query_bits = quantize_binary(query[None, :])[0]
+            for start in range(0, len(scores), SCORE_BLOCK_ROWS):
+                block = self.codes[start:start + SCORE_BLOCK_ROWS]
+                scores[start:start + len(block)] = -_popcount(np.bitwise_xor(block, query_bits))
+        return scores
+
+    def search(self, query: np.ndarray, n_results: int = 3, where: Optional[Dict] = None,
+               rescore: bool = True) -> Dict:
+        """
+        Find the nearest rows to a query embedding.
+
+        Args:
+            query: Query embedding
+            n_results: Number of results to return
+            where: Optional Chroma-style metadata filter
+            rescore: Re-rank candidates by exact cosine similarity
+
+        Returns:
+            Dict with documents, metadatas, distances (cosine), and ids, shaped like a Chroma query
+        """
+        query = _normalize(np.asarray(query, dtype=np.float32)[None, :])[0]
+        scores = self._approximate_scores(query)
+        mask = self._mask(where)
+        if mask is not None:
+            scores[~mask] = -np.inf
+            available = int(mask.sum())
+        else:
+            available = len(scores)
+        n_results = min(n_results, available)
+        if n_results <= 0:
+            return {'documents': [[]], 'metadatas': [[]], 'distances': [[]], 'ids': [[]]}
+
+        n_candidates = min(available, n_results * RESCORE_MULTIPLIER[self.mode] if rescore else n_results)
+        candidates = np.argpartition(-scores, n_candidates - 1)[:n_candidates]
+        if rescore:
+            # Only these rows of the memory-mapped float vectors are read
+            similarity = np.asarray(self.vectors[np.sort(candidates)]) @ query
+            candidates = np.sort(candidates)
+        elif self.mode == "int8":
+            similarity = scores[candidates]
+        else:
+            similarity = np.cos(np.pi * -scores[candidates] / self.vectors.shape[1])  # angle from Hamming distance
+        order = np.argsort(-similarity)[:n_results]
+        rows = candidates[order].tolist()
+        return {
+            'ids': [[self.ids[i] for i in rows]],
+            'documents': [[self.documents[i] for i in rows]],
+            'metadatas': [[self.metadatas[i] for i in rows]],
+            'distances': [(1.0 - similarity[order]).tolist()],
+        }
+
+    def save(self, directory: Path):
+        """Write the index to a directory (records.json is written last and marks it complete)."""
+        directory.mkdir(parents=True, exist_ok=True)
+        arrays = {"codes": self.codes, "vectors": np.asarray(self.vectors)}
+        if self.scales is not None:
+            arrays["scales"] = self.scales
+        for name, array in arrays.items():
+            tmp_path = directory / f"{name}.tmp.npy"
+            np.save(tmp_path, array)
+            os.replace(tmp_path, directory / f"{name}.npy")
+        tmp_path = directory / "records.tmp.json"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"mode": self.mode, "ids": self.ids, "documents": self.documents,
+                       "metadatas": self.metadatas}, f)
+        os.replace(tmp_path, directory / "records.json")
+
+    @classmethod
+    def load(cls, directory: Path) -> "QuantizedIndex":
+        """Load codes into memory and memory-map the float vectors."""
+        with open(directory / "records.json", "r", encoding="utf-8") as f:
+            records = json.load(f)
+        scales_path = directory / "scales.npy"
+        return cls(
+            records["mode"], records["ids"], records["documents"], records["metadatas"],
+            codes=np.load(directory / "codes.npy"),
+            vectors=np.load(directory / "vectors.npy", mmap_mode="r"),
+            scales=np.load(scales_path) if scales_path.exists() else None,
+            records_bytes=(directory / "records.json").stat().st_size,
+        )
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def index_path(collection_name: str = COLLECTION_NAME, mode: str = VECTOR_QUANTIZATION) -> Path:
+    """Directory of a collection's index (of its live version, once one is published)."""
+    return QUANTIZED_DIR / f"{resolve_collection(collection_name)}.{mode}"
+
+
+def delete_quantized_index(collection_name: str):
+    """Remove every mode's index for an exact collection name (garbage-collected versions)."""
+    for mode in QUANTIZATION_MODES:
+        _loaded.pop((collection_name, mode))
+        shutil.rmtree(QUANTIZED_DIR / f"{collection_name}.{mode}", ignore_errors=True)
+
+
+def build_quantized_index(collection_name: str = COLLECTION_NAME, mode: str = VECTOR_QUANTIZATION) -> QuantizedIndex:
+    """
+    Build and save a quantized index from a Chroma collection's stored embeddings.
+
+    Returns:
+        The new index
+    """
+    records = get_or_create_collection(collection_name).get(include=["embeddings", "documents", "metadatas"])
+    embeddings = records["embeddings"]
+    vectors = np.asarray(embeddings if embeddings is not None and len(embeddings) else np.zeros((0, 1)),
+                         dtype=np.float32)
+    index = QuantizedIndex.from_vectors(mode, list(records["ids"]), list(records["documents"]),
+                                        [meta or {} for meta in records["metadatas"]], vectors)
+    index.save(index_path(collection_name, mode))
+    _loaded.pop((collection_name, mode))
+    logger.info("Built %s index for %s: %d vectors, %d bytes resident",
+                mode, collection_name, len(index.ids), index.memory_bytes())
+    return index
+
+
+class IndexCache:
+    """
+    Loaded indexes keyed by (collection, mode), least recently used first.
+
+    Indexes are evicted once their resident bytes exceed max_bytes (the most
+    recently loaded one always stays). An index rebuilt on disk is reloaded.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()   # key -> (mtime, index)
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.loads = 0
+        self.evictions = 0
+
+    def get(self, key: tuple, mtime: int) -> Optional[QuantizedIndex]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != mtime:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key: tuple, mtime: int, index: QuantizedIndex):
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (mtime, index)
+            self.bytes += index.resident_bytes()
+            self.loads += 1
+            while self.bytes > self.max_bytes and len(self._entries) > 1:
+                evicted_key = next(iter(self._entries))
+                self._remove(evicted_key)
+                self.evictions += 1
+                VECTOR_INDEX_EVENTS.labels("eviction").inc()
+                logger.info("Evicted index %s to stay under %d bytes", evicted_key, self.max_bytes)
+        VECTOR_INDEX_EVENTS.labels("load").inc()
+
+    def pop(self, key: tuple):
+        with self._lock:
+            self._remove(key)
+
+    def _remove(self, key: tuple):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry[1].resident_bytes()
+
+    def __contains__(self, key: tuple) -> bool:
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_loaded = IndexCache(INDEX_CACHE_BYTES)
+gauge("vector_index_cache_bytes", "Resident bytes of loaded quantized indexes", lambda: _loaded.bytes)
+
+
+def get_quantized_index(collection_name: str = COLLECTION_NAME,
+                        mode: str = VECTOR_QUANTIZATION) -> Optional[QuantizedIndex]:
+    """The saved index for a collection (loaded on demand), or None if it hasn't been built."""
+    directory = index_path(collection_name, mode)
+    try:
+        mtime = (directory / "records.json").stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+    index = _loaded.get((collection_name, mode), mtime)
+    if index is None:
+        index = QuantizedIndex.load(directory)
+        _loaded.put((collection_name, mode), mtime, index)
+    return index
+
+
+def search_quantized(query: str, n_results: int = 3, where: Optional[Dict] = None,
+                     collection_name: str = COLLECTION_NAME, mode: str = VECTOR_QUANTIZATION) -> Optional[Dict]:
+    """
+    Search the quantized index for a collection.
+
+    Returns:
+        Chroma-shaped results, or None if no index has been built (callers fall back to Chroma)
+    """
+    index = get_quantized_index(collection_name, mode)
+    if index is None:
+        return None
+    query_embedding = np.asarray(embed_texts([query], collection_name)[0], dtype=np.float32)
+    return index.search(query_embedding, n_results, where)
+
+
+if __name__ == "__main__":
+    import sys
+
+    print("=" * 60)
+    print("Quantized Store")
+    print("=" * 60)
+
+    mode = sys.argv[1] if len(sys.argv) > 1 else VECTOR_QUANTIZATION
+    if mode not in QUANTIZATION_MODES:
+        print(f"⚠️  Set VECTOR_QUANTIZATION or pass one of: {', '.join(QUANTIZATION_MODES)}")
+        sys.exit(1)
+    index = build_quantized_index(mode=mode)
+    float_bytes = np.asarray(index.vectors).nbytes
+    print(f"✅ Built {mode} index: {len(index.ids)} vectors")
+    print(f"   💾 Resident: {index.memory_bytes() / 1024:.1f} KB (float32 on disk: {float_bytes / 1024:.1f} KB)")
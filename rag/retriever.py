@@ -1,9 +1,40 @@
 """
 Retriever - Semantic search retrieval from vector database.
+
+Queries can be restricted by chunk metadata (section, source, document year),
+either explicitly or from the question's intent ("what skills..." only
+searches skills sections). Candidates are then re-ranked with a small
+recency bonus so the newest CV or profile wins over an older one saying the
+same thing, and near-identical chunks (the .pdf and .txt of one CV) are
+returned once.
 """
 
-from typing import Dict, List
-from rag.vector_store import search_similar
+import os
+import re
+from typing import Dict, List, Optional
+from rag.vector_store import search_similar, content_hash_of, COLLECTION_NAME
+
+# Ranking configuration
+RECENCY_WEIGHT = float(os.getenv("RETRIEVAL_RECENCY_WEIGHT", "0.1"))  # bonus for the newest document
+CURRENT_INTENT_RECENCY_WEIGHT = 0.3    # used for "current"/"latest" questions
+CANDIDATE_MULTIPLIER = 4               # candidates fetched per result, for re-ranking and dedup
+
+# Question keywords -> sections to search (see rag.chunker.SECTION_HEADINGS)
+INTENT_SECTIONS = {
+    "skills": ["skill", "skills", "technologies", "tech stack", "tools", "languages", "frameworks", "proficient"],
+    "experience": ["experience", "work", "worked", "job", "role", "employer", "company", "career"],
+    "education": ["education", "degree", "university", "college", "studied", "study", "school"],
+    "projects": ["project", "projects", "built", "side project"],
+    "certifications": ["certification", "certifications", "certified", "certificate"],
+    "contact": ["contact", "email", "phone", "reach you"],
+}
+_CURRENT_INTENT = re.compile(r"\b(?:current|currently|now|latest|recent|recently|these days|today)\b",
+                             re.IGNORECASE)
+_NON_WORD = re.compile(r"\W+")         # ignored when comparing chunks (PDF vs text extraction)
+_INTENT_PATTERNS = {
+    section: re.compile(r"\b(?:" + "|".join(map(re.escape, keywords)) + r")\b", re.IGNORECASE)
+    for section, keywords in INTENT_SECTIONS.items()
+}
 
 
 def format_context_for_llm(results: List[Dict]) -> str:
@@ -33,7 +64,109 @@ def format_context_for_llm(results: List[Dict]) -> str:
     return "\n".join(context_parts)
 
 
-def retreive_context(query: str, top_k: int=3, min_relevance: float=0.0) -> Dict:
+def chunk_versions(results: List[Dict]) -> List[str]:
+    """
+    Identify the retrieved chunks as "chunk_id@content_hash" strings.
+
+    Used as the cache key instead of the formatted context, so relevance
+    score jitter doesn't change keys and an edited chunk does.
+    """
+    versions = []
+    for result in results:
+        content_hash = result['metadata'].get('content_hash') or content_hash_of(result['document'])
+        versions.append(f"{result['id']}@{content_hash}")
+    return sorted(versions)
+
+
+def infer_sections(query: str) -> Optional[List[str]]:
+    """
+    Sections a question is about, from INTENT_SECTIONS keywords.
+
+    Returns:
+        Section names, or None if the question doesn't name any
+    """
+    sections = [section for section, pattern in _INTENT_PATTERNS.items() if pattern.search(query)]
+    return sections or None
+
+
+def build_where(sections: Optional[List[str]] = None, sources: Optional[List[str]] = None,
+                min_year: Optional[int] = None) -> Optional[Dict]:
+    """
+    Build a Chroma metadata filter from section, source and year restrictions.
+
+    Returns:
+        A where dict, or None when nothing is restricted
+    """
+    clauses = []
+    if sections:
+        clauses.append({"section": {"$in": list(sections)}})
+    if sources:
+        clauses.append({"source": {"$in": list(sources)}})
+    if min_year is not None:
+        clauses.append({"doc_year": {"$gte": int(min_year)}})
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+def _to_results(results: Dict, min_relevance: float) -> List[Dict]:
+    """Flatten a Chroma query response into result dicts above min_relevance."""
+    documents = results['documents'][0] if results['documents'] else []
+    metadatas = results['metadatas'][0] if results['metadatas'] else []
+    distances = results['distances'][0] if results['distances'] else []
+    ids = results['ids'][0] if results['ids'] else []
+
+    # Cosine distance: 0 = identical, 2 = opposite
+    converted = []
+    for chunk_id, doc, meta, dist in zip(ids, documents, metadatas, distances):
+        relevance = max(0, 1.0 - (dist / 2.0))
+        if relevance >= min_relevance:
+            converted.append({
+                'id': chunk_id,
+                'document': doc,
+                'metadata': meta or {},
+                'distance': dist,
+                'relevance_score': relevance
+            })
+    return converted
+
+
+def rank_results(candidates: List[Dict], top_k: int, recency_weight: float = RECENCY_WEIGHT) -> List[Dict]:
+    """
+    Re-rank candidates by relevance plus a recency bonus, dropping duplicates.
+
+    The bonus is recency_weight for the newest document among the candidates,
+    scaling down linearly to 0 for the oldest; chunks without a doc_year get none.
+
+    Returns:
+        The top_k results, each with a 'score'
+    """
+    years = [c['metadata'].get('doc_year') for c in candidates if c['metadata'].get('doc_year')]
+    oldest, newest = (min(years), max(years)) if years else (0, 0)
+    span = newest - oldest
+
+    for candidate in candidates:
+        year = candidate['metadata'].get('doc_year')
+        recency = (year - oldest) / span if year and span else 0.0
+        candidate['score'] = candidate['relevance_score'] + recency_weight * recency
+
+    ranked = []
+    seen_text = set()
+    for candidate in sorted(candidates, key=lambda c: c['score'], reverse=True):
+        text_key = _NON_WORD.sub("", candidate['document']).lower()
+        if text_key in seen_text:
+            continue
+        seen_text.add(text_key)
+        ranked.append(candidate)
+        if len(ranked) == top_k:
+            break
+    return ranked
+
+
+def retreive_context(query: str, top_k: int=3, min_relevance: float=0.0,
+                     sections: Optional[List[str]] = None, sources: Optional[List[str]] = None,
+                     min_year: Optional[int] = None, recency_weight: Optional[float] = None,
+                     auto_filter: bool = True, collection_name: str = COLLECTION_NAME) -> Dict:
     """
     Retrieve relevant context for a query from the vector database.
     
@@ -41,29 +174,37 @@ def retreive_context(query: str, top_k: int=3, min_relevance: float=0.0) -> Dict
         query: The user's question
         top_k: Number of results to retrieve
         min_relevance: Minimum relevance score (0-1) to include
+        sections: Only search these sections (e.g. ["skills"])
+        sources: Only search these source files
+        min_year: Only search documents dated this year or later
+        recency_weight: Bonus for the newest document (default RECENCY_WEIGHT,
+            or CURRENT_INTENT_RECENCY_WEIGHT for "current"/"latest" questions)
+        auto_filter: Infer sections from the question when none are given
+        collection_name: Collection to search (evaluations use scratch collections)
         
     Returns:
-        Dict with query, results, formatted_context, and num_results
+        Dict with query, results, formatted_context, chunk_versions, where, and num_results
     """
-    # Search vector database
-    results = search_similar(query, n_results=top_k)
-    
-    # Extract results
-    documents = results['documents'][0] if results['documents'] else []
-    metadatas = results['metadatas'][0] if results['metadatas'] else []
-    distances = results['distances'][0] if results['distances'] else []
-    
-    # Filter by relevance (cosine distance: 0 = identical, 2 = opposite)
-    filtered_results = []
-    for doc, meta, dist in zip(documents, metadatas, distances):
-        max_distance = 2.0
-        if dist <= max_distance:
-            filtered_results.append({
-                'document': doc,
-                'metadata': meta,
-                'distance': dist,
-                'relevance_score': max(0, 1.0 - (dist / 2.0))
-            })
+    inferred = sections is None and auto_filter
+    if inferred:
+        sections = infer_sections(query)
+    if recency_weight is None:
+        recency_weight = CURRENT_INTENT_RECENCY_WEIGHT if _CURRENT_INTENT.search(query) else RECENCY_WEIGHT
+    where = build_where(sections, sources, min_year)
+
+    # Over-fetch so re-ranking and dedup still leave top_k results
+    n_candidates = top_k * CANDIDATE_MULTIPLIER
+    candidates = _to_results(search_similar(query, n_candidates, where, collection_name), min_relevance)
+
+    # An inferred section filter can be wrong (or the section missing from a
+    # document); fall back to searching everything rather than answer thinly
+    if inferred and where is not None and len(candidates) < top_k:
+        where = build_where(None, sources, min_year)
+        seen_ids = {c['id'] for c in candidates}
+        fallback = _to_results(search_similar(query, n_candidates, where, collection_name), min_relevance)
+        candidates += [c for c in fallback if c['id'] not in seen_ids]
+
+    filtered_results = rank_results(candidates, top_k, recency_weight)
     
     # Format context for LLM
     formatted_context = format_context_for_llm(filtered_results)
@@ -72,6 +213,8 @@ def retreive_context(query: str, top_k: int=3, min_relevance: float=0.0) -> Dict
         'query': query,
         'results': filtered_results,
         'formatted_context': formatted_context,
+        'chunk_versions': chunk_versions(filtered_results),
+        'where': where,
         'num_results': len(filtered_results)
     }
 
@@ -85,16 +228,18 @@ if __name__ == "__main__":
     test_queries = [
         "What is your experience?",
         "Tell me about your skills",
-        "What projects have you worked on?"
+        "What projects have you worked on?",
+        "What are your current skills?"
     ]
     
     for query in test_queries:
         print(f"\n🔍 Query: {query}")
         result = retreive_context(query)
-        print(f"   📊 Found {result['num_results']} relevant chunks")
+        print(f"   📊 Found {result['num_results']} relevant chunks (filter: {result['where']})")
         if result['results']:
             for r in result['results']:
-                print(f"   📄 [{r['metadata']['source']}] relevance: {r['relevance_score']:.2f}")
+                print(f"   📄 [{r['metadata']['source']} / {r['metadata'].get('section')}] "
+                      f"relevance: {r['relevance_score']:.2f}, score: {r['score']:.2f}")
                 print(f"      {r['document'][:100]}...")
     
     print("\n✅ Retriever test complete!")
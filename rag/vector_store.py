@@ -1,11 +1,32 @@
 """
 Vector Store - ChromaDB operations for storing and searching document embeddings.
+
+Documents and queries are embedded here, with one embedding model instance
+per process shared by every collection (one per tenant), rather than by
+Chroma, whose default embedding function loads the ONNX model on each call.
+
+A full re-index builds a new versioned collection ("<name>__v<ms>") next to
+the live one and then publishes it: aliases.json in VECTOR_DB_DIR maps each
+collection name to its live version and is replaced atomically, so readers
+in every process switch over on their next query. Older versions are
+garbage-collected after the swap (see gc_collection_versions).
 """
 
 import chromadb
-from chromadb.config import Settings
-from config import VECTOR_DB_DIR
-from typing import List, Dict, Optional
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+from chromadb.errors import NotFoundError
+from config import VECTOR_DB_DIR, VECTOR_STORE_READ_ONLY, EMBEDDING_MODEL, VECTOR_QUANTIZATION
+from typing import List, Dict, Optional, Sequence
+from utils.log import get_logger
+
+logger = get_logger(__name__)
 
 # Initialize ChromaDB client with persistent storage
 client = chromadb.PersistentClient(path=VECTOR_DB_DIR)
@@ -13,16 +34,203 @@ client = chromadb.PersistentClient(path=VECTOR_DB_DIR)
 # Collection name
 COLLECTION_NAME = "career_knowledge"
 
-def get_or_create_collection():
-    """Get or create the career knowledge collection."""
+# Embedding model of collections created with a non-default model in this process
+_collection_models: Dict[str, str] = {}
+
+# Cross-process lock file so only one process writes to Chroma at a time
+WRITE_LOCK_PATH = Path(VECTOR_DB_DIR) / ".write.lock"
+
+# Collection name -> live version, shared by all processes
+ALIASES_PATH = Path(VECTOR_DB_DIR) / "aliases.json"
+VERSION_SEPARATOR = "__v"
+# Versions kept after a swap, including the live one; the previous version
+# stays for queries that resolved it just before the swap
+KEEP_COLLECTION_VERSIONS = int(os.getenv("KEEP_COLLECTION_VERSIONS", "2"))
+
+_aliases: Dict[str, Dict] = {}
+_aliases_mtime: Optional[int] = None
+_aliases_lock = threading.Lock()
+
+
+@contextmanager
+def _write_lock():
+    """
+    Hold an exclusive file lock for the duration of a Chroma write.
+
+    API workers run with VECTOR_STORE_READ_ONLY=1 and never write; indexing
+    runs in a single process (see gunicorn_conf.py), and the lock guards
+    against two indexers running at once.
+    """
+    if VECTOR_STORE_READ_ONLY:
+        raise RuntimeError("Vector store is read-only in this process (VECTOR_STORE_READ_ONLY=1)")
+    try:
+        import fcntl
+    except ImportError:  # Windows: single-process development only
+        yield
+        return
+
+    WRITE_LOCK_PATH.parent.mkdir(parents=True, exist_ok=True)
+    with open(WRITE_LOCK_PATH, "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def _read_aliases() -> Dict[str, Dict]:
+    """The alias file's contents, re-read only when its mtime changes (one stat per call)."""
+    global _aliases, _aliases_mtime
+    try:
+        mtime = ALIASES_PATH.stat().st_mtime_ns
+    except FileNotFoundError:
+        return {}
+    if mtime != _aliases_mtime:
+        with _aliases_lock:
+            try:
+                with open(ALIASES_PATH, "r", encoding="utf-8") as f:
+                    _aliases = json.load(f)
+                _aliases_mtime = mtime
+            except (OSError, ValueError) as e:
+                logger.warning("Could not read %s: %s", ALIASES_PATH, e)
+    return _aliases
+
+def resolve_collection(collection_name: str) -> str:
+    """Live version of a collection, or the name itself if it has never been published."""
+    alias = _read_aliases().get(collection_name)
+    return alias["collection"] if alias else collection_name
+
+def get_published(collection_name: str) -> Optional[Dict]:
+    """Alias entry of a collection: {"collection", "fingerprint", "published_at"}, or None."""
+    return _read_aliases().get(collection_name)
+
+def new_collection_version(collection_name: str) -> str:
+    """Name for a new version of a collection (not yet created)."""
+    return f"{collection_name}{VERSION_SEPARATOR}{time.time_ns() // 1_000_000}"
+
+def publish_collection(collection_name: str, version: str, fingerprint: Optional[str] = None):
+    """
+    Point a collection name at a new version, atomically for every process.
+
+    Args:
+        collection_name: Name queries use (e.g. career_knowledge)
+        version: Fully built collection to serve from now on
+        fingerprint: Knowledge directory fingerprint the version was built from
+    """
+    with _write_lock():
+        try:
+            with open(ALIASES_PATH, "r", encoding="utf-8") as f:
+                aliases = json.load(f)
+        except (FileNotFoundError, ValueError):
+            aliases = {}
+        aliases[collection_name] = {"collection": version, "fingerprint": fingerprint,
+                                    "published_at": time.time()}
+        ALIASES_PATH.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = ALIASES_PATH.with_suffix(".json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(aliases, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, ALIASES_PATH)
+    logger.info("Published %s -> %s", collection_name, version)
+
+def collection_versions(collection_name: str) -> List[str]:
+    """Versions of a collection, oldest first; a pre-versioning collection of the bare name comes first."""
+    names = list_collections()
+    prefix = collection_name + VERSION_SEPARATOR
+    versions = sorted((n for n in names if n.startswith(prefix) and n[len(prefix):].isdigit()),
+                      key=lambda n: int(n[len(prefix):]))
+    return ([collection_name] if collection_name in names else []) + versions
+
+def gc_collection_versions(collection_name: str, keep: int = KEEP_COLLECTION_VERSIONS) -> List[str]:
+    """
+    Delete versions older than the live one, keeping the newest `keep` up to it.
+
+    Versions newer than the live one (a build in progress) are never touched.
+
+    Returns:
+        Names of the deleted collections
+    """
+    live = resolve_collection(collection_name)
+    versions = collection_versions(collection_name)
+    if live not in versions:
+        return []
+    older = versions[:versions.index(live) + 1]
+    stale = older[:max(0, len(older) - keep)]
+    for name in stale:
+        delete_collection(name)
+        if VECTOR_QUANTIZATION != "none":
+            from rag.quantized_store import delete_quantized_index
+            delete_quantized_index(name)
+        logger.info("Garbage-collected collection %s", name)
+    return stale
+
+@lru_cache(maxsize=4)
+def get_embedding_function(model_name: str = EMBEDDING_MODEL):
+    """
+    Embedding function for a model name.
+
+    Returns None for "" (Chroma's default all-MiniLM-L6-v2), otherwise a
+    sentence-transformers embedding function (requires sentence-transformers).
+    """
+    if not model_name:
+        return None
+    from chromadb.utils.embedding_functions import SentenceTransformerEmbeddingFunction
+    return SentenceTransformerEmbeddingFunction(model_name=model_name)
+
+@lru_cache(maxsize=1)
+def _default_embedding_function():
+    from chromadb.utils.embedding_functions import ONNXMiniLM_L6_V2
+    return ONNXMiniLM_L6_V2()
+
+def embed_texts(texts: List[str], collection_name: str = COLLECTION_NAME) -> List:
+    """Embed texts with a collection's embedding model (one shared instance per model)."""
+    model = _collection_models.get(resolve_collection(collection_name), EMBEDDING_MODEL)
+    embedding_function = get_embedding_function(model) or _default_embedding_function()
+    return embedding_function(texts)
+
+def get_or_create_collection(collection_name: str = COLLECTION_NAME, embedding_model: Optional[str] = None):
+    """
+    Get or create a knowledge collection (the career knowledge collection by default).
+
+    Args:
+        collection_name: Collection to open (its live version, once one is published)
+        embedding_model: Embedding model for the collection; later calls for the
+            same collection reuse it. Defaults to EMBEDDING_MODEL.
+    """
+    collection_name = resolve_collection(collection_name)
+    if embedding_model is not None:
+        _collection_models[collection_name] = embedding_model
+    embedding_function = get_embedding_function(_collection_models.get(collection_name, EMBEDDING_MODEL))
+    extra = {"embedding_function": embedding_function} if embedding_function is not None else {}
     collection = client.get_or_create_collection(
-        name=COLLECTION_NAME,
-        metadata={"hnsw:space": "cosine"}
+        name=collection_name,
+        metadata={"hnsw:space": "cosine"},
+        **extra
     )
-    print(f"✅ Loaded existing collection: {COLLECTION_NAME}")
+    logger.debug("Loaded collection %s", collection_name)
     return collection
 
-def add_documents(documents: List[str], metadatas: List[Dict], ids: List[str]):
+def open_collection(collection_name: str = COLLECTION_NAME):
+    """
+    Open a collection for reading.
+
+    Read-only workers (VECTOR_STORE_READ_ONLY) never create a collection, so
+    a collection that hasn't been indexed yet is None there; other processes
+    create it empty, as get_or_create_collection does.
+    """
+    if not VECTOR_STORE_READ_ONLY:
+        return get_or_create_collection(collection_name)
+    collection_name = resolve_collection(collection_name)
+    embedding_function = get_embedding_function(_collection_models.get(collection_name, EMBEDDING_MODEL))
+    extra = {"embedding_function": embedding_function} if embedding_function is not None else {}
+    try:
+        return client.get_collection(name=collection_name, **extra)
+    except NotFoundError:
+        logger.warning("Collection %s doesn't exist yet (read-only worker, not creating it)", collection_name)
+        return None
+
+def add_documents(documents: List[str], metadatas: List[Dict], ids: List[str],
+                  collection_name: str = COLLECTION_NAME, embeddings: Optional[Sequence] = None):
     """
     Add documents to the vector store.
     
@@ -30,70 +238,140 @@ def add_documents(documents: List[str], metadatas: List[Dict], ids: List[str]):
         documents: List of text chunks to embed and store
         metadatas: List of metadata dicts for each document
         ids: List of unique IDs for each document
+        collection_name: Collection to add to
+        embeddings: Precomputed embeddings, one per document (e.g. from an
+            index artifact); documents are embedded here when omitted
     """
-    collection = get_or_create_collection()
-    
-    # ChromaDB handles batching internally, but we'll batch for safety
-    batch_size = 100
-    for i in range(0, len(documents), batch_size):
-        batch_docs = documents[i:i + batch_size]
-        batch_metas = metadatas[i:i + batch_size]
-        batch_ids = ids[i:i + batch_size]
-        
-        collection.add(
-            documents=batch_docs,
-            metadatas=batch_metas,
-            ids=batch_ids
-        )
-        print(f"   📦 Added batch {i // batch_size + 1} ({len(batch_docs)} documents)")
+    with _write_lock():
+        collection = get_or_create_collection(collection_name)
+
+        # ChromaDB handles batching internally, but we'll batch for safety
+        batch_size = 100
+        for i in range(0, len(documents), batch_size):
+            batch_docs = documents[i:i + batch_size]
+            batch_metas = metadatas[i:i + batch_size]
+            batch_ids = ids[i:i + batch_size]
 
-def search_similar(query: str, n_results: int = 3) -> Dict:
+            if embeddings is not None:
+                batch_embeddings = embeddings[i:i + batch_size]
+            else:
+                batch_embeddings = embed_texts(batch_docs, collection_name)
+            collection.add(
+                embeddings=batch_embeddings,
+                documents=batch_docs,
+                metadatas=batch_metas,
+                ids=batch_ids
+            )
+            logger.info("Added batch %d (%d documents)", i // batch_size + 1, len(batch_docs))
+
+def search_similar(query: str, n_results: int = 3, where: Optional[Dict] = None,
+                   collection_name: str = COLLECTION_NAME) -> Dict:
     """
     Search for similar documents using semantic search.
     
     Args:
         query: The search query text
         n_results: Number of results to return
+        where: Optional Chroma metadata filter, e.g. {"section": {"$in": ["skills"]}}
+        collection_name: Collection to search
         
     Returns:
         Dict with documents, metadatas, distances, and ids
     """
-    collection = get_or_create_collection()
+    # Resolve once, so the quantized index and Chroma agree on the version
+    collection_name = resolve_collection(collection_name)
+    if VECTOR_QUANTIZATION != "none":
+        from rag.quantized_store import search_quantized
+        results = search_quantized(query, n_results, where, collection_name)
+        if results is not None:
+            return results
+        logger.warning("No %s index for %s yet, searching Chroma", VECTOR_QUANTIZATION, collection_name)
+
+    collection = open_collection(collection_name)
     
-    # Handle empty collection gracefully
-    if collection.count() == 0:
+    # Handle missing or empty collection gracefully
+    count = collection.count() if collection is not None else 0
+    if count == 0:
         return {'documents': [[]], 'metadatas': [[]], 'distances': [[]], 'ids': [[]]}
     
     # Don't request more results than available
-    actual_n = min(n_results, collection.count())
+    actual_n = min(n_results, count)
     
     results = collection.query(
-        query_texts=[query],
+        query_embeddings=embed_texts([query], collection_name),
         n_results=actual_n,
+        where=where or None,
         include=["documents", "metadatas", "distances"]
     )
     
     return results
 
-def get_collection_stats() -> Dict:
+def content_hash_of(document: str) -> str:
+    """Short content hash of a chunk, stored in its metadata as content_hash."""
+    return hashlib.sha256(document.encode("utf-8")).hexdigest()[:16]
+
+def get_chunk_hashes(collection_name: str = COLLECTION_NAME) -> Dict[str, Optional[str]]:
+    """Get {chunk_id: content_hash} for everything currently indexed."""
+    collection = get_or_create_collection(collection_name)
+    records = collection.get(include=["metadatas"])
+    return {
+        chunk_id: (metadata or {}).get("content_hash")
+        for chunk_id, metadata in zip(records["ids"], records["metadatas"])
+    }
+
+def get_index_version(collection_name: str = COLLECTION_NAME) -> str:
+    """
+    Fingerprint of the indexed content (chunk IDs and text).
+
+    Changes whenever the knowledge base is re-indexed with different
+    content; used to tag warmed cache entries.
+    """
+    collection = open_collection(collection_name)
+    records = collection.get(include=["documents"]) if collection is not None else {"ids": [], "documents": []}
+    digest = hashlib.sha256()
+    for doc_id, document in sorted(zip(records["ids"], records["documents"])):
+        digest.update(doc_id.encode())
+        digest.update(b"\0")
+        digest.update((document or "").encode())
+    return digest.hexdigest()[:16]
+
+def get_collection_stats(collection_name: str = COLLECTION_NAME) -> Dict:
     """Get statistics about the vector store collection."""
-    collection = get_or_create_collection()
+    collection = open_collection(collection_name)
+    if collection is None:
+        return {"collection_name": collection_name, "version": None, "total_documents": 0, "metadata": None}
     
     return {
-        "collection_name": COLLECTION_NAME,
+        "collection_name": collection_name,
+        "version": collection.name,
         "total_documents": collection.count(),
         "metadata": collection.metadata
     }
 
-def reset_collection():
-    """Delete and recreate the collection."""
-    try:
-        client.delete_collection(COLLECTION_NAME)
-        print(f"🗑️  Deleted collection: {COLLECTION_NAME}")
-    except Exception:
-        pass
-    
-    return get_or_create_collection()
+def reset_collection(collection_name: str = COLLECTION_NAME, embedding_model: Optional[str] = None):
+    """
+    Delete and recreate a collection in place (optionally with a different embedding model).
+
+    Queries see an empty collection until it is refilled; the indexer
+    builds a new version and publishes it instead.
+    """
+    with _write_lock():
+        try:
+            client.delete_collection(collection_name)
+            logger.info("Deleted collection %s", collection_name)
+        except Exception:
+            pass
+
+        return get_or_create_collection(collection_name, embedding_model)
+
+def delete_collection(collection_name: str):
+    """Delete a collection if it exists (used for scratch collections)."""
+    with _write_lock():
+        try:
+            client.delete_collection(collection_name)
+        except Exception:
+            pass
+        _collection_models.pop(collection_name, None)
 
 def list_collections():
     """List all collections in the database."""
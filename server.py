@@ -0,0 +1,49 @@
+"""
+Combined server - Gradio UI and widget API in one process.
+
+Mounts the Gradio chat UI (app.py) at GRADIO_PATH inside the FastAPI app
+from api_server.py, so one uvicorn process serves /api/chat, /metrics,
+/admin/* and the UI. Both share one Chroma client, one embedding model,
+one response cache (including its memory tier) and one SQLite database,
+so a question answered in the UI is a cache hit for the widget. Running
+app.py and api_server.py separately loads all of that twice.
+
+Start-up indexes the knowledge base if it is empty (before the API's
+startup hooks tag the index version), warms the response cache in the
+background, and starts the hot-reload watcher (unless
+VECTOR_STORE_READ_ONLY).
+
+Gradio keeps its queue and event state in the process. Under several
+gunicorn workers (gunicorn -c gunicorn_conf.py server:app), the load
+balancer therefore needs sticky sessions for /ui.
+
+Usage: python server.py
+       uvicorn server:app --host 0.0.0.0 --port 8000
+"""
+
+import os
+
+import gradio as gr
+import uvicorn
+
+from api_server import app as api_app
+from app import build_interface, prepare_knowledge_base, start_cache_warming
+
+GRADIO_PATH = os.getenv("GRADIO_PATH", "/ui")
+
+prepare_knowledge_base()
+
+
+@api_app.on_event("startup")
+async def warm_response_cache():
+    """Warm the shared response cache once, for both the UI and the widget API."""
+    start_cache_warming()
+
+
+app = gr.mount_gradio_app(api_app, build_interface(), path=GRADIO_PATH)
+
+if __name__ == "__main__":
+    port = int(os.getenv("PORT", "8000"))
+    print(f"🚀 Starting combined server on http://127.0.0.1:{port}")
+    print(f"💬 Chat UI at http://127.0.0.1:{port}{GRADIO_PATH}, widget API at /api/chat")
+    uvicorn.run(app, host="0.0.0.0", port=port)
@@ -1,117 +1,327 @@
 """
 Cache - Semantic caching for cost optimization
 Stores responses to similar queries to reduce API calls and costs.
+
+Two tiers: a bounded in-process LRU of hot entries in front of DiskCache
+(shared by all workers). Writes go to both tiers; disk entries are stored
+zlib-compressed.
+
+Entries are keyed on the query plus the retrieved chunks' IDs and content
+hashes ("chunk_id@content_hash"), not the formatted context. Re-indexing
+with unchanged chunks keeps every entry warm; invalidate_chunks() deletes
+exactly the entries built on chunks that changed, via a chunk -> key
+reverse index in SQLite.
+
+Each tenant has its own disk cache directory; the memory tier is shared
+and its keys include the tenant ID.
 """
 
-from functools import cache
 import hashlib
 import json
+import os
+import threading
+import time
+import zlib
+from collections import OrderedDict
 from pathlib import Path
-from typing import Optional, Dict
+from typing import Optional, Dict, List, Set
+import logging
 from diskcache import Cache
 from datetime import datetime
+from storage.database import add_cache_chunk_refs, pop_cache_keys_for_chunks
+from storage.tenants import get_tenant
+from utils.log import get_logger, log_event, LOG_SAMPLE_RATE
+from utils.metrics import span, CACHE_LOOKUPS, CACHE_TIER_HITS
+
+# Cache configuration (CACHE_DIR is the default tenant's; see storage/tenants.py)
+CACHE_DIR = os.getenv("CACHE_DIR", "data/cache")
+CACHE_SIZE_LIMIT = int(float(os.getenv("CACHE_SIZE_MB", "50")) * 1024 * 1024)
+CACHE_TTL = int(os.getenv("CACHE_TTL_SECONDS", str(7 * 24 * 60 * 60)))  # 7 days
+CACHE_SQLITE_TIMEOUT = 10 # seconds to wait on a locked cache database
+CACHE_COMPRESS_LEVEL = 6 # zlib level for responses stored on disk
+
+# In-process tier
+MEMORY_CACHE_ENTRIES = int(os.getenv("MEMORY_CACHE_ENTRIES", "512"))
+MEMORY_CACHE_TTL = int(os.getenv("MEMORY_CACHE_TTL_SECONDS", "3600"))  # bounds staleness across workers
+
+logger = get_logger(__name__)
 
-# Cache configuration
-CACHE_DIR = "data/cache"
-CACHE_SIZE_LIMIT = 5 * 1024 * 1024 # 5 MB
-CACHE_TTL = 7 * 24 * 60 * 60 # 7 days
+# One Cache handle per (process, directory); handles must not cross a fork
+_caches = {}
 
 def get_cache():
-    """Get or create the disk cache."""
-    cache_path = Path(CACHE_DIR)
-    cache_path.mkdir(parents=True, exist_ok=True)
-    return Cache(
-        str(cache_path),
-        size_limit=CACHE_SIZE_LIMIT,
-        eviction_policy="least-recently-used",
-    )
-
-def generate_cache_key(query: str, context: str) -> str:
     """
-    Generate a cache key from query and context.
+    Get or create the current tenant's disk cache.
+
+    DiskCache is safe to share between processes: every worker opens its own
+    handle on the same directory and SQLite (WAL mode) arbitrates writes.
+    """
+    cache_dir = get_tenant().cache_dir
+    key = (os.getpid(), cache_dir)
+    cache = _caches.get(key)
+    if cache is None:
+        cache_path = Path(cache_dir)
+        cache_path.mkdir(parents=True, exist_ok=True)
+        cache = Cache(
+            str(cache_path),
+            size_limit=CACHE_SIZE_LIMIT,
+            eviction_policy="least-recently-used",
+            timeout=CACHE_SQLITE_TIMEOUT,
+            sqlite_journal_mode="wal",
+            sqlite_synchronous=1,
+        )
+        _caches[key] = cache
+    return cache
+
+class MemoryTier:
+    """
+    Bounded LRU of hot cache entries, local to this process.
+
+    Lookups are a dict get plus an expiry check. Every change to the order,
+    including a hit's move to the end, takes the lock, so drop_chunks() can
+    walk the entries while lookups run in other threads (hot reload).
+    Keys are (tenant ID, normalized query, tuple of chunk versions).
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> Optional[Dict]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, data = entry
+        with self._lock:
+            if expires_at < time.monotonic():
+                self._entries.pop(key, None)
+                return None
+            if key in self._entries:    # not evicted by another thread meanwhile
+                self._entries.move_to_end(key)
+        return data
+
+    def set(self, key: tuple, data: Dict):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, data)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def drop_chunks(self, tenant_id: str, chunk_ids: Set[str]) -> int:
+        """Remove a tenant's entries built on any of the given chunks."""
+        with self._lock:
+            stale = [
+                key for key in list(self._entries)
+                if key[0] == tenant_id and any(version.rsplit("@", 1)[0] in chunk_ids for version in key[2])
+            ]
+            for key in stale:
+                del self._entries[key]
+        return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_memory = MemoryTier(MEMORY_CACHE_ENTRIES, MEMORY_CACHE_TTL)
+
+# Pre-resolved metric children for the lookup path
+_HITS = CACHE_LOOKUPS.labels("hit")
+_MISSES = CACHE_LOOKUPS.labels("miss")
+_TIER_HITS = {tier: CACHE_TIER_HITS.labels(tier) for tier in ("memory", "disk")}
+_index_versions: Dict[str, str] = {}    # tenant ID -> knowledge index version
+
+# Per-tier lookup statistics for get_cache_stats() (approximate under concurrency)
+_tier_stats = {
+    tier: {"hits": 0, "misses": 0, "lookup_ns": 0}
+    for tier in ("memory", "disk")
+}
+
+
+def set_index_version(version: str):
+    """Record the current tenant's knowledge index version; new entries are tagged with it."""
+    _index_versions[get_tenant().tenant_id] = version
+
+
+def _record_lookup(tier: str, hit: bool, started_ns: int):
+    stats = _tier_stats[tier]
+    stats["hits" if hit else "misses"] += 1
+    stats["lookup_ns"] += time.perf_counter_ns() - started_ns
+
+
+def _compress(data: Dict) -> Dict:
+    """Store the response text zlib-compressed on disk."""
+    stored = dict(data)
+    stored["response"] = zlib.compress(data["response"].encode("utf-8"), CACHE_COMPRESS_LEVEL)
+    stored["compressed"] = True
+    return stored
+
+
+def _decompress(stored: Dict) -> Dict:
+    if not stored.get("compressed"):
+        return stored  # written before compression was added
+    data = dict(stored)
+    data["response"] = zlib.decompress(stored["response"]).decode("utf-8")
+    del data["compressed"]
+    return data
+
+
+def generate_cache_key(query: str, chunk_versions: List[str]) -> str:
+    """
+    Generate a cache key from the query and the retrieved chunks.
     Uses hash to create consistent keys for similar inputs.
     
     Args:
         query: User's query
-        context: Retrieved context
+        chunk_versions: Retrieved chunks as "chunk_id@content_hash" strings
     
     Returns:
         Hash string to use as cache key
     """
-    # Combine query and context for cache key
-    combined = f"{query.lower().strip()}|{context}"
+    # Combine query and chunk versions for cache key
+    combined = f"{query.lower().strip()}|{','.join(chunk_versions)}"
 
     # Generate SHA256 hash
     return hashlib.sha256(combined.encode()).hexdigest()
 
-def get_cached_response(query: str, context: str) -> Optional[str]:
+def get_cached_response(query: str, chunk_versions: List[str], record: bool = True) -> Optional[str]:
     """
-    Try to retrieve a cached response.
+    Try to retrieve a cached response (memory tier first, then disk).
     
     Args:
         query: User's query
-        context: Retrieved context
+        chunk_versions: Retrieved chunks (retreive_context()["chunk_versions"])
+        record: Count the lookup in hit/miss metrics and tier stats; False for
+            internal probes (the cache warmer) that aren't visitor traffic
     
     Returns:
         Cached response dict if found, None otherwise
     """
-    cache = get_cache()
-    cache_key = generate_cache_key(query, context)
+    with span("cache_lookup"):
+        # The memory tier is keyed on the raw strings: a hot hit skips sha256
+        memory_key = (get_tenant().tenant_id, query.lower().strip(), tuple(chunk_versions))
+        started = time.perf_counter_ns()
+        cached = _memory.get(memory_key)
+        if record:
+            _record_lookup("memory", cached is not None, started)
+        tier = "memory"
+
+        if cached is None:
+            tier = "disk"
+            started = time.perf_counter_ns()
+            stored = get_cache().get(generate_cache_key(query, chunk_versions))
+            cached = _decompress(stored) if stored else None
+            if record:
+                _record_lookup("disk", cached is not None, started)
+            if cached:
+                _memory.set(memory_key, cached)
 
-    cached = cache.get(cache_key)
+    if not record:
+        return cached
     if cached:
-        print(f"✅ Cache HIT for query: {query[:50]}...")
+        _HITS.inc()
+        _TIER_HITS[tier].inc()
+        log_event(logger, logging.INFO, "cache_hit", sample_rate=LOG_SAMPLE_RATE, query=query[:50], tier=tier)
         return cached
     
-    print(f"❌ Cache MISS for query: {query[:50]}...")
+    _MISSES.inc()
+    log_event(logger, logging.INFO, "cache_miss", sample_rate=LOG_SAMPLE_RATE, query=query[:50])
     return None
 
-def set_cached_response(query: str, context: str, response: str, metadata: Dict = None):
+def set_cached_response(query: str, chunk_versions: List[str], response: str, metadata: Dict = None):
     """
-    Store a response in the cache.
+    Store a response in both cache tiers (write-through) and index it by chunk.
 
     Args:
         query: User's query
-        context: Retrieved context
+        chunk_versions: Retrieved chunks the response was generated from
         response: LLM response
         metadata: Optional metadata
     """
+    with span("cache_write"):
+        cache_key = generate_cache_key(query, chunk_versions)
+
+        tenant_id = get_tenant().tenant_id
+        metadata = dict(metadata or {})
+        if tenant_id in _index_versions:
+            metadata.setdefault("index_version", _index_versions[tenant_id])
+        cached_data = {
+            "query": query,
+            "response": response,
+            "timestamp": datetime.now().isoformat(),
+            "metadata": metadata
+        }
+
+        _memory.set((tenant_id, query.lower().strip(), tuple(chunk_versions)), cached_data)
+        get_cache().set(cache_key, _compress(cached_data), expire=CACHE_TTL)
+        add_cache_chunk_refs(cache_key, [version.rsplit("@", 1)[0] for version in chunk_versions])
+    log_event(logger, logging.DEBUG, "cache_set", query=query[:50])
+
+def invalidate_chunks(chunk_ids: List[str]) -> int:
+    """
+    Delete cached responses built on any of the given chunks.
+
+    Called by the indexer with the IDs of chunks that were edited or removed.
+    Other processes' memory tiers can't be reached, but their stale entries
+    are keyed on the old content hash and can no longer be hit.
+
+    Returns:
+        Number of disk entries removed
+    """
+    chunk_ids = set(chunk_ids)
+    _memory.drop_chunks(get_tenant().tenant_id, chunk_ids)
     cache = get_cache()
-    cache_key = generate_cache_key(query, context)
+    removed = 0
+    for cache_key in pop_cache_keys_for_chunks(chunk_ids, max_age_seconds=CACHE_TTL):
+        if cache.delete(cache_key):
+            removed += 1
+    logger.info("Invalidated %d cached responses for %d changed chunks", removed, len(chunk_ids))
+    return removed
 
-    cached_data = {
-        "query": query,
-        "response": response,
-        "timestamp": datetime.now().isoformat(),
-        "metadata": metadata or {}
+def _tier_summary(tier: str) -> Dict:
+    stats = _tier_stats[tier]
+    lookups = stats["hits"] + stats["misses"]
+    return {
+        "hits": stats["hits"],
+        "misses": stats["misses"],
+        "hit_ratio": round(stats["hits"] / lookups, 4) if lookups else 0.0,
+        "avg_lookup_us": round(stats["lookup_ns"] / lookups / 1000, 2) if lookups else 0.0,
     }
 
-    cache.set(cache_key, cached_data, expire=CACHE_TTL)
-    print(f"✅ Cache SET for query: {query[:50]}...")
-
 def get_cache_stats() -> Dict:
-    """Get cache statistics."""
+    """Get cache statistics, with hit ratio and lookup latency per tier."""
     cache = get_cache()
 
     return {
         "total_entries": len(cache),
         "size_bytes": cache.volume(),
         "size_mb": round(cache.volume() / (1024 * 1024), 2),
-        "cache_dir": CACHE_DIR
+        "cache_dir": get_tenant().cache_dir,
+        "index_version": _index_versions.get(get_tenant().tenant_id),
+        "memory": dict(_tier_summary("memory"), entries=len(_memory), max_entries=_memory.max_entries),
+        "disk": dict(_tier_summary("disk"), size_limit_mb=round(CACHE_SIZE_LIMIT / (1024 * 1024), 2)),
     }
 
 def clear_cache():
-    """Clear the cache."""
+    """Clear both cache tiers (the memory tier for all tenants, the disk tier for the current one)."""
+    _memory.clear()
     cache = get_cache()
     cache.clear()
-    print(f"🗑️  Cache cleared")
+    logger.info("cache_cleared")
 
 if __name__ == "__main__":
     print("Testing Cache System...")
 
     # Test cache
     test_query = "What is Arpit's experience?"
-    test_context = "Some context here"
+    test_context = ["summary_chunk_0@0123456789abcdef"]
     test_response = "Arpit has extensive experience..."
     
     # Set cache
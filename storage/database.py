@@ -3,19 +3,39 @@ Database operations for storing leads, conversations, and knowledge gaps.
 Uses SQLite for simple, file-based persistence.
 """
 
+import logging
 import sqlite3
-from config import DATABASE_PATH
+from config import SQLITE_BUSY_TIMEOUT_MS
 from datetime import datetime
 from pathlib import Path
+from storage.tenants import get_tenant
+from utils.log import get_logger, log_event
+
+logger = get_logger(__name__)
+
+# Tables are created once per database file per process, not on every connection
+_initialized_paths = set()
 
 def get_connection():
-    """Get a database connection and ensure tables exist."""
-    db_path = Path(DATABASE_PATH)
+    """
+    Get a database connection and ensure tables exist.
+
+    Connections use WAL journaling and a busy timeout so several worker
+    processes can share the database without "database is locked" errors.
+    Each tenant has its own database file (see storage/tenants.py).
+    """
+    database_path = get_tenant().database_path
+    db_path = Path(database_path)
     db_path.parent.mkdir(parents=True, exist_ok=True)
 
-    conn = sqlite3.connect(DATABASE_PATH)
+    conn = sqlite3.connect(database_path, timeout=SQLITE_BUSY_TIMEOUT_MS / 1000)
     conn.row_factory = sqlite3.Row
-    _create_tables(conn)
+    conn.execute(f"PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT_MS}")
+    if database_path not in _initialized_paths:
+        conn.execute("PRAGMA journal_mode = WAL")
+        _create_tables(conn)
+        _initialized_paths.add(database_path)
+    conn.execute("PRAGMA synchronous = NORMAL")
     return conn
 
 def _create_tables(conn):
@@ -41,7 +61,7 @@ def _create_tables(conn):
             timestamp DATETIME DEFAULT CURRENT_TIMESTAMP)
     """)
 
-    # Conversations table (for future use)
+    # Conversations table (append-only message log per session)
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS conversations (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -52,6 +72,85 @@ def _create_tables(conn):
         )
     """)
 
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_conversations_session
+        ON conversations (session_id, id)
+    """)
+
+    # Rolling summary of the turns folded out of each session's history
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS session_summaries (
+            session_id TEXT PRIMARY KEY,
+            summary TEXT NOT NULL,
+            summarized_through INTEGER NOT NULL,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    # Reverse index from knowledge chunk to the cached responses built on it
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS cache_chunk_refs (
+            chunk_id TEXT NOT NULL,
+            cache_key TEXT NOT NULL,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (chunk_id, cache_key)
+        )
+    """)
+
+    # Per-request LLM budget usage (rounds, tokens, cost, why it ran out)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS request_budgets (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            request_id TEXT,
+            cache_hit BOOLEAN NOT NULL,
+            rounds INTEGER NOT NULL,
+            prompt_tokens INTEGER NOT NULL,
+            completion_tokens INTEGER NOT NULL,
+            cost_usd REAL NOT NULL,
+            duration_ms REAL NOT NULL,
+            exhausted_reason TEXT,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    # Model chosen for each LLM-answered turn (core/router.py), with its latency and cost
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS model_routes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            request_id TEXT,
+            query TEXT,
+            model TEXT NOT NULL,
+            reason TEXT NOT NULL,
+            top_score REAL,
+            rounds INTEGER NOT NULL,
+            cost_usd REAL NOT NULL,
+            duration_ms REAL NOT NULL,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    # Session a legacy client's next request continues: keyed by a hash of the
+    # full history that request will send (storage/sessions.py)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS legacy_sessions (
+            history_hash TEXT PRIMARY KEY,
+            session_id TEXT NOT NULL,
+            last_id INTEGER NOT NULL,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    # Last id exported per named incremental export cursor (storage/export.py)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS export_cursors (
+            name TEXT NOT NULL,
+            table_name TEXT NOT NULL,
+            last_id INTEGER NOT NULL,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (name, table_name)
+        )
+    """)
+
     cursor.execute("""
     CREATE TABLE IF NOT EXISTS cache_stats (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -88,7 +187,7 @@ def add_lead(email, name="Name not provided", notes="not provided"):
     conn.commit()
     conn.close()
 
-    print(f"✅ Lead saved to database: {email} (ID: {lead_id})")
+    log_event(logger, logging.INFO, "lead_saved", lead_id=lead_id)
     return lead_id
 
 def add_knowledge_gap(question):
@@ -114,7 +213,7 @@ def add_knowledge_gap(question):
     conn.commit()
     conn.close()
 
-    print(f"✅ Knowledge gap saved to database: {question} (ID: {gap_id})")
+    log_event(logger, logging.INFO, "knowledge_gap_saved", gap_id=gap_id)
     return gap_id
 
 def get_all_leads():
@@ -208,3 +307,348 @@ def get_cache_analytics():
         "cache_misses": result[2],
         "hit_rate_percent": result[3]
     }
+
+
+def add_cache_chunk_refs(cache_key: str, chunk_ids):
+    """Record which knowledge chunks a cached response was built on."""
+    if not chunk_ids:
+        return
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    cursor.executemany(
+        "INSERT OR REPLACE INTO cache_chunk_refs (chunk_id, cache_key) VALUES (?, ?)",
+        [(chunk_id, cache_key) for chunk_id in chunk_ids]
+    )
+
+    conn.commit()
+    conn.close()
+
+
+def pop_cache_keys_for_chunks(chunk_ids, max_age_seconds: int = None):
+    """
+    Get the cache keys built on any of the given chunks and forget them.
+
+    Args:
+        chunk_ids: Chunk IDs that changed
+        max_age_seconds: Also drop references older than this (expired entries)
+
+    Returns:
+        List of distinct cache keys
+    """
+    chunk_ids = list(chunk_ids)
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    keys = []
+    for i in range(0, len(chunk_ids), 500):  # stay under SQLite's variable limit
+        batch = chunk_ids[i:i + 500]
+        placeholders = ",".join("?" * len(batch))
+        cursor.execute(f"SELECT DISTINCT cache_key FROM cache_chunk_refs WHERE chunk_id IN ({placeholders})", batch)
+        keys.extend(row["cache_key"] for row in cursor.fetchall())
+    keys = list(dict.fromkeys(keys))
+
+    for i in range(0, len(keys), 500):
+        batch = keys[i:i + 500]
+        placeholders = ",".join("?" * len(batch))
+        cursor.execute(f"DELETE FROM cache_chunk_refs WHERE cache_key IN ({placeholders})", batch)
+    if max_age_seconds:
+        cursor.execute(
+            "DELETE FROM cache_chunk_refs WHERE timestamp < datetime('now', ?)",
+            (f"-{int(max_age_seconds)} seconds",)
+        )
+
+    conn.commit()
+    conn.close()
+
+    return keys
+
+
+def get_top_queries(limit: int = 20, min_count: int = 2):
+    """
+    Get the most frequently asked user questions.
+
+    Counts user messages from conversations and queries logged in
+    cache_stats, normalized to lower case.
+
+    Args:
+        limit: Maximum number of queries to return
+        min_count: Ignore queries asked fewer times than this
+
+    Returns:
+        List of {"query", "count"} dicts, most frequent first
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    cursor.execute("""
+        SELECT LOWER(TRIM(query)) AS query, COUNT(*) AS count FROM (
+            SELECT message AS query FROM conversations WHERE role = 'user'
+            UNION ALL
+            SELECT query FROM cache_stats
+        )
+        WHERE query IS NOT NULL AND query != ''
+        GROUP BY LOWER(TRIM(query))
+        HAVING COUNT(*) >= ?
+        ORDER BY count DESC
+        LIMIT ?
+    """, (min_count, limit))
+    rows = cursor.fetchall()
+    conn.close()
+
+    return [{"query": row["query"], "count": row["count"]} for row in rows]
+
+
+def add_request_budget(request_id, cache_hit: bool, usage: dict):
+    """
+    Record a request's LLM budget usage.
+
+    Args:
+        request_id: Request ID from the API (None for Gradio)
+        cache_hit: Whether the response came from the cache
+        usage: RequestBudget.to_dict() output
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    cursor.execute("""
+        INSERT INTO request_budgets
+            (request_id, cache_hit, rounds, prompt_tokens, completion_tokens, cost_usd, duration_ms, exhausted_reason)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, (
+        request_id, cache_hit, usage["rounds"], usage["prompt_tokens"], usage["completion_tokens"],
+        usage["cost_usd"], usage["duration_ms"], usage["exhausted_reason"]
+    ))
+
+    conn.commit()
+    conn.close()
+
+
+def get_budget_analytics():
+    """Get aggregate LLM budget usage across requests."""
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    cursor.execute("""
+        SELECT
+            COUNT(*) AS total_requests,
+            ROUND(AVG(rounds), 2) AS avg_rounds,
+            MAX(rounds) AS max_rounds,
+            SUM(prompt_tokens) AS prompt_tokens,
+            SUM(completion_tokens) AS completion_tokens,
+            ROUND(SUM(cost_usd), 4) AS total_cost_usd,
+            SUM(CASE WHEN exhausted_reason IS NOT NULL THEN 1 ELSE 0 END) AS exhausted
+        FROM request_budgets
+    """)
+    result = dict(cursor.fetchone())
+
+    cursor.execute("""
+        SELECT exhausted_reason, COUNT(*) AS count FROM request_budgets
+        WHERE exhausted_reason IS NOT NULL GROUP BY exhausted_reason
+    """)
+    result["exhausted_by_reason"] = {row["exhausted_reason"]: row["count"] for row in cursor.fetchall()}
+    conn.close()
+
+    return result
+
+
+def add_model_route(request_id, query: str, model: str, reason: str, top_score: float, usage: dict):
+    """
+    Record which model answered a turn and why.
+
+    Args:
+        request_id: Request ID from the API (None for Gradio)
+        query: The user's message
+        model: Model that produced the answer (after any escalation)
+        reason: Router reason (see core/router.py)
+        top_score: Best retrieval score the decision saw
+        usage: RequestBudget.to_dict() output
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    cursor.execute("""
+        INSERT INTO model_routes (request_id, query, model, reason, top_score, rounds, cost_usd, duration_ms)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, (request_id, query, model, reason, top_score, usage["rounds"], usage["cost_usd"], usage["duration_ms"]))
+
+    conn.commit()
+    conn.close()
+
+
+def get_routing_analytics():
+    """Get turns, latency and cost per model, and turns per routing reason."""
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    cursor.execute("""
+        SELECT model, COUNT(*) AS turns, ROUND(AVG(duration_ms), 1) AS avg_duration_ms,
+               ROUND(SUM(cost_usd), 6) AS total_cost_usd, ROUND(AVG(cost_usd), 6) AS avg_cost_usd
+        FROM model_routes GROUP BY model ORDER BY turns DESC
+    """)
+    models = [dict(row) for row in cursor.fetchall()]
+
+    cursor.execute("""
+        SELECT model, reason, COUNT(*) AS turns FROM model_routes
+        GROUP BY model, reason ORDER BY turns DESC
+    """)
+    reasons = [dict(row) for row in cursor.fetchall()]
+    conn.close()
+
+    return {"models": models, "reasons": reasons}
+
+
+def get_export_cursor(name: str, table_name: str) -> int:
+    """Last id exported under a named incremental cursor (0 if it has never run)."""
+    conn = get_connection()
+    row = conn.execute(
+        "SELECT last_id FROM export_cursors WHERE name = ? AND table_name = ?", (name, table_name)
+    ).fetchone()
+    conn.close()
+    return row["last_id"] if row else 0
+
+
+def save_export_cursor(name: str, table_name: str, last_id: int):
+    """Record the last id a completed export under a named cursor covered."""
+    conn = get_connection()
+    conn.execute("""
+        INSERT INTO export_cursors (name, table_name, last_id, updated_at) VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT (name, table_name) DO UPDATE SET last_id = excluded.last_id, updated_at = excluded.updated_at
+    """, (name, table_name, last_id))
+    conn.commit()
+    conn.close()
+
+
+def get_export_cursors():
+    """All named export cursors."""
+    conn = get_connection()
+    rows = conn.execute("SELECT * FROM export_cursors ORDER BY name, table_name").fetchall()
+    conn.close()
+    return [dict(row) for row in rows]
+
+
+def add_conversation_messages(session_id: str, messages):
+    """
+    Append messages to a session's conversation log.
+
+    Args:
+        session_id: Session identifier
+        messages: List of (role, content) tuples in order
+
+    Returns:
+        List of inserted row IDs
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    ids = []
+    for role, content in messages:
+        cursor.execute(
+            "INSERT INTO conversations (session_id, message, role) VALUES (?, ?, ?)",
+            (session_id, content, role)
+        )
+        ids.append(cursor.lastrowid)
+
+    conn.commit()
+    conn.close()
+    return ids
+
+
+def get_conversation_messages(session_id: str, after_id: int = 0):
+    """Get a session's messages with ID greater than after_id, oldest first."""
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    cursor.execute(
+        "SELECT id, role, message FROM conversations WHERE session_id = ? AND id > ? ORDER BY id",
+        (session_id, after_id)
+    )
+    rows = cursor.fetchall()
+    conn.close()
+
+    return [{"id": row["id"], "role": row["role"], "content": row["message"]} for row in rows]
+
+
+def get_last_message_id(session_id: str) -> int:
+    """Get the ID of a session's newest message (0 if none)."""
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    cursor.execute("SELECT MAX(id) FROM conversations WHERE session_id = ?", (session_id,))
+    last_id = cursor.fetchone()[0]
+    conn.close()
+
+    return last_id or 0
+
+
+def get_session_summary(session_id: str):
+    """Get a session's rolling summary, or None if it has not been summarized yet."""
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    cursor.execute(
+        "SELECT summary, summarized_through FROM session_summaries WHERE session_id = ?",
+        (session_id,)
+    )
+    row = cursor.fetchone()
+    conn.close()
+
+    return dict(row) if row else None
+
+
+def save_session_summary(session_id: str, summary: str, summarized_through: int):
+    """Insert or update a session's rolling summary."""
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    cursor.execute("""
+        INSERT INTO session_summaries (session_id, summary, summarized_through, updated_at)
+        VALUES (?, ?, ?, datetime('now'))
+        ON CONFLICT(session_id) DO UPDATE SET
+            summary = excluded.summary,
+            summarized_through = excluded.summarized_through,
+            updated_at = excluded.updated_at
+    """, (session_id, summary, summarized_through))
+
+    conn.commit()
+    conn.close()
+
+
+def pop_legacy_session(history_hash: str):
+    """
+    Claim the session recorded for a legacy client's history.
+
+    Returns:
+        (session_id, last_id) or None; each entry is returned at most once
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    cursor.execute("SELECT session_id, last_id FROM legacy_sessions WHERE history_hash = ?", (history_hash,))
+    row = cursor.fetchone()
+    if row:
+        cursor.execute("DELETE FROM legacy_sessions WHERE history_hash = ?", (history_hash,))
+        if cursor.rowcount == 0:    # claimed by another worker in the meantime
+            row = None
+    conn.commit()
+    conn.close()
+
+    return (row["session_id"], row["last_id"]) if row else None
+
+
+def save_legacy_session(history_hash: str, session_id: str, last_id: int):
+    """Record the session (and its newest message ID) a legacy client's next request continues."""
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    cursor.execute("""
+        INSERT INTO legacy_sessions (history_hash, session_id, last_id, updated_at)
+        VALUES (?, ?, ?, datetime('now'))
+        ON CONFLICT(history_hash) DO UPDATE SET
+            session_id = excluded.session_id,
+            last_id = excluded.last_id,
+            updated_at = excluded.updated_at
+    """, (history_hash, session_id, last_id))
+
+    conn.commit()
+    conn.close()
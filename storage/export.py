@@ -0,0 +1,233 @@
+"""
+Export - stream leads, knowledge gaps and analytics tables out of SQLite.
+
+Rows are read in fixed-size chunks by keyset pagination on the id primary
+key (`WHERE id > ? ORDER BY id LIMIT ?`). Each chunk is encoded and yielded
+before the next is read, so memory stays flat however large the table is.
+Each chunk uses its own short-lived connection, so an export never holds a
+read transaction open, and the stream can be consumed from any thread (as
+Starlette's StreamingResponse does).
+
+An export covers the rows that exist when it starts: ids above since_id, up
+to the table's max id at that moment, optionally within a timestamp range.
+That max id is the export's next_since. Pass it back as since_id for the
+next incremental export, or name a cursor to have it saved when the export
+completes (export_cursors table).
+
+Formats: csv, ndjson, and parquet (one row group per chunk; needs pyarrow).
+
+Usage:
+    export = TableExport("leads", "csv", cursor_name="crm-sync")
+    for block in export:
+        out.write(block)
+"""
+
+import csv
+import io
+import json
+import os
+import sqlite3
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional
+
+from storage.database import get_connection, get_export_cursor, save_export_cursor
+from storage.tenants import get_tenant, tenant_context
+from utils.log import get_logger
+
+logger = get_logger(__name__)
+
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", "5000"))
+
+# Export name -> table
+EXPORT_TABLES = {
+    "leads": "leads",
+    "gaps": "knowledge_gaps",
+    "conversations": "conversations",
+    "cache_stats": "cache_stats",
+    "budgets": "request_budgets",
+    "routes": "model_routes",
+}
+EXPORT_FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+# SQLite declared type -> Parquet column type
+_PARQUET_TYPES = {"INTEGER": "int64", "REAL": "float64", "BOOLEAN": "bool"}
+_PARQUET_CASTS = {"int64": int, "double": float, "bool": bool}
+
+
+class ExportError(ValueError):
+    """Unknown table or format, bad time range, or a missing optional dependency."""
+
+
+def parse_timestamp(value: Optional[str]) -> Optional[str]:
+    """
+    Normalize an ISO date or datetime to SQLite's CURRENT_TIMESTAMP format (UTC).
+
+    Raises:
+        ExportError: If the value isn't an ISO date or datetime
+    """
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        raise ExportError(f"Not an ISO date or datetime: {value}")
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc)
+    return parsed.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _columns(table: str) -> List[Dict]:
+    conn = get_connection()
+    columns = [{"name": row["name"], "type": (row["type"] or "").upper()}
+               for row in conn.execute(f"PRAGMA table_info({table})")]
+    conn.close()
+    return columns
+
+
+def iter_row_chunks(table: str, since_id: int = 0, until_id: Optional[int] = None, start: Optional[str] = None,
+                    end: Optional[str] = None, chunk_rows: int = EXPORT_CHUNK_ROWS,
+                    newest_first: bool = False) -> Iterator[List[sqlite3.Row]]:
+    """
+    Yield a table's rows in chunks of at most chunk_rows, by id.
+
+    Args:
+        table: SQLite table (a value of EXPORT_TABLES)
+        since_id: Only rows with a larger id
+        until_id: Only rows up to this id (default: no limit)
+        start: Only rows at or after this timestamp (SQLite format, see parse_timestamp)
+        end: Only rows before this timestamp
+        chunk_rows: Rows per chunk
+        newest_first: Descending id order (for viewing rather than exporting)
+    """
+    filters, params = ["id > ?"], [since_id]
+    if until_id is not None:
+        filters.append("id <= ?")
+        params.append(until_id)
+    if start:
+        filters.append("timestamp >= ?")
+        params.append(start)
+    if end:
+        filters.append("timestamp < ?")
+        params.append(end)
+    keyset = "id < ?" if newest_first else "id > ?"
+    order = "DESC" if newest_first else "ASC"
+    last_id = None
+    while True:
+        where = filters + ([keyset] if last_id is not None else [])
+        conn = get_connection()
+        try:
+            rows = conn.execute(
+                f"SELECT * FROM {table} WHERE {' AND '.join(where)} ORDER BY id {order} LIMIT ?",
+                params + ([last_id] if last_id is not None else []) + [chunk_rows],
+            ).fetchall()
+        finally:
+            conn.close()
+        if not rows:
+            return
+        last_id = rows[-1]["id"]
+        yield rows
+        if len(rows) < chunk_rows:
+            return
+
+
+class TableExport:
+    """
+    One streaming export of a table; iterate it for the encoded bytes.
+
+    Attributes set on creation: media_type, filename, next_since (the id to
+    pass as since_id next time). rows counts the rows exported so far.
+    """
+
+    def __init__(self, name: str, fmt: str = "csv", since_id: Optional[int] = None, start: Optional[str] = None,
+                 end: Optional[str] = None, cursor_name: Optional[str] = None,
+                 chunk_rows: int = EXPORT_CHUNK_ROWS):
+        if name not in EXPORT_TABLES:
+            raise ExportError(f"Unknown table {name!r}; choose from {', '.join(EXPORT_TABLES)}")
+        if fmt not in EXPORT_FORMATS:
+            raise ExportError(f"Unknown format {fmt!r}; choose from {', '.join(EXPORT_FORMATS)}")
+        if fmt == "parquet":
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                raise ExportError("Parquet export needs pyarrow (pip install pyarrow)")
+        self.name = name
+        self.table = EXPORT_TABLES[name]
+        self.fmt = fmt
+        self.start = parse_timestamp(start)
+        self.end = parse_timestamp(end)
+        self.cursor_name = cursor_name
+        self.chunk_rows = chunk_rows
+        self.tenant_id = get_tenant().tenant_id      # chunks may be read from other threads
+        self.columns = _columns(self.table)
+
+        if since_id is None:
+            since_id = get_export_cursor(cursor_name, name) if cursor_name else 0
+        self.since_id = since_id
+        conn = get_connection()
+        self.next_since = max(conn.execute(f"SELECT MAX(id) FROM {self.table}").fetchone()[0] or 0, since_id)
+        conn.close()
+        self.media_type, extension = EXPORT_FORMATS[fmt]
+        self.filename = f"{name}_{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')}.{extension}"
+        self.rows = 0
+
+    def _chunks(self) -> Iterator[List[sqlite3.Row]]:
+        chunks = iter_row_chunks(self.table, self.since_id, self.next_since, self.start, self.end, self.chunk_rows)
+        while True:
+            with tenant_context(self.tenant_id):
+                chunk = next(chunks, None)
+            if chunk is None:
+                return
+            self.rows += len(chunk)
+            yield chunk
+
+    def _csv(self) -> Iterator[bytes]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow([column["name"] for column in self.columns])
+        for chunk in self._chunks():
+            writer.writerows(map(tuple, chunk))
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode("utf-8")     # header of an empty export
+
+    def _ndjson(self) -> Iterator[bytes]:
+        names = [column["name"] for column in self.columns]
+        for chunk in self._chunks():
+            yield "".join(json.dumps(dict(zip(names, row)), ensure_ascii=False) + "\n" for row in chunk).encode("utf-8")
+
+    def _parquet(self) -> Iterator[bytes]:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = pa.schema([(column["name"], _PARQUET_TYPES.get(column["type"], "string"))
+                            for column in self.columns])
+        sink = io.BytesIO()
+        writer = pq.ParquetWriter(sink, schema)
+        try:
+            for chunk in self._chunks():
+                columns = list(zip(*chunk))
+                arrays = [pa.array([None if v is None else _PARQUET_CASTS.get(str(field.type), str)(v)
+                                    for v in values], field.type)
+                          for field, values in zip(schema, columns)]
+                writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+                yield sink.getvalue()
+                sink.seek(0)
+                sink.truncate()
+        finally:
+            writer.close()
+        yield sink.getvalue()      # footer
+
+    def __iter__(self) -> Iterator[bytes]:
+        encode = {"csv": self._csv, "ndjson": self._ndjson, "parquet": self._parquet}[self.fmt]
+        yield from encode()
+        if self.cursor_name:
+            with tenant_context(self.tenant_id):
+                save_export_cursor(self.cursor_name, self.name, self.next_since)
+        logger.info("Exported %d %s rows as %s (ids %d..%d)", self.rows, self.name, self.fmt,
+                    self.since_id, self.next_since)
@@ -0,0 +1,214 @@
+"""
+Sessions - server-side conversation history for the widget API.
+Messages are appended to the conversations table; hot sessions are kept in
+an in-memory LRU, and older turns are folded into a rolling summary so the
+history sent to the LLM stays bounded. Sessions belong to the current
+tenant (storage/tenants.py): its database, and a tenant-scoped LRU key.
+
+Legacy clients send no session ID, only their whole history on every
+request. After each of their turns the session is recorded under a hash
+of the history the next request will carry, so that request continues
+the same session instead of storing the whole history again.
+"""
+
+import hashlib
+import threading
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Tuple
+
+from storage.database import (
+    add_conversation_messages,
+    get_conversation_messages,
+    get_last_message_id,
+    get_session_summary,
+    pop_legacy_session,
+    save_legacy_session,
+    save_session_summary,
+)
+from storage.tenants import get_tenant
+from utils.log import get_logger
+
+# Session configuration
+SESSION_CACHE_SIZE = 1000       # hot sessions kept in memory
+SESSION_MAX_MESSAGES = 12       # verbatim messages before older ones are summarized
+SESSION_KEEP_MESSAGES = 6       # verbatim messages kept after summarizing
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class Session:
+    """A conversation: rolling summary plus the messages not yet summarized."""
+    session_id: str
+    summary: str = ""
+    summarized_through: int = 0
+    messages: List[Dict] = field(default_factory=list)
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    @property
+    def last_id(self) -> int:
+        return self.messages[-1]["id"] if self.messages else self.summarized_through
+
+
+_sessions: "OrderedDict[tuple, Session]" = OrderedDict()   # (tenant ID, session ID) -> Session
+_sessions_lock = threading.Lock()
+
+
+def new_session_id() -> str:
+    """Generate a new random session ID."""
+    return uuid.uuid4().hex
+
+
+def _load_from_db(session_id: str) -> Session:
+    summary_row = get_session_summary(session_id)
+    session = Session(session_id=session_id)
+    if summary_row:
+        session.summary = summary_row["summary"]
+        session.summarized_through = summary_row["summarized_through"]
+    session.messages = get_conversation_messages(session_id, after_id=session.summarized_through)
+    return session
+
+
+def get_session(session_id: str) -> Session:
+    """
+    Get a session from the LRU, loading it from SQLite on a miss.
+
+    A cached session is checked against the newest row ID in SQLite, so
+    turns written by another worker process are picked up.
+    """
+    key = (get_tenant().tenant_id, session_id)
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is not None:
+            _sessions.move_to_end(key)
+
+    if session is None:
+        session = _load_from_db(session_id)
+        with _sessions_lock:
+            session = _sessions.setdefault(key, session)
+            while len(_sessions) > SESSION_CACHE_SIZE:
+                _sessions.popitem(last=False)
+        return session
+
+    if get_last_message_id(session_id) > session.last_id:
+        with session.lock:
+            session.messages = get_conversation_messages(session_id, after_id=session.summarized_through)
+    return session
+
+
+def get_history(session_id: str) -> List[Dict]:
+    """
+    Get the history to send to the LLM: rolling summary (if any) plus recent messages.
+
+    Returns:
+        List of {"role", "content"} dicts
+    """
+    session = get_session(session_id)
+    with session.lock:
+        history = []
+        if session.summary:
+            history.append({
+                "role": "system",
+                "content": f"Summary of the earlier conversation: {session.summary}"
+            })
+        history.extend({"role": m["role"], "content": m["content"]} for m in session.messages)
+    return history
+
+
+def append_turn(session_id: str, user_message: str, assistant_message: str):
+    """Append one user/assistant exchange to the session log."""
+    session = get_session(session_id)
+    pairs = [("user", user_message), ("assistant", assistant_message)]
+    ids = add_conversation_messages(session_id, pairs)
+    with session.lock:
+        session.messages.extend(
+            {"id": row_id, "role": role, "content": content}
+            for row_id, (role, content) in zip(ids, pairs)
+        )
+
+
+def seed_history(session_id: str, history: List[Dict]):
+    """Store history sent by a legacy client so later turns can omit it."""
+    pairs = [(m["role"], m["content"]) for m in history if m.get("content")]
+    if pairs:
+        add_conversation_messages(session_id, pairs)
+
+
+def _history_hash(history: List[Tuple[str, str]]) -> str:
+    digest = hashlib.sha256()
+    for user_message, assistant_message in history:
+        digest.update(f"{len(user_message)}:{user_message}{len(assistant_message)}:{assistant_message}".encode())
+    return digest.hexdigest()
+
+
+def legacy_session(history: List[Tuple[str, str]]) -> str:
+    """
+    Session for a request from a legacy client (history, no session ID).
+
+    Continues the session this history's previous turn was stored in if it
+    hasn't moved on since (a resent or forked conversation gets its own).
+    Otherwise starts a new session seeded with the history, once.
+
+    Args:
+        history: The [user, assistant] pairs the client sent
+
+    Returns:
+        Session ID
+    """
+    recorded = pop_legacy_session(_history_hash(history))
+    if recorded and get_last_message_id(recorded[0]) == recorded[1]:
+        return recorded[0]
+
+    session_id = new_session_id()
+    seed_history(session_id, [
+        {"role": role, "content": content}
+        for user_message, assistant_message in history
+        for role, content in (("user", user_message), ("assistant", assistant_message))
+    ])
+    return session_id
+
+
+def remember_legacy_session(session_id: str, history: List[Tuple[str, str]]):
+    """
+    Record a legacy client's session for its next request.
+
+    Args:
+        session_id: Session the turn was appended to
+        history: The history the client will send next (this turn included)
+    """
+    save_legacy_session(_history_hash(history), session_id, get_last_message_id(session_id))
+
+
+def compact_session(session_id: str, summarizer: Callable[[str, List[Dict]], str]):
+    """
+    Fold the oldest messages into the rolling summary once the session is long.
+
+    Meant to run after the response has been sent (FastAPI background task).
+
+    Args:
+        session_id: Session to compact
+        summarizer: summarizer(previous_summary, messages) -> new summary
+    """
+    session = get_session(session_id)
+    with session.lock:
+        if len(session.messages) <= SESSION_MAX_MESSAGES:
+            return
+        to_fold = session.messages[:-SESSION_KEEP_MESSAGES]
+        previous_summary = session.summary
+
+    summary = summarizer(previous_summary, [{"role": m["role"], "content": m["content"]} for m in to_fold])
+    through = to_fold[-1]["id"]
+    save_session_summary(session_id, summary, through)
+
+    with session.lock:
+        session.summary = summary
+        session.summarized_through = through
+        session.messages = [m for m in session.messages if m["id"] > through]
+    logger.debug("Compacted session %s through message %d", session_id, through)
+
+
+def get_session_count() -> int:
+    """Number of sessions currently held in memory."""
+    return len(_sessions)
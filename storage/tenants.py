@@ -0,0 +1,139 @@
+"""
+Tenants - several personas and knowledge bases served by one process.
+
+The tenant for the current request is held in a context variable (like the
+request ID in utils.log), so storage and retrieval pick their paths from it
+without threading a tenant argument through every call.
+
+The default tenant is the one configured in config.py and keeps the original
+paths. Each other tenant lives in TENANTS_DIR/<tenant_id>/:
+    tenant.json    {"assistant_name": "...", "assistant_email": "..."}
+    knowledge/     documents to index
+    leads.db       leads, conversations and analytics (SQLite)
+    cache/         response cache (DiskCache)
+and gets its own Chroma collection in the shared vector store. New tenant
+directories are picked up without a restart.
+
+Usage:
+    from storage.tenants import get_tenant, tenant_context
+    with tenant_context("acme"):
+        get_tenant().database_path
+"""
+
+import contextvars
+import json
+import os
+import re
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from config import ASSISTANT_NAME, ASSISTANT_EMAIL, KNOWLEDGE_DIR, DATABASE_PATH, TENANTS_DIR
+
+# Tenant configuration
+DEFAULT_TENANT_ID = "default"
+_TENANT_ID = re.compile(r"^[a-z0-9][a-z0-9_-]{0,62}$")
+
+# Matches storage.cache.CACHE_DIR and rag.vector_store.COLLECTION_NAME (not
+# imported: both modules import this one)
+DEFAULT_CACHE_DIR = os.getenv("CACHE_DIR", "data/cache")
+DEFAULT_COLLECTION_NAME = "career_knowledge"
+
+
+@dataclass(frozen=True)
+class Tenant:
+    """Persona and storage locations of one tenant."""
+    tenant_id: str
+    assistant_name: str
+    assistant_email: str
+    knowledge_dir: str
+    database_path: str
+    cache_dir: str
+    collection_name: str
+
+
+DEFAULT_TENANT = Tenant(
+    tenant_id=DEFAULT_TENANT_ID,
+    assistant_name=ASSISTANT_NAME,
+    assistant_email=ASSISTANT_EMAIL,
+    knowledge_dir=KNOWLEDGE_DIR,
+    database_path=DATABASE_PATH,
+    cache_dir=DEFAULT_CACHE_DIR,
+    collection_name=DEFAULT_COLLECTION_NAME,
+)
+
+_current = contextvars.ContextVar("tenant", default=DEFAULT_TENANT)
+_tenants: Dict[str, Tenant] = {DEFAULT_TENANT_ID: DEFAULT_TENANT}
+_tenants_lock = threading.Lock()
+
+
+class UnknownTenantError(KeyError):
+    """Raised for a tenant ID with no tenant directory."""
+
+
+def _load_tenant(tenant_id: str) -> Tenant:
+    tenant_dir = Path(TENANTS_DIR) / tenant_id
+    config_path = tenant_dir / "tenant.json"
+    if not config_path.exists():
+        raise UnknownTenantError(tenant_id)
+    with open(config_path, "r", encoding="utf-8") as f:
+        settings = json.load(f)
+    return Tenant(
+        tenant_id=tenant_id,
+        assistant_name=settings["assistant_name"],
+        assistant_email=settings.get("assistant_email", ""),
+        knowledge_dir=str(tenant_dir / "knowledge"),
+        database_path=str(tenant_dir / "leads.db"),
+        cache_dir=str(tenant_dir / "cache"),
+        collection_name=f"{DEFAULT_COLLECTION_NAME}__{tenant_id}",
+    )
+
+
+def get_tenant_config(tenant_id: Optional[str]) -> Tenant:
+    """
+    Look up a tenant by ID (None means the default tenant).
+
+    Raises:
+        UnknownTenantError: if the ID is malformed or has no tenant directory
+    """
+    tenant_id = tenant_id or DEFAULT_TENANT_ID
+    tenant = _tenants.get(tenant_id)
+    if tenant is not None:
+        return tenant
+    if not _TENANT_ID.match(tenant_id):
+        raise UnknownTenantError(tenant_id)
+    tenant = _load_tenant(tenant_id)
+    with _tenants_lock:
+        return _tenants.setdefault(tenant_id, tenant)
+
+
+def list_tenants() -> List[str]:
+    """IDs of the default tenant and every tenant directory."""
+    tenants_dir = Path(TENANTS_DIR)
+    found = sorted(p.name for p in tenants_dir.iterdir()
+                   if (p / "tenant.json").exists() and _TENANT_ID.match(p.name)) if tenants_dir.exists() else []
+    return [DEFAULT_TENANT_ID] + [t for t in found if t != DEFAULT_TENANT_ID]
+
+
+def set_tenant(tenant_id: Optional[str]) -> Tenant:
+    """Bind a tenant to the current context (the default tenant if None)."""
+    tenant = get_tenant_config(tenant_id)
+    _current.set(tenant)
+    return tenant
+
+
+def get_tenant() -> Tenant:
+    """Return the tenant bound to the current context."""
+    return _current.get()
+
+
+@contextmanager
+def tenant_context(tenant_id: Optional[str]):
+    """Run a block as a tenant (indexing, warming and benchmarks outside a request)."""
+    token = _current.set(get_tenant_config(tenant_id))
+    try:
+        yield _current.get()
+    finally:
+        _current.reset(token)
@@ -0,0 +1,172 @@
+"""
+Compression - Brotli or gzip response compression for the API.
+
+CompressionMiddleware is a plain ASGI middleware. Clients that accept `br`
+get Brotli when the optional `brotli` package is installed, other clients
+that accept `gzip` get gzip, and the rest get the body as is. It handles
+JSON, HTML and streamed responses (exports, the Gradio UI) alike,
+compressing chunk by chunk and flushing each one so streams stay live.
+Chunks of COMPRESSION_THREAD_BYTES or more are compressed in a worker
+thread to keep the event loop free.
+
+Bodies under COMPRESSION_MIN_BYTES are sent as is, as are responses that
+already have a Content-Encoding, Server-Sent Events, and content that is
+already compressed (images, archives, Parquet).
+
+Levels are tuned for dynamic responses rather than maximum ratio: gzip 6
+and Brotli 5 compress text nearly as well as the maximum levels at a
+fraction of the CPU time.
+
+Usage:
+    app.add_middleware(CompressionMiddleware)
+"""
+
+import os
+import zlib
+from typing import Optional, Set
+
+import anyio.to_thread
+
+try:
+    import brotli
+except ImportError:     # optional: gzip only
+    brotli = None
+
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "500"))
+COMPRESSION_THREAD_BYTES = 128 * 1024
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "5"))
+
+# Media types never compressed ("type/*" matches a whole type)
+EXCLUDED_CONTENT_TYPES = {
+    "text/event-stream", "application/gzip", "application/x-gzip", "application/zip",
+    "application/vnd.apache.parquet", "image/*", "audio/*", "video/*", "font/woff", "font/woff2",
+}
+
+
+def accepted_encodings(accept_encoding: str) -> Set[str]:
+    """Codings an Accept-Encoding header allows (q=0 excluded)."""
+    accepted = set()
+    for item in accept_encoding.lower().split(","):
+        coding, _, params = item.partition(";")
+        quality = params.strip()
+        if quality.startswith("q="):
+            try:
+                if float(quality[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        if coding.strip():
+            accepted.add(coding.strip())
+    return accepted
+
+
+def _excluded(content_type: str) -> bool:
+    media_type = content_type.partition(";")[0].strip().lower()
+    return media_type in EXCLUDED_CONTENT_TYPES or f"{media_type.partition('/')[0]}/*" in EXCLUDED_CONTENT_TYPES
+
+
+class _Compressor:
+    """Streaming gzip or Brotli encoder."""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(mode=brotli.MODE_TEXT, quality=brotli_quality)
+        else:
+            self._gzip = zlib.compressobj(gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes, last: bool) -> bytes:
+        if self.encoding == "br":
+            return self._brotli.process(data) + (self._brotli.finish() if last else self._brotli.flush())
+        return self._gzip.compress(data) + self._gzip.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+
+
+class _Responder:
+    """Wraps one response's send(): decides on the first body chunk whether to compress."""
+
+    def __init__(self, send, encoding: Optional[str], middleware: "CompressionMiddleware"):
+        self.send = send
+        self.encoding = encoding
+        self.middleware = middleware
+        self.start: Optional[dict] = None
+        self.passthrough = False
+        self.compressor: Optional[_Compressor] = None
+
+    async def _compress(self, body: bytes, last: bool) -> bytes:
+        if len(body) >= COMPRESSION_THREAD_BYTES:
+            return await anyio.to_thread.run_sync(self.compressor.compress, body, last)
+        return self.compressor.compress(body, last)
+
+    def _set_headers(self, content_length: Optional[int]):
+        """Add Vary: Accept-Encoding; when compressing, set Content-Encoding and the new length."""
+        dropped = (b"vary", b"content-length") if self.compressor else (b"vary",)
+        headers = [(k, v) for k, v in self.start["headers"] if k.lower() not in dropped]
+        vary = [v.decode("latin-1") for k, v in self.start["headers"] if k.lower() == b"vary"]
+        if not any("accept-encoding" in v.lower() or v.strip() == "*" for v in vary):
+            vary.append("Accept-Encoding")
+        headers.append((b"vary", ", ".join(vary).encode("latin-1")))
+        if self.compressor:
+            headers.append((b"content-encoding", self.compressor.encoding.encode("latin-1")))
+            if content_length is not None:
+                headers.append((b"content-length", str(content_length).encode("latin-1")))
+        self.start["headers"] = headers
+
+    async def __call__(self, message: dict):
+        if message["type"] == "http.response.start":
+            self.start = message
+            headers = {k.lower(): v.decode("latin-1") for k, v in message.get("headers", [])}
+            self.passthrough = ("content-encoding" in headers or message["status"] in (204, 206, 304)
+                                or _excluded(headers.get("content-type", "")))
+            if self.passthrough:
+                await self.send(message)
+            return
+        if self.passthrough or message["type"] != "http.response.body":
+            if self.start is not None and not self.passthrough:
+                await self.send(self.start)     # e.g. http.response.pathsend: send as is
+                self.passthrough = True
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.start is not None:
+            # First body chunk: decide, then send the (rewritten) start message
+            if self.encoding and (more_body or len(body) >= self.middleware.minimum_size):
+                self.compressor = _Compressor(self.encoding, self.middleware.gzip_level,
+                                              self.middleware.brotli_quality)
+            if self.compressor:
+                body = await self._compress(body, last=not more_body)
+            self._set_headers(None if more_body else len(body))
+            await self.send(self.start)
+            self.start = None
+            if not self.compressor:
+                self.passthrough = True
+        elif self.compressor:
+            body = await self._compress(body, last=not more_body)
+        await self.send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+
+class CompressionMiddleware:
+    """Brotli (if installed) or gzip, per the request's Accept-Encoding."""
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_BYTES, gzip_level: int = GZIP_LEVEL,
+                 brotli_quality: int = BROTLI_QUALITY):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept = next((v.decode("latin-1") for k, v in scope.get("headers", []) if k == b"accept-encoding"), "")
+        accepted = accepted_encodings(accept)
+        if brotli is not None and "br" in accepted:
+            encoding = "br"
+        elif "gzip" in accepted:
+            encoding = "gzip"
+        else:
+            encoding = None
+        await self.app(scope, receive, _Responder(send, encoding, self))
@@ -0,0 +1,91 @@
+"""
+HTTP caching - ETags, conditional GETs and content-hashed static assets.
+
+Responses that only change with the knowledge base (starter questions and
+their answers) carry a weak ETag and a Cache-Control header, so a CDN or
+the browser can reuse them and revalidate with If-None-Match. A matching
+validator is answered with an empty 304 before any work is done.
+
+The widget page is served twice:
+  - /widget/chat-widget.html               revalidated after WIDGET_MAX_AGE
+  - /widget/chat-widget.<hash>.html        immutable, cached for a year
+The hash is taken from the file's content, so a changed widget gets a new
+URL and never a stale copy. Embed the hashed URL (listed at `/`).
+
+Usage:
+    etag = make_etag(tenant_id, version)
+    if etag_matches(request.headers.get("If-None-Match"), etag):
+        return not_modified(etag, cache_control)
+"""
+
+import hashlib
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+from fastapi import Response
+
+WIDGET_PATH = os.getenv("WIDGET_PATH", "widget/chat-widget.html")
+WIDGET_MAX_AGE = int(os.getenv("WIDGET_MAX_AGE", "300"))            # seconds, unhashed URL
+STARTER_MAX_AGE = int(os.getenv("STARTER_MAX_AGE", "300"))          # seconds, starter questions and answers
+STARTER_STALE_SECONDS = int(os.getenv("STARTER_STALE_SECONDS", "86400"))
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+def make_etag(*parts: str) -> str:
+    """Weak ETag over the parts (weak: the compressed encodings of a body differ byte for byte)."""
+    digest = hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def _opaque(etag: str) -> str:
+    return etag.strip().removeprefix("W/")
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return _opaque(etag) in {_opaque(candidate) for candidate in if_none_match.split(",")}
+
+
+def not_modified(etag: str, cache_control: str, vary: Optional[str] = None) -> Response:
+    """Empty 304 carrying the validator and caching headers."""
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if vary:
+        headers["Vary"] = vary
+    return Response(status_code=304, headers=headers)
+
+
+def starter_cache_control() -> str:
+    """Shared-cache policy for starter questions and answers."""
+    return f"public, max-age={STARTER_MAX_AGE}, stale-while-revalidate={STARTER_STALE_SECONDS}"
+
+
+@dataclass(frozen=True)
+class HashedAsset:
+    """A static file with its content hash."""
+    body: bytes
+    media_type: str
+    digest: str
+    name: str              # file name
+    hashed_name: str       # file name with the content hash, e.g. chat-widget.3f2a9c1b7d4e.html
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.digest}"'
+
+
+@lru_cache(maxsize=None)
+def load_asset(path: str = WIDGET_PATH, media_type: str = "text/html; charset=utf-8") -> Optional[HashedAsset]:
+    """Read and hash a static file once per process (None if it doesn't exist)."""
+    asset_path = Path(path)
+    if not asset_path.exists():
+        return None
+    body = asset_path.read_bytes()
+    digest = hashlib.sha256(body).hexdigest()[:12]
+    return HashedAsset(body, media_type, digest, asset_path.name, f"{asset_path.stem}.{digest}{asset_path.suffix}")
@@ -0,0 +1,144 @@
+"""
+Logging - non-blocking structured logging for the request path.
+Records are handed to a bounded queue and written to stdout by a background
+thread, so request threads never block on I/O.
+
+Usage:
+    from utils.log import get_logger, log_event
+    logger = get_logger(__name__)
+    log_event(logger, logging.INFO, "cache_hit", sample_rate=LOG_SAMPLE_RATE, query=query[:50])
+"""
+
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import uuid
+from datetime import datetime, timezone
+from typing import Optional
+
+# Logging configuration
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")            # json | text
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "0.1"))  # for high-frequency events
+LOG_QUEUE_SIZE = 10_000
+
+ROOT_LOGGER_NAME = "career_ai"
+
+_request_id = contextvars.ContextVar("request_id", default=None)
+_listener: Optional[logging.handlers.QueueListener] = None
+dropped_records = 0
+
+
+def set_request_id(request_id: Optional[str] = None) -> str:
+    """Bind a request ID to the current context (generated if not given)."""
+    request_id = request_id or uuid.uuid4().hex[:16]
+    _request_id.set(request_id)
+    return request_id
+
+
+def get_request_id() -> Optional[str]:
+    """Return the request ID bound to the current context, if any."""
+    return _request_id.get()
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line with timestamp, level, logger, request ID and fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            payload["request_id"] = record.request_id
+        if getattr(record, "sample_rate", 1.0) < 1.0:
+            payload["sample_rate"] = record.sample_rate
+        payload.update(getattr(record, "fields", None) or {})
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    """Human-readable single line, used for local development."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        fields = getattr(record, "fields", None) or {}
+        extras = " ".join(f"{key}={value}" for key, value in fields.items())
+        request_id = getattr(record, "request_id", None)
+        prefix = f"[{request_id}] " if request_id else ""
+        line = f"{record.levelname:<7} {record.name}: {prefix}{record.getMessage()} {extras}".rstrip()
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+class _NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that stamps the request ID and drops records when the queue is full."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Runs on the calling thread, so the request context is still available
+        record.request_id = _request_id.get()
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        global dropped_records
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            dropped_records += 1
+
+
+def setup_logging(level: str = LOG_LEVEL, fmt: str = LOG_FORMAT):
+    """Attach the queue handler and start the background writer (idempotent)."""
+    global _listener
+    if _listener is not None:
+        return
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    root = logging.getLogger(ROOT_LOGGER_NAME)
+    root.setLevel(level)
+    root.addHandler(_NonBlockingQueueHandler(log_queue))
+    root.propagate = False
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Get a logger under the application namespace."""
+    setup_logging()
+    return logging.getLogger(f"{ROOT_LOGGER_NAME}.{name}")
+
+
+def log_event(logger: logging.Logger, level: int, event: str, sample_rate: float = 1.0, **fields):
+    """
+    Log a structured event.
+
+    Disabled levels return before any formatting or record creation, and
+    events with sample_rate < 1.0 are kept with that probability.
+
+    Args:
+        logger: Logger from get_logger()
+        level: logging level (e.g. logging.INFO)
+        event: Short event name
+        sample_rate: Fraction of events to keep (1.0 keeps all)
+        **fields: Structured fields added to the JSON record
+    """
+    if not logger.isEnabledFor(level):
+        return
+    if sample_rate < 1.0 and random.random() >= sample_rate:
+        return
+    logger.log(level, event, extra={"fields": fields, "sample_rate": sample_rate})
@@ -0,0 +1,332 @@
+"""
+Metrics - low-overhead timing spans, counters and histograms.
+Rendered in Prometheus text format by the /metrics endpoint in api_server.py.
+
+Spans are mirrored to OpenTelemetry when the opentelemetry SDK and OTLP
+exporter are installed and OTEL_EXPORTER_OTLP_ENDPOINT is set.
+"""
+
+import bisect
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Latency buckets in seconds (1ms .. 30s)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape_label_value(value) -> str:
+    """Escape a label value for the text exposition format (backslash, double quote, newline)."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape_label_value(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _CounterChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+
+class Counter:
+    """Monotonic counter, optionally split by labels."""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], _CounterChild] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._default = self.labels()
+
+    def labels(self, *values) -> _CounterChild:
+        child = self._children.get(values)
+        if child is None:
+            key = tuple(str(v) for v in values)
+            with self._lock:
+                child = self._children.setdefault(key, _CounterChild())
+        return child
+
+    def inc(self, amount: float = 1.0):
+        self._default.inc(amount)
+
+    def total(self) -> float:
+        return sum(child.value for child in list(self._children.values()))
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        return [(self.name, _format_labels(self.labelnames, key), child.value)
+                for key, child in sorted(self._children.items())]
+
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "count", "_lock")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+
+class Histogram:
+    """Cumulative histogram with fixed buckets, optionally split by labels."""
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._children: Dict[Tuple[str, ...], _HistogramChild] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._default = self.labels()
+
+    def labels(self, *values) -> _HistogramChild:
+        child = self._children.get(values)
+        if child is None:
+            key = tuple(str(v) for v in values)
+            with self._lock:
+                child = self._children.setdefault(key, _HistogramChild(self.buckets))
+        return child
+
+    def observe(self, value: float):
+        self._default.observe(value)
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        lines = []
+        for key, child in sorted(self._children.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), child.counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append((f"{self.name}_bucket", _format_labels(self.labelnames, key, f'le="{le}"'), cumulative))
+            labels = _format_labels(self.labelnames, key)
+            lines.append((f"{self.name}_sum", labels, child.sum))
+            lines.append((f"{self.name}_count", labels, child.count))
+        return lines
+
+
+class Gauge:
+    """Gauge whose value is computed at scrape time."""
+
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, function: Callable[[], float]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = ()
+        self._function = function
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        try:
+            return [(self.name, "", float(self._function()))]
+        except Exception:
+            return []
+
+
+class Registry:
+    """Holds all metrics and renders them in Prometheus text format."""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {value}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+    """Get or create a counter in the global registry."""
+    return REGISTRY.register(Counter(name, documentation, labelnames))
+
+
+def histogram(name: str, documentation: str, labelnames: Sequence[str] = (),
+              buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+    """Get or create a histogram in the global registry."""
+    return REGISTRY.register(Histogram(name, documentation, labelnames, buckets))
+
+
+def gauge(name: str, documentation: str, function: Callable[[], float]) -> Gauge:
+    """Get or create a computed gauge in the global registry."""
+    return REGISTRY.register(Gauge(name, documentation, function))
+
+
+def render_metrics() -> str:
+    """Render every registered metric in Prometheus text exposition format."""
+    return REGISTRY.render()
+
+
+# Pipeline metrics
+STAGE_SECONDS = histogram(
+    "chat_stage_duration_seconds", "Time spent in each chat pipeline stage", ("stage",)
+)
+CHAT_REQUESTS = counter("chat_requests_total", "Chat requests processed")
+CACHE_LOOKUPS = counter("chat_cache_lookups_total", "Response cache lookups", ("result",))
+CACHE_TIER_HITS = counter("chat_cache_tier_hits_total", "Response cache hits by tier", ("tier",))
+TOOL_LOOP_ITERATIONS = histogram(
+    "chat_tool_loop_iterations", "LLM rounds per chat request", buckets=(1, 2, 3, 4, 5, 6, 8, 10)
+)
+TOOL_CALLS = counter("chat_tool_calls_total", "Tool calls executed", ("tool",))
+LLM_REQUESTS = counter("llm_requests_total", "LLM API calls", ("outcome",))
+LLM_TOKENS = counter("llm_tokens_total", "LLM tokens from response usage", ("direction",))
+LLM_COST = counter("llm_cost_usd_total", "Estimated LLM spend from token usage and MODEL_PRICING")
+BUDGET_EXHAUSTED = counter(
+    "chat_budget_exhausted_total", "Requests that ran out of LLM rounds, time or were cancelled", ("reason",)
+)
+LLM_CACHED_PROMPT_TOKENS = counter(
+    "llm_prefix_cache_tokens_total", "Prompt tokens served from the provider's prefix cache"
+)
+ADMISSION_REJECTIONS = counter(
+    "admission_rejections_total", "Requests turned away by rate limits or the LLM gate", ("reason",)
+)
+LLM_QUEUE_WAIT = histogram("llm_queue_wait_seconds", "Time spent waiting for an LLM slot")
+KNOWLEDGE_RELOADS = counter(
+    "knowledge_reloads_total", "Hot re-indexes of a changed knowledge directory", ("outcome",)
+)
+MODEL_ROUTES = counter("llm_model_routes_total", "Chat turns routed to each model", ("model", "reason"))
+LLM_MODEL_SECONDS = histogram("llm_model_duration_seconds", "LLM round trip time per model", ("model",))
+LLM_MODEL_COST = counter("llm_model_cost_usd_total", "Estimated LLM spend per model", ("model",))
+PROFILES_CAPTURED = counter("chat_profiles_total", "Chat requests run under the sampling profiler")
+STARTER_ANSWERS = counter(
+    "starter_answers_total", "Starter question answers by source (memory, chat, fallback)", ("source",)
+)
+HTTP_NOT_MODIFIED = counter("http_not_modified_total", "Conditional GETs answered with 304", ("route",))
+VECTOR_INDEX_EVENTS = counter(
+    "vector_index_cache_events_total", "Quantized (tenant) index loads and memory evictions", ("event",)
+)
+LLM_PREFIX_CACHE_HITS = counter(
+    "llm_prefix_cache_requests_total", "LLM calls that reported prefix-cache usage", ("result",)
+)
+
+
+def _cache_hit_ratio() -> float:
+    hits = CACHE_LOOKUPS.labels("hit").value
+    total = hits + CACHE_LOOKUPS.labels("miss").value
+    return hits / total if total else 0.0
+
+
+gauge("chat_cache_hit_ratio", "Fraction of cache lookups that were hits", _cache_hit_ratio)
+
+
+def _prefix_cache_token_ratio() -> float:
+    prompt_tokens = LLM_TOKENS.labels("in").value
+    return LLM_CACHED_PROMPT_TOKENS.total() / prompt_tokens if prompt_tokens else 0.0
+
+
+gauge("llm_prefix_cache_token_ratio", "Fraction of prompt tokens served from the provider's prefix cache",
+      _prefix_cache_token_ratio)
+
+
+# Optional OpenTelemetry export
+_tracer = None
+
+
+def _init_tracing():
+    """Configure an OTLP span exporter if OpenTelemetry is installed and configured."""
+    global _tracer
+    if not os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT"):
+        return
+    try:
+        from opentelemetry import trace
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+    except ImportError:
+        print("⚠️ OTEL_EXPORTER_OTLP_ENDPOINT set but opentelemetry is not installed, tracing disabled")
+        return
+
+    provider = TracerProvider(resource=Resource.create({"service.name": "career-ai-assistant"}))
+    provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+    trace.set_tracer_provider(provider)
+    _tracer = trace.get_tracer("career-ai-assistant")
+
+
+_init_tracing()
+
+
+class span:
+    """
+    Time a pipeline stage into chat_stage_duration_seconds.
+
+    Usage:
+        with span("retrieval"):
+            ...
+    """
+
+    __slots__ = ("_child", "_start", "_otel")
+
+    def __init__(self, stage: str):
+        self._child = STAGE_SECONDS.labels(stage)
+        self._otel = _tracer.start_as_current_span(stage) if _tracer is not None else None
+
+    def __enter__(self):
+        if self._otel is not None:
+            self._otel.__enter__()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._child.observe(time.perf_counter() - self._start)
+        if self._otel is not None:
+            self._otel.__exit__(exc_type, exc, tb)
+        return False
+
+
+def record_usage(usage: Optional[object]):
+    """Add prompt/completion token counts from an OpenAI usage object."""
+    if usage is None:
+        return
+    LLM_TOKENS.labels("in").inc(getattr(usage, "prompt_tokens", 0) or 0)
+    LLM_TOKENS.labels("out").inc(getattr(usage, "completion_tokens", 0) or 0)
+
+    # Providers that support prompt caching report it under prompt_tokens_details
+    details = getattr(usage, "prompt_tokens_details", None)
+    if details is None:
+        return
+    cached = getattr(details, "cached_tokens", None)
+    if cached is None and isinstance(details, dict):
+        cached = details.get("cached_tokens")
+    if cached is None:
+        return
+    LLM_CACHED_PROMPT_TOKENS.inc(cached)
+    LLM_PREFIX_CACHE_HITS.labels("hit" if cached else "miss").inc()
@@ -0,0 +1,236 @@
+"""
+Profiling - opt-in sampling profiler for single chat requests.
+
+A request is profiled when it carries an `X-Profile` header equal to
+ADMIN_TOKEN, or when it is picked by PROFILE_SAMPLE_RATE. The whole chat()
+call then runs with a background thread that records the calling thread's
+Python stack every PROFILE_INTERVAL_MS. That shows where the time went:
+Chroma, the embedding model, DiskCache, SQLite or the tool loop.
+
+The sampler needs the GIL to read the stack, so it samples when the
+profiled thread releases it: at the interpreter's switch interval, in C
+and Rust extensions that drop it (Chroma, the embedding model), or in I/O.
+Short syscalls such as stat() can therefore show up more often than their
+real cost. Read the profile for where the time goes, not as exact numbers.
+
+Each profile is written to PROFILE_DIR as a speedscope file (open it at
+https://www.speedscope.app) or as collapsed stacks for flamegraph.pl,
+and only the newest PROFILE_KEEP are kept. api_server.py lists and serves
+them under /admin/profiles.
+
+With no header and PROFILE_SAMPLE_RATE=0 (the default), should_profile()
+is one comparison and nothing else runs.
+
+Usage:
+    if should_profile(request.headers.get("X-Profile")):
+        result, profile_id = profile_call(chat, message, history)
+"""
+
+import json
+import os
+import random
+import re
+import secrets
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config import ADMIN_TOKEN
+from utils.log import get_logger, get_request_id
+from utils.metrics import PROFILES_CAPTURED
+
+logger = get_logger(__name__)
+
+# Profiler settings
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))     # share of requests profiled
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_FORMAT = os.getenv("PROFILE_FORMAT", "speedscope")             # speedscope | collapsed
+PROFILE_DIR = os.getenv("PROFILE_DIR", "data/profiles")
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "50"))
+
+SPEEDSCOPE_SUFFIX = ".speedscope.json"
+COLLAPSED_SUFFIX = ".collapsed"
+_SAFE_ID = re.compile(r"[^A-Za-z0-9_.-]")
+_ROOT = os.getcwd() + os.sep
+
+Frame = Tuple[str, str, int]        # function, file, first line
+
+
+def _short_path(filename: str) -> str:
+    """Path relative to the repo or site-packages, to keep frame names readable."""
+    marker = filename.rfind("site-packages" + os.sep)
+    if marker != -1:
+        return filename[marker + len("site-packages") + 1:]
+    if filename.startswith(_ROOT):
+        return filename[len(_ROOT):]
+    return filename
+
+
+class StackSampler:
+    """Records one thread's Python stack at a fixed interval from a background thread."""
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples: List[Tuple[int, ...]] = []     # root-first frame indexes, in time order
+        self.frames: List[Frame] = []
+        self._frame_index: Dict[Any, int] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+        self.started = 0.0
+        self.duration = 0.0
+
+    def _frame_id(self, code) -> int:
+        index = self._frame_index.get(code)
+        if index is None:
+            index = self._frame_index[code] = len(self.frames)
+            self.frames.append((code.co_name, _short_path(code.co_filename), code.co_firstlineno))
+        return index
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(self._frame_id(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                stack.reverse()
+                self.samples.append(tuple(stack))
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.duration = time.perf_counter() - self.started
+
+
+def _frame_name(frame: Frame) -> str:
+    return f"{frame[0]} ({frame[1]}:{frame[2]})"
+
+
+def to_collapsed(sampler: StackSampler) -> str:
+    """Collapsed stacks ("a;b;c count" per line) for flamegraph.pl or speedscope."""
+    counts = Counter(sampler.samples)
+    names = [_frame_name(frame).replace(";", ":") for frame in sampler.frames]
+    return "".join(f"{';'.join(names[i] for i in stack)} {n}\n" for stack, n in counts.most_common())
+
+
+def to_speedscope(sampler: StackSampler, name: str) -> Dict:
+    """Speedscope "sampled" profile, in time order, weighted by the sampling interval."""
+    interval_ms = sampler.interval * 1000
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "name": name,
+        "exporter": "career-ai utils/profiling.py",
+        "shared": {"frames": [{"name": func, "file": file, "line": line} for func, file, line in sampler.frames]},
+        "profiles": [{
+            "type": "sampled",
+            "name": name,
+            "unit": "milliseconds",
+            "startValue": 0,
+            "endValue": round(sampler.duration * 1000, 3),
+            "samples": [list(stack) for stack in sampler.samples],
+            "weights": [interval_ms] * len(sampler.samples),
+        }],
+    }
+
+
+def should_profile(header_value: Optional[str]) -> bool:
+    """
+    Whether to profile this request.
+
+    Args:
+        header_value: The request's X-Profile header, if any
+
+    Returns:
+        True if the header carries ADMIN_TOKEN or the request is sampled
+    """
+    if header_value is None and not PROFILE_SAMPLE_RATE:
+        return False
+    if header_value is not None and ADMIN_TOKEN:
+        if secrets.compare_digest(header_value.encode(), ADMIN_TOKEN.encode()):
+            return True
+    return random.random() < PROFILE_SAMPLE_RATE
+
+
+def _prune(directory: Path):
+    profiles = [p for p in directory.iterdir() if p.name.endswith((SPEEDSCOPE_SUFFIX, COLLAPSED_SUFFIX))]
+    profiles.sort(key=lambda p: p.stat().st_mtime)
+    for stale in profiles[:max(len(profiles) - PROFILE_KEEP, 0)]:
+        stale.unlink(missing_ok=True)
+
+
+def _save(sampler: StackSampler, profile_id: str) -> Optional[str]:
+    """Write the profile in PROFILE_FORMAT; returns its ID, or None if it couldn't be written."""
+    try:
+        directory = Path(PROFILE_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        if PROFILE_FORMAT == "collapsed":
+            path = directory / (profile_id + COLLAPSED_SUFFIX)
+            path.write_text(to_collapsed(sampler), encoding="utf-8")
+        else:
+            path = directory / (profile_id + SPEEDSCOPE_SUFFIX)
+            path.write_text(json.dumps(to_speedscope(sampler, profile_id)), encoding="utf-8")
+        _prune(directory)
+    except OSError:
+        logger.exception("Could not save profile %s", profile_id)
+        return None
+    PROFILES_CAPTURED.inc()
+    logger.info("Saved profile %s (%d samples, %.0f ms)", path, len(sampler.samples), sampler.duration * 1000)
+    return profile_id
+
+
+def profile_call(fn: Callable, *args, **kwargs) -> Tuple[Any, Optional[str]]:
+    """
+    Run fn(*args, **kwargs) under the sampling profiler and save the profile.
+
+    The profile is saved even if fn raises. Failing to write it never fails
+    the call.
+
+    Returns:
+        (fn's result, profile ID or None if it couldn't be saved)
+    """
+    request_id = get_request_id() or uuid.uuid4().hex[:12]
+    profile_id = _SAFE_ID.sub("_", f"{time.strftime('%Y%m%d-%H%M%S')}-{request_id}")
+    sampler = StackSampler(threading.get_ident(), PROFILE_INTERVAL_MS / 1000)
+    sampler.start()
+    try:
+        result = fn(*args, **kwargs)
+    finally:
+        sampler.stop()
+        profile_id = _save(sampler, profile_id)
+    return result, profile_id
+
+
+def list_profiles() -> List[Dict]:
+    """Saved profiles, newest first."""
+    directory = Path(PROFILE_DIR)
+    if not directory.exists():
+        return []
+    profiles = []
+    for path in directory.iterdir():
+        for suffix, fmt in ((SPEEDSCOPE_SUFFIX, "speedscope"), (COLLAPSED_SUFFIX, "collapsed")):
+            if path.name.endswith(suffix):
+                stat = path.stat()
+                profiles.append({"id": path.name[:-len(suffix)], "format": fmt, "bytes": stat.st_size,
+                                 "created": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(stat.st_mtime))})
+    return sorted(profiles, key=lambda p: p["created"], reverse=True)
+
+
+def get_profile_path(profile_id: str) -> Optional[Path]:
+    """Path of a saved profile, or None if there is no such profile."""
+    if _SAFE_ID.search(profile_id):
+        return None
+    for suffix in (SPEEDSCOPE_SUFFIX, COLLAPSED_SUFFIX):
+        path = Path(PROFILE_DIR) / (profile_id + suffix)
+        if path.exists():
+            return path
+    return None
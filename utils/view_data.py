@@ -4,24 +4,39 @@ Simple script to view data from the database.
 Usage: python -m utils.view_data leads
        python -m utils.view_data knowledge_gaps
        python -m utils.view_data stats
+       python -m utils.view_data budgets
+       python -m utils.view_data routes
+       python -m utils.view_data export leads --format csv --output leads.csv
+       python -m utils.view_data export conversations --format ndjson --cursor nightly > new.ndjson
+       python -m utils.view_data export routes --format parquet --start 2026-01-01 --end 2026-02-01 -o jan.parquet
+       python -m utils.view_data cursors
+
+Listings and exports stream rows in chunks (storage/export.py), so they
+work on tables of any size.
 """
 
+import argparse
 import sys
-from storage.database import get_all_leads, get_all_knowledge_gaps, get_stats
+from storage.database import get_stats, get_budget_analytics, get_routing_analytics, get_export_cursors
+from storage.export import EXPORT_FORMATS, EXPORT_TABLES, ExportError, TableExport, iter_row_chunks
 from datetime import datetime
 
+def _newest_first(table: str):
+    for chunk in iter_row_chunks(table, newest_first=True):
+        yield from chunk
+
 def view_leads():
     """Display all leads in a formatted table"""
-    leads = get_all_leads()
+    total = get_stats()["total_leads"]
 
-    if not leads:
+    if not total:
         print("No leads found in database")
         return
 
-    print(f"\n📧 Total Leads: {len(leads)}\n")
+    print(f"\n📧 Total Leads: {total}\n")
     print("="*100)
 
-    for lead in leads:
+    for lead in _newest_first("leads"):
         print(f"ID: {lead['id']}")
         print(f"Email: {lead['email']}")
         print(f"Name: {lead['name']}")
@@ -31,16 +46,16 @@ def view_leads():
 
 def view_knowledge_gaps():
     """Display all knowledge gaps."""
-    gaps = get_all_knowledge_gaps()
+    total = get_stats()["total_knowledge_gaps"]
 
-    if not gaps:
+    if not total:
         print("✅ No knowledge gaps found in database.")
         return 
     
-    print(f"\n🧠 Total Knowledge Gaps: {len(gaps)}\n")
+    print(f"\n🧠 Total Knowledge Gaps: {total}\n")
     print("=" * 100)
 
-    for gap in gaps:
+    for gap in _newest_first("knowledge_gaps"):
         print(f"ID: {gap['id']}")
         print(f"Question: {gap['question']}")
         print(f"Timestamp: {gap['timestamp']}")
@@ -56,9 +71,78 @@ def view_stats():
     print(f"Total Knowledge Gaps: {stats['total_knowledge_gaps']}")
     print("=" * 50)
 
+def view_budgets():
+    """Display LLM budget usage across chat requests."""
+    budgets = get_budget_analytics()
+
+    print("\n💰 LLM Budget Usage\n")
+    print("=" * 50)
+    print(f"Requests: {budgets['total_requests']}")
+    print(f"Avg Rounds: {budgets['avg_rounds'] or 0}  (max {budgets['max_rounds'] or 0})")
+    print(f"Tokens: {budgets['prompt_tokens'] or 0} prompt / {budgets['completion_tokens'] or 0} completion")
+    print(f"Estimated Cost: ${budgets['total_cost_usd'] or 0:.4f}")
+    print(f"Budget Exhausted: {budgets['exhausted']}")
+    for reason, count in budgets["exhausted_by_reason"].items():
+        print(f"   {reason}: {count}")
+    print("=" * 50)
+
+def view_routes():
+    """Display model routing: turns, latency and cost per model."""
+    routes = get_routing_analytics()
+
+    print("\n🔀 Model Routing\n")
+    print("=" * 50)
+    if not routes["models"]:
+        print("No routed turns recorded")
+    for row in routes["models"]:
+        print(f"{row['model']}: {row['turns']} turns, avg {row['avg_duration_ms']} ms, "
+              f"${row['total_cost_usd']:.4f} total (${row['avg_cost_usd']:.6f}/turn)")
+    for row in routes["reasons"]:
+        print(f"   {row['reason']:<16} -> {row['model']}: {row['turns']}")
+    print("=" * 50)
+
+def export_table(args):
+    """Stream a table export to a file or stdout."""
+    parser = argparse.ArgumentParser(prog="python -m utils.view_data export")
+    parser.add_argument("table", choices=list(EXPORT_TABLES))
+    parser.add_argument("--format", choices=list(EXPORT_FORMATS), default="csv")
+    parser.add_argument("-o", "--output", help="File to write (default: stdout)")
+    parser.add_argument("--since-id", type=int, help="Only rows after this id (a previous export's next id)")
+    parser.add_argument("--cursor", help="Named cursor: continue from its last export and advance it")
+    parser.add_argument("--start", help="Only rows at or after this ISO date/time (UTC)")
+    parser.add_argument("--end", help="Only rows before this ISO date/time (UTC)")
+    options = parser.parse_args(args)
+
+    try:
+        export = TableExport(options.table, options.format, options.since_id, options.start, options.end,
+                             options.cursor)
+    except ExportError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+    out = open(options.output, "wb") if options.output else sys.stdout.buffer
+    try:
+        for block in export:
+            out.write(block)
+    finally:
+        if options.output:
+            out.close()
+    print(f"📤 Exported {export.rows} {options.table} rows (next --since-id {export.next_since})", file=sys.stderr)
+
+def view_cursors():
+    """Display named incremental export cursors."""
+    cursors = get_export_cursors()
+
+    print("\n📤 Export Cursors\n")
+    print("=" * 50)
+    if not cursors:
+        print("No export cursors yet")
+    for cursor in cursors:
+        print(f"{cursor['name']} / {cursor['table_name']}: last id {cursor['last_id']} ({cursor['updated_at']})")
+    print("=" * 50)
+
 def main():
     if len(sys.argv) < 2:
-        print("Usage: python -m utils.view_data [leads|gaps|stats]")
+        print("Usage: python -m utils.view_data [leads|gaps|stats|budgets|routes|export|cursors]")
         sys.exit(1)
 
     command = sys.argv[1].lower()
@@ -69,9 +153,17 @@ def main():
         view_knowledge_gaps()
     elif command == "stats":
         view_stats()
+    elif command == "budgets":
+        view_budgets()
+    elif command == "routes":
+        view_routes()
+    elif command == "export":
+        export_table(sys.argv[2:])
+    elif command == "cursors":
+        view_cursors()
     else:
         print(f"Unknown command: {command}")
-        print(f"Available commands: leads, gaps, stats")
+        print(f"Available commands: leads, gaps, stats, budgets, routes, export, cursors")
         sys.exit(1)
 
 if __name__ == "__main__":